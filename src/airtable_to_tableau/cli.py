@@ -4,17 +4,31 @@ cli.py
 Description:
     Command-line interface for the Airtable to Tableau export tool.
 
-    This script supports two primary commands:
+    This script supports these commands:
     - `export`: Fetches data from Airtable, processes it according to a JSON config,
-                and exports it as a Tableau Hyper file.
-    - `read`:   Reads a .hyper file and prints the contents as a preview.
+                and exports it as a Tableau Hyper file (plus any other configured outputs).
+    - `read`:   Prints the first rows of a .hyper table (limit, columns and filters run in Hyper).
+    - `dump`:   Streams a Hyper table to a CSV, NDJSON or Parquet file (or stdout), optionally gzipped.
+    - `profile`: Prints per-column statistics of a Hyper table, computed in Hyper and cached.
+    - `bench`:  Runs the export pipeline against a local fake Airtable and reports throughput.
 
 Usage:
     Export Airtable to Hyper:
-        airtable-export export --config path/to/config.json --profile your_profile_name
+        airtable-export export --config path/to/config.json --profile your_profile_name [--jobs 4]
 
     Read a Hyper file:
         airtable-export read --input output/buildings.hyper --table Building
+        airtable-export read --input output/buildings.hyper --columns Name,Capacity --where "Capacity >= 100" --limit 20 --format csv
+
+    Dump a Hyper table without loading it into memory:
+        airtable-export dump --input output/buildings.hyper --output output/buildings.csv.gz
+
+    Profile the columns of an extract:
+        airtable-export profile --input output/buildings.hyper
+
+    Benchmark the pipeline against a local fake Airtable:
+        airtable-export bench --rows 100000 --latency 0.05
+        airtable-export bench --compare-load --load-rows 100000 1000000
 
 Requirements:
     - Set AIRTABLE_API_KEY as an environment variable.
@@ -24,16 +38,14 @@ Author: Jaimie Garner
 Date: 2025-06-06
 """
 import argparse
+import json
 import os
 import sys
+import time
 
-from airtable_to_tableau.libs.fetch_airtable import fetch_airtable
-from airtable_to_tableau.libs.export_hyper import export_to_hyper
-from airtable_to_tableau.libs.read_hyper import read_hyper_to_dataframe
+from airtable_to_tableau.libs.read_hyper import read_hyper_rows, write_hyper_rows
 from airtable_to_tableau.libs.config_utils import load_config
-from airtable_to_tableau.libs.sanitize_dataframe import sanitize_dataframe
-from airtable_to_tableau.libs.flatten_utils import flatten_lists_in_dataframe
-from airtable_to_tableau.libs.transform_utils import apply_column_transformations
+from airtable_to_tableau.libs.export_runner import run_exports, print_summary
 
 
 def main():
@@ -46,11 +58,55 @@ def main():
     config_parser = subparsers.add_parser("export", help="Export using a JSON config")
     config_parser.add_argument("--config", required=True, help="Path to JSON config file")
     config_parser.add_argument("--profile", default="default", help="Profile name (default: default)")
+    config_parser.add_argument("--jobs", type=int, default=4, help="Number of tables to export concurrently (default: 4)")
+    config_parser.add_argument("--stream", action="store_true", help="Stream pages into the Hyper file instead of loading whole tables")
+    config_parser.add_argument("--batch-pages", type=int, default=1, help="Pages per streamed batch (default: 1)")
+    config_parser.add_argument("--snapshot", action="store_true", help="Save raw Airtable pages as compressed snapshots")
+    config_parser.add_argument("--from-snapshot", action="store_true", help="Replay the latest snapshot instead of calling Airtable")
+    config_parser.add_argument("--max-age", type=float, help="Replay snapshots younger than this many seconds, otherwise fetch and snapshot")
 
     # 🔍 Read subcommand
     read_parser = subparsers.add_parser("read", help="Read a .hyper file and display it")
     read_parser.add_argument("--input", required=True, help="Path to the .hyper file")
-    read_parser.add_argument("--table", default="Building", help="Table name (default: Building)")
+    read_parser.add_argument("--table", help="Table name (default: the file's only table)")
+    read_parser.add_argument("--limit", type=int, default=5, help="Rows to show (default: 5; 0 for all)")
+    read_parser.add_argument("--columns", help="Comma-separated columns to show (default: all)")
+    read_parser.add_argument("--where", action="append", default=[],
+                             help='Filter such as "Capacity >= 100" or "Region in East,West"; repeat to AND them')
+    read_parser.add_argument("--format", choices=["table", "csv", "ndjson"], default="table",
+                             help="Output format (default: table)")
+
+    # 📤 Dump subcommand
+    dump_parser = subparsers.add_parser("dump", help="Stream a Hyper table to CSV, NDJSON or Parquet")
+    dump_parser.add_argument("--input", required=True, help="Path to the .hyper file")
+    dump_parser.add_argument("--table", help="Table name (default: the file's only table)")
+    dump_parser.add_argument("--output", default="-", help="Output file, or - for stdout (default: -)")
+    dump_parser.add_argument("--format", choices=["csv", "ndjson", "parquet"],
+                             help="Output format (default: from the --output extension, else csv)")
+    dump_parser.add_argument("--gzip", action="store_true", help="Gzip the output (implied by a .gz --output)")
+    dump_parser.add_argument("--columns", help="Comma-separated columns to include (default: all)")
+    dump_parser.add_argument("--batch-rows", type=int, help="Rows fetched and encoded per batch")
+
+    # 📊 Profile subcommand
+    profile_parser = subparsers.add_parser("profile", help="Per-column statistics of a Hyper table")
+    profile_parser.add_argument("--input", required=True, help="Path to the .hyper file")
+    profile_parser.add_argument("--table", help="Table name (default: the file's only table)")
+    profile_parser.add_argument("--top", type=int, default=5, help="Most frequent values per column (default: 5)")
+    profile_parser.add_argument("--refresh", action="store_true", help="Recompute even if a cached profile is current")
+    profile_parser.add_argument("--json", action="store_true", help="Print the profile as JSON")
+
+    # 🏁 Benchmark subcommand
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the export pipeline against a local fake Airtable")
+    bench_parser.add_argument("--rows", type=int, default=10000, help="Rows in the synthetic table (default: 10000)")
+    bench_parser.add_argument("--page-size", type=int, default=100, help="Records per page (default: 100)")
+    bench_parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request (default: 0)")
+    bench_parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with a 429 (default: off)")
+    bench_parser.add_argument("--output-dir", default="output/bench", help="Where to write the benchmark extract")
+    bench_parser.add_argument("--stream", action="store_true", help="Benchmark the streaming export path")
+    bench_parser.add_argument("--ingest", choices=["columnar", "pandas"], help="Record ingest mode (default: AIRTABLE_INGEST or columnar)")
+    bench_parser.add_argument("--compare-load", action="store_true", help="Compare COPY and Inserter Hyper load paths instead")
+    bench_parser.add_argument("--load-rows", type=int, nargs="+", default=[100000, 1000000],
+                              help="Table sizes for --compare-load (default: 100000 1000000)")
 
     args = parser.parse_args()
 
@@ -58,56 +114,99 @@ def main():
         config = load_config(args.config, profile_name=args.profile)
 
         api_key = os.getenv("AIRTABLE_API_KEY")
-        if not api_key:
+        if not api_key and not args.from_snapshot:
             print("❌ Missing AIRTABLE_API_KEY in environment.")
             sys.exit(1)
 
-        for entry in config.get("tables", []):
-            base_id = entry["base_id"]
-            table_name = entry["table_name"]
-            output_file = entry["output_file"]
-            column_config = entry.get("columns", [])
-            column_order = entry.get("column_order")
-
-            print(f"\n📥 Fetching from {table_name}...")
-
-            try:
-                records = fetch_airtable(base_id, table_name, api_key)
-            except Exception as e:
-                print(f"❌ Error fetching data from {table_name}: {e}")
-                continue
-
-            if not records:
-                print(f"⚠️  No records returned for table {table_name}. Skipping.")
-                continue
-
-            try:
-                df = sanitize_dataframe(flatten_lists_in_dataframe(records))
-                df = apply_column_transformations(df, column_config, column_order)
-            except Exception as e:
-                print(f"❌ Error processing records from {table_name}: {e}")
-                continue
-
-            print(f"💾 Writing {len(df)} rows to {output_file}...")
-            try:
-                export_to_hyper(df, output_file=output_file, table_name=table_name)
-            except Exception as e:
-                print(f"❌ Failed to export {table_name} to Hyper: {e}")
-                continue
+        snapshot = {"write": args.snapshot, "replay": args.from_snapshot, "max_age": args.max_age}
+
+        started = time.perf_counter()
+        results = run_exports(
+            config.get("tables", []),
+            api_key,
+            jobs=args.jobs,
+            stream=args.stream,
+            batch_pages=args.batch_pages,
+            snapshot=snapshot,
+        )
+        print_summary(results, elapsed=time.perf_counter() - started)
 
         print("\n✅ All exports completed.")
 
     elif args.command == "read":
+        limit = args.limit if args.limit > 0 else None
+        columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
         try:
-            df = read_hyper_to_dataframe(args.input, args.table)
-            if df is None:
-                print("❌ Unable to read table. Please check the table name and file path.")
-                sys.exit(1)
-            print(df.head())
+            if args.format == "table":
+                df = read_hyper_rows(args.input, args.table, limit=limit, columns=columns, where=args.where)
+                print(df.to_string(index=False) if len(df) else f"(no rows) columns: {', '.join(df.columns)}")
+            else:
+                write_hyper_rows(sys.stdout.buffer, args.input, args.table, limit=limit, columns=columns,
+                                 where=args.where, fmt=args.format)
+                sys.stdout.buffer.flush()
         except Exception as e:
             print(f"❌ Error reading Hyper file: {e}")
             sys.exit(1)
 
+    elif args.command == "dump":
+        from airtable_to_tableau.libs.hyper_dump import dump_chunks, dump_to_file
+
+        spec = {}
+        if args.table:
+            spec["table"] = args.table
+        if args.columns:
+            spec["columns"] = [c.strip() for c in args.columns.split(",") if c.strip()]
+        try:
+            if args.output == "-":
+                with dump_chunks(args.input, spec, fmt=args.format or "csv", compress=args.gzip,
+                                 batch_rows=args.batch_rows) as chunks:
+                    for chunk in chunks:
+                        sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+            else:
+                written = dump_to_file(args.input, args.output, spec, fmt=args.format,
+                                       compress=args.gzip or None, batch_rows=args.batch_rows)
+                print(f"✅ Wrote {args.output} ({written / 1024 / 1024:.1f} MB)")
+        except Exception as e:
+            print(f"❌ Error dumping Hyper file: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "profile":
+        from airtable_to_tableau.libs.hyper_profile import get_profile, print_profile
+
+        try:
+            profile = get_profile(args.input, args.table, top=args.top, refresh=args.refresh)
+        except Exception as e:
+            print(f"❌ Error profiling Hyper file: {e}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(profile, indent=2, default=str))
+        else:
+            print_profile(profile)
+
+    elif args.command == "bench":
+        from airtable_to_tableau.libs.benchmark import (
+            run_benchmark,
+            print_benchmark,
+            run_load_benchmark,
+            print_load_benchmark,
+        )
+
+        if args.compare_load:
+            print_load_benchmark(run_load_benchmark(args.load_rows, output_dir=args.output_dir))
+            return
+
+        report = run_benchmark(
+            rows=args.rows,
+            page_size=args.page_size,
+            latency=args.latency,
+            fail_every=args.fail_every,
+            output_dir=args.output_dir,
+            stream=args.stream,
+            ingest=args.ingest,
+        )
+        print_benchmark(report)
+
     else:
         parser.print_help()
 
@@ -0,0 +1,156 @@
+"""
+airtable_client.py
+
+Description:
+    Shared HTTP client for every Airtable API call made by the export tool.
+    Holds one keep-alive `requests.Session` with a sized connection pool so
+    pages reuse TLS connections, enforces connect/read timeouts, and retries
+    throttled (429) and server-side (5xx) failures with jittered exponential
+    backoff, honoring `Retry-After` when Airtable sends it. Requests against a
+    base are throttled by that base's token bucket from `rate_limiter.py`.
+
+Classes:
+    - AirtableClient: Pooled, retrying Airtable client.
+    - AirtableAPIError: Raised for non-retryable or exhausted failures.
+
+Functions:
+    - get_client(api_key=None): Returns the shared client for an API key.
+
+Environment:
+    - AIRTABLE_API_KEY:         Default API key when none is passed in.
+    - AIRTABLE_API_URL:         API root (default: https://api.airtable.com).
+    - AIRTABLE_CONNECT_TIMEOUT: Connect timeout in seconds (default: 5).
+    - AIRTABLE_READ_TIMEOUT:    Read timeout in seconds (default: 60).
+    - AIRTABLE_MAX_RETRIES:     Retries per request (default: 5).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from airtable_to_tableau.libs.rate_limiter import get_base_limiter
+
+DEFAULT_API_URL = "https://api.airtable.com"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AirtableAPIError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AirtableClient:
+    def __init__(
+        self,
+        api_key,
+        api_url=None,
+        pool_size=16,
+        connect_timeout=None,
+        read_timeout=None,
+        max_retries=None,
+        backoff_base=0.5,
+        backoff_max=30.0,
+    ):
+        if not api_key:
+            raise ValueError("Missing AIRTABLE_API_KEY environment variable.")
+
+        self.api_url = (api_url or os.getenv("AIRTABLE_API_URL", DEFAULT_API_URL)).rstrip("/")
+        self.timeout = (
+            float(connect_timeout if connect_timeout is not None else os.getenv("AIRTABLE_CONNECT_TIMEOUT", 5)),
+            float(read_timeout if read_timeout is not None else os.getenv("AIRTABLE_READ_TIMEOUT", 60)),
+        )
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("AIRTABLE_MAX_RETRIES", 5))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path):
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    def _backoff(self, attempt, response=None):
+        """Seconds to sleep before retry `attempt`; `Retry-After` wins over the jittered backoff."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def get(self, path, params=None, base_id=None, stats=None, headers=None):
+        """
+        GET `path` (relative to the API root) and return the `requests.Response`.
+        `stats`, when given, is a dict whose "requests" and "retries" counters are incremented.
+        """
+        limiter = get_base_limiter(base_id) if base_id else None
+        url = self.url(path)
+        attempt = 0
+
+        while True:
+            if limiter:
+                limiter.acquire()
+            if stats is not None:
+                stats["requests"] = stats.get("requests", 0) + 1
+
+            response = None
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise AirtableAPIError(f"Request to {url} failed after {attempt + 1} attempts: {e}")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 400:
+                        raise AirtableAPIError(
+                            f"Airtable API error {response.status_code}: {response.text}",
+                            status_code=response.status_code,
+                        )
+                    return response
+                if attempt >= self.max_retries:
+                    raise AirtableAPIError(
+                        f"Airtable API error {response.status_code} after {attempt + 1} attempts: {response.text}",
+                        status_code=response.status_code,
+                    )
+
+            if stats is not None:
+                stats["retries"] = stats.get("retries", 0) + 1
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def get_json(self, path, params=None, base_id=None, stats=None):
+        return self.get(path, params=params, base_id=base_id, stats=stats).json()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key=None):
+    """Return the process-wide client for `api_key` (defaults to AIRTABLE_API_KEY) and the current API URL."""
+    api_key = api_key or os.getenv("AIRTABLE_API_KEY")
+    if not api_key:
+        raise ValueError("Missing AIRTABLE_API_KEY environment variable.")
+    api_url = os.getenv("AIRTABLE_API_URL", DEFAULT_API_URL)
+    with _clients_lock:
+        client = _clients.get((api_key, api_url))
+        if client is None:
+            client = AirtableClient(api_key, api_url=api_url)
+            _clients[(api_key, api_url)] = client
+        return client
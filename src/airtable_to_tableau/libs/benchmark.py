@@ -0,0 +1,238 @@
+"""
+benchmark.py
+
+Description:
+    End-to-end throughput benchmark for the export pipeline. Starts a local
+    `FakeAirtableServer`, points the shared Airtable client at it and runs the
+    real pipeline stages (fetch → flatten → sanitize → transform → Hyper write)
+    against a synthetic table, reporting time and rows/sec per stage and the
+    process's peak RSS. Used to catch performance regressions before deploying.
+    With columnar ingest (the default) pages are collected straight into typed
+    columns, so fetch and flatten/sanitize are reported as "fetch + ingest" and
+    "to frame".
+
+    `run_load_benchmark` compares the two Hyper load paths (COPY from a staged CSV
+    vs. Inserter.add_rows) on a typed synthetic DataFrame. Each run happens in its
+    own process so the reported peak RSS belongs to that load path alone.
+
+Functions:
+    - run_benchmark(rows, ...): Runs one benchmark and returns a report dict.
+    - print_benchmark(report): Prints a report as a table.
+    - run_load_benchmark(sizes, output_dir): COPY vs. Inserter timings per table size.
+    - print_load_benchmark(results): Prints the load comparison.
+    - peak_rss_mb(): Peak resident set size of this process in MB.
+
+Usage:
+    airtable-export bench --rows 100000 --latency 0.05 --fail-every 50
+    airtable-export bench --rows 100000 --ingest pandas
+    airtable-export bench --compare-load --load-rows 100000 1000000
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from tableauhyperapi import SqlType
+
+from airtable_to_tableau.libs.fake_airtable import FakeAirtableServer, SyntheticTable
+from airtable_to_tableau.libs.fetch_airtable import fetch_airtable, iter_airtable_pages
+from airtable_to_tableau.libs.field_projection import build_request_params
+from airtable_to_tableau.libs.flatten_utils import flatten_lists_in_dataframe
+from airtable_to_tableau.libs.sanitize_dataframe import sanitize_dataframe
+from airtable_to_tableau.libs.transform_utils import apply_column_transformations
+from airtable_to_tableau.libs.export_hyper import export_to_hyper
+from airtable_to_tableau.libs.export_runner import export_table, collect_records, ingest_mode
+from airtable_to_tableau.libs.hyper_schema import build_hyper_schema
+from airtable_to_tableau.libs.type_to_json import airtable_type_to_json_type
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_API_KEY = "fake-benchmark-key"
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def columns_for_schema(schema_fields):
+    """Column config covering every field, typed the same way /configs/create does."""
+    return [
+        {"source": field["name"], "type": airtable_type_to_json_type(field["type"])}
+        for field in schema_fields
+    ]
+
+
+@contextlib.contextmanager
+def _environment(**values):
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update({key: str(value) for key, value in values.items()})
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_benchmark(
+    rows=10000,
+    page_size=100,
+    latency=0.0,
+    fail_every=0,
+    fields=None,
+    output_dir="output/bench",
+    stream=False,
+    rate_limit=1000,
+    ingest=None,
+):
+    """
+    Run the pipeline against a fake server and return a report with per-stage timings.
+    `ingest` ("columnar" or "pandas") overrides the table's ingest mode.
+    """
+    table = SyntheticTable("Benchmark", rows, fields=fields)
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, "benchmark.hyper")
+
+    server = FakeAirtableServer({}, page_size=page_size, latency=latency, fail_every=fail_every)
+    # A base ID unique to this server keeps rate limiters and metadata caches separate
+    base_id = f"appBench{server.url.rsplit(':', 1)[1]}"
+    server.bases[base_id] = [table]
+
+    entry = {
+        "base_id": base_id,
+        "table_name": table.name,
+        "output_file": output_file,
+        "columns": columns_for_schema(table.schema()["fields"]),
+    }
+    if ingest:
+        entry["ingest"] = ingest
+    schema_fields = table.schema()["fields"]
+    stages = []
+
+    def timed(name, func, *args, **kwargs):
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        stages.append({"stage": name, "seconds": time.perf_counter() - started})
+        return value
+
+    fetch_stats = {}
+    with server, _environment(AIRTABLE_API_URL=server.url, AIRTABLE_RATE_LIMIT=rate_limit):
+        started = time.perf_counter()
+        if stream:
+            result = timed("stream export", export_table, entry, BENCH_API_KEY, stream=True)
+            fetch_stats = {"pages": result["pages"], "retries": result["retries"]}
+        else:
+            params = build_request_params(entry, BENCH_API_KEY)
+            if ingest_mode(entry) == "columnar":
+                pages = iter_airtable_pages(base_id, table.name, BENCH_API_KEY, stats=fetch_stats, params=params)
+                accumulator = timed("fetch + ingest", collect_records, pages, entry, schema_fields)
+                df = timed("to frame", accumulator.to_frame)
+                del accumulator
+            else:
+                records = timed("fetch", fetch_airtable, base_id, table.name, BENCH_API_KEY, stats=fetch_stats, params=params)
+                df = timed("flatten", flatten_lists_in_dataframe, records)
+                del records
+                df = timed("sanitize", sanitize_dataframe, df)
+            df = timed("transform", apply_column_transformations, df, entry["columns"])
+            column_types = build_hyper_schema(entry["columns"], schema_fields)
+            timed("hyper write", export_to_hyper, df, output_file=output_file, table_name=table.name, column_types=column_types)
+        total = time.perf_counter() - started
+
+    return {
+        "rows": rows,
+        "columns": len(table.fields),
+        "pages": fetch_stats.get("pages", 0),
+        "retries": fetch_stats.get("retries", 0),
+        "throttled": server.throttled_count,
+        "stages": stages,
+        "seconds": total,
+        "peak_rss_mb": peak_rss_mb(),
+        "output_file": output_file,
+    }
+
+
+def print_benchmark(report):
+    rows = report["rows"]
+    print(f"\n🏁 Benchmark: {rows} rows × {report['columns']} fields, {report['pages']} pages, "
+          f"{report['retries']} retries ({report['throttled']} throttled by the fake server)")
+    print(f"  {'stage':<14} {'seconds':>9} {'rows/sec':>12}")
+    for stage in report["stages"] + [{"stage": "total", "seconds": report["seconds"]}]:
+        seconds = stage["seconds"]
+        rate = rows / seconds if seconds else float("inf")
+        print(f"  {stage['stage']:<14} {seconds:9.3f} {rate:12,.0f}")
+    if report["peak_rss_mb"] is not None:
+        print(f"  📈 Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+
+LOAD_METHODS = ("copy", "insert")
+
+
+def synthetic_frame(rows, seed=0):
+    """A typed DataFrame shaped like a transformed Airtable table, built without Python loops per row."""
+    rng = np.random.default_rng(seed)
+    index = np.arange(rows)
+    missing = rng.random(rows) < 0.1
+    frame = pd.DataFrame({
+        "Name": pd.Series(index.astype(str), dtype=object).radd("Building "),
+        "Status": pd.Series(np.array(["Planned", "Active", "Closed"], dtype=object)[rng.integers(0, 3, rows)]),
+        "Capacity": pd.array(rng.integers(0, 5000, rows), dtype="Int64"),
+        "Budget": pd.array(np.round(rng.uniform(0, 1_000_000, rows), 2), dtype="Float64"),
+        "Active": pd.array(rng.random(rows) < 0.5, dtype="boolean"),
+        "Opened": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D"),
+        "Last Modified": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(index, unit="s"),
+    })
+    frame.loc[missing, "Capacity"] = pd.NA
+    frame.loc[missing, "Status"] = None
+    return frame
+
+
+LOAD_COLUMN_TYPES = {
+    "Budget": SqlType.numeric(18, 2),
+    "Opened": SqlType.date(),
+    "Last Modified": SqlType.timestamp_tz(),
+}
+
+
+def _load_once(rows, method, output_file):
+    df = synthetic_frame(rows)
+    started = time.perf_counter()
+    export_to_hyper(df, output_file=output_file, table_name="Load", column_types=LOAD_COLUMN_TYPES, method=method)
+    seconds = time.perf_counter() - started
+    return {"rows": rows, "method": method, "seconds": seconds, "peak_rss_mb": peak_rss_mb(),
+            "file_mb": os.path.getsize(output_file) / (1024 * 1024)}
+
+
+def run_load_benchmark(sizes=(100000, 1000000), output_dir="output/bench"):
+    """Time COPY and Inserter loads of `sizes` rows, each in a fresh worker process."""
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    for rows in sizes:
+        for method in LOAD_METHODS:
+            output_file = os.path.join(output_dir, f"load-{method}-{rows}.hyper")
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results.append(pool.submit(_load_once, rows, method, output_file).result())
+    return results
+
+
+def print_load_benchmark(results):
+    print("\n🏁 Hyper load paths (COPY from staged CSV vs. Inserter.add_rows)")
+    print(f"  {'rows':>10} {'method':<7} {'seconds':>9} {'rows/sec':>12} {'peak RSS MB':>12} {'file MB':>8}")
+    for r in results:
+        rate = r["rows"] / r["seconds"] if r["seconds"] else float("inf")
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "n/a"
+        print(f"  {r['rows']:>10,} {r['method']:<7} {r['seconds']:9.3f} {rate:12,.0f} {rss:>12} {r['file_mb']:8.1f}")
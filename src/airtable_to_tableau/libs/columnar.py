@@ -0,0 +1,152 @@
+"""
+columnar.py
+
+Description:
+    Column-major ingestion of Airtable record pages. Instead of keeping every record
+    dict until the table is complete and then building `pd.DataFrame(records)`, each
+    page is split into one value list per field as it arrives, nested values are
+    flattened on the way in, and the page's dicts can be freed immediately.
+
+    The Airtable field metadata picks each column's storage: number-like fields are
+    packed into nullable Float64 arrays and checkboxes into boolean arrays as they fill,
+    nested fields (selects, links, attachments, collaborators...) are flattened with
+    the table's "flatten" options, and text stays a plain list until the frame is built.
+    Fields without metadata are flattened only if a value is a list/dict and are typed
+    at the end the same way `sanitize_dataframe` types them, so the resulting frame is
+    already sanitized.
+
+    Compared with the DataFrame path this keeps memory proportional to the flattened
+    values rather than to the raw JSON, and skips the row-wise DataFrame construction,
+    the nested-column inference and the sanitize pass for typed columns.
+
+Classes / Functions:
+    - ColumnAccumulator(schema_fields=None, options=None): Collects pages column by column.
+    - records_to_frame(records, schema_fields=None, options=None): One-shot conversion of a list of records.
+
+Usage:
+    Used by `export_runner.py` when a table's ingest mode is "columnar" (the default).
+
+Requires:
+    - pandas
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import pandas as pd
+
+from airtable_to_tableau.libs.flatten_utils import NESTED_FIELD_TYPES, _flatten, _resolve_options
+from airtable_to_tableau.libs.hyper_schema import field_types as schema_field_types
+from airtable_to_tableau.libs.sanitize_dataframe import sanitize_series
+
+# Airtable field types whose values are plain JSON numbers
+NUMBER_FIELD_TYPES = {"number", "currency", "percent", "rating", "duration", "autoNumber", "count"}
+BOOLEAN_FIELD_TYPES = {"checkbox"}
+
+_NESTED = (list, dict)
+# Typed values are packed into an array once this many are buffered
+PACK_SIZE = 64 * 1024
+
+
+class _Column:
+    """Values of one field: a flat list, or packed extension arrays for typed fields."""
+
+    __slots__ = ("kind", "values", "chunks")
+
+    def __init__(self, kind, rows):
+        self.kind = kind
+        self.values = [None] * rows
+        self.chunks = []
+
+    def _pack(self):
+        if not self.values:
+            return
+        try:
+            self.chunks.append(pd.array(self.values, dtype="Float64" if self.kind == "number" else "boolean"))
+            self.values = []
+        except (TypeError, ValueError):
+            # e.g. an error object in a number field: keep the whole column untyped
+            packed = [v for chunk in self.chunks for v in chunk.astype(object)]
+            self.values = [None if v is pd.NA else v for v in packed] + self.values
+            self.chunks = []
+            self.kind = "unknown"
+
+    def extend(self, values):
+        self.values.extend(values)
+        if self.kind in ("number", "boolean") and len(self.values) >= PACK_SIZE:
+            self._pack()
+
+    def to_series(self, index):
+        if self.kind in ("number", "boolean"):
+            self._pack()
+        if self.kind in ("number", "boolean"):
+            series = pd.concat([pd.Series(chunk) for chunk in self.chunks], ignore_index=True)
+            series.index = index
+            return series
+        return sanitize_series(pd.Series(self.values, index=index))
+
+
+class ColumnAccumulator:
+    """
+    Accumulates record pages (lists of Airtable field dicts) into typed columns.
+    `schema_fields` is the table's Airtable metadata; `options` are the "flatten" options.
+    """
+
+    def __init__(self, schema_fields=None, options=None):
+        self.field_types = schema_field_types(schema_fields)
+        self.options = _resolve_options(options)
+        self.columns = {}
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def _kind(self, name):
+        field_type = self.field_types.get(name)
+        if field_type in NUMBER_FIELD_TYPES:
+            return "number"
+        if field_type in BOOLEAN_FIELD_TYPES:
+            return "boolean"
+        if field_type in NESTED_FIELD_TYPES:
+            return "nested"
+        if field_type is None:
+            return "unknown"
+        return "object"
+
+    def _add_new_columns(self, records):
+        # New fields are added in order of first appearance, as pd.DataFrame(records) does
+        missing = set().union(*records).difference(self.columns)
+        for record in records:
+            if not missing:
+                break
+            for name in record:
+                if name in missing:
+                    self.columns[name] = _Column(self._kind(name), self.rows)
+                    missing.discard(name)
+
+    def add(self, records):
+        """Append one page (or any list) of records."""
+        if not records:
+            return
+        self._add_new_columns(records)
+        options = self.options
+        for name, column in self.columns.items():
+            values = [record.get(name) for record in records]
+            if column.kind == "nested":
+                values = [_flatten(v, options) if v.__class__ in _NESTED else v for v in values]
+            elif column.kind == "unknown":
+                if any(v.__class__ in _NESTED for v in values):
+                    values = [_flatten(v, options) if v.__class__ in _NESTED else v for v in values]
+            column.extend(values)
+        self.rows += len(records)
+
+    def to_frame(self):
+        """The accumulated records as a sanitized DataFrame."""
+        index = pd.RangeIndex(self.rows)
+        return pd.DataFrame({name: column.to_series(index) for name, column in self.columns.items()}, index=index)
+
+
+def records_to_frame(records, schema_fields=None, options=None):
+    """Convert a list of Airtable field dicts to a flattened, sanitized DataFrame column by column."""
+    accumulator = ColumnAccumulator(schema_fields, options)
+    accumulator.add(records)
+    return accumulator.to_frame()
@@ -0,0 +1,199 @@
+"""
+config_registry.py
+
+Description:
+    In-memory registry of the JSON configs in a config directory. Each config is parsed
+    once and indexed, so mapping a .hyper file back to its table, listing configs or
+    reading a profile's tables are dict lookups instead of an `os.listdir` plus a
+    `json.load` of every config on every request.
+
+    Indexes:
+      - (output file name, profile) -> TableRef(config, profile, table entry)
+      - (config name, profile)      -> the profile's table entries
+
+    Flat configs (a top-level "tables" list, no profiles) are indexed under profile
+    None and match any profile. When several configs write the same output file, the
+    first config in name order wins.
+
+    The registry revalidates against the directory at most once every
+    CONFIG_REGISTRY_TTL seconds: one `scandir` and a stat per file, re-parsing only
+    files whose mtime or size changed, dropping deleted ones and re-indexing only when
+    something changed. Code that writes configs (the web upload, edit, create and
+    delete routes) calls `update()` / `remove()` so its own changes show up at once.
+
+    Parsed configs are shared: callers must treat them as read-only.
+
+Classes / Functions:
+    - ConfigRegistry(config_dir, ttl=None): The registry of one directory.
+    - get_config_registry(config_dir): The process-wide registry of a directory.
+    - TableRef: (config, profile, table) of an indexed table entry.
+
+Environment:
+    - CONFIG_REGISTRY_TTL: Seconds between directory revalidations (default: 2; 0 checks on every lookup).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+DEFAULT_TTL = 2.0
+
+TableRef = namedtuple("TableRef", ["config", "profile", "table"])
+
+
+class ConfigFile:
+    """One parsed config: `data` is the JSON dict, or None with `error` set if it didn't parse."""
+
+    __slots__ = ("name", "path", "version", "data", "error")
+
+    def __init__(self, name, path, version, data=None, error=None):
+        self.name = name
+        self.path = path
+        self.version = version
+        self.data = data
+        self.error = error
+
+
+def _profiles(data):
+    """(profile, profile dict) pairs of a config; flat configs give a single (None, config)."""
+    if not isinstance(data, dict):
+        return []
+    if "profiles" in data:
+        profiles = data["profiles"]
+        return [(name, p) for name, p in profiles.items() if isinstance(p, dict)] if isinstance(profiles, dict) else []
+    if "tables" in data:
+        return [(None, data)]
+    return []
+
+
+class ConfigRegistry:
+    """Parsed configs of `config_dir` plus output-file and profile indexes, revalidated by mtime."""
+
+    def __init__(self, config_dir, ttl=None):
+        self.config_dir = config_dir
+        self.ttl = float(os.getenv("CONFIG_REGISTRY_TTL", DEFAULT_TTL) if ttl is None else ttl)
+        self._lock = threading.RLock()
+        self._configs = {}
+        self._by_output = {}
+        self._by_profile = {}
+        self._checked = None
+        self.parses = 0
+
+    # --- loading ---
+
+    def _parse(self, name, path, version):
+        self.parses += 1
+        try:
+            with open(path, "r") as f:
+                return ConfigFile(name, path, version, data=json.load(f))
+        except (OSError, ValueError) as e:
+            return ConfigFile(name, path, version, error=str(e))
+
+    def _reindex(self):
+        by_output, by_profile = {}, {}
+        for name in sorted(self._configs):
+            for profile, profile_data in _profiles(self._configs[name].data):
+                tables = [t for t in profile_data.get("tables") or [] if isinstance(t, dict)]
+                by_profile[(name, profile)] = tables
+                for table in tables:
+                    output_file = os.path.basename(table.get("output_file") or "")
+                    if output_file:
+                        by_output.setdefault((output_file, profile), TableRef(name, profile, table))
+        self._by_output, self._by_profile = by_output, by_profile
+
+    def _scan(self):
+        # Caller holds self._lock
+        try:
+            with os.scandir(self.config_dir) as it:
+                found = {e.name: e for e in it if e.name.endswith(".json") and e.is_file()}
+        except FileNotFoundError:
+            found = {}
+
+        changed = False
+        for name in set(self._configs) - set(found):
+            del self._configs[name]
+            changed = True
+        for name, entry in found.items():
+            stat = entry.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+            current = self._configs.get(name)
+            if current is None or current.version != version:
+                self._configs[name] = self._parse(name, entry.path, version)
+                changed = True
+        if changed:
+            self._reindex()
+        self._checked = time.monotonic()
+
+    def _fresh(self):
+        with self._lock:
+            if self._checked is None or time.monotonic() - self._checked >= self.ttl:
+                self._scan()
+
+    def refresh(self):
+        """Revalidate against the directory now."""
+        with self._lock:
+            self._scan()
+
+    def update(self, name):
+        """Re-read one config after writing it (or drop it if it no longer exists)."""
+        path = os.path.join(self.config_dir, name)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self.remove(name)
+                return None
+            self._configs[name] = self._parse(name, path, (stat.st_mtime_ns, stat.st_size))
+            self._reindex()
+            return self._configs[name]
+
+    def remove(self, name):
+        """Forget a deleted config."""
+        with self._lock:
+            if self._configs.pop(name, None) is not None:
+                self._reindex()
+
+    # --- lookups ---
+
+    def configs(self):
+        """Names of all .json configs, sorted."""
+        self._fresh()
+        with self._lock:
+            return sorted(self._configs)
+
+    def config(self, name):
+        """The ConfigFile for `name`, or None if there is no such config."""
+        self._fresh()
+        with self._lock:
+            return self._configs.get(name)
+
+    def profile_tables(self, name, profile="default"):
+        """Table entries of a config's profile (any profile for flat configs), or None if missing."""
+        self._fresh()
+        with self._lock:
+            tables = self._by_profile.get((name, profile))
+            return tables if tables is not None else self._by_profile.get((name, None))
+
+    def find_table(self, output_filename, profile="default"):
+        """TableRef of the table that writes `output_filename` (a base name) in `profile`, or None."""
+        output_filename = os.path.basename(output_filename)
+        self._fresh()
+        with self._lock:
+            ref = self._by_output.get((output_filename, profile))
+            return ref if ref is not None else self._by_output.get((output_filename, None))
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_config_registry(config_dir):
+    key = os.path.abspath(config_dir)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ConfigRegistry(key)
+        return _registries[key]
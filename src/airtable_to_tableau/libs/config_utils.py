@@ -8,6 +8,8 @@ Description:
 Functions:
     - load_config(path, profile_name=None): Loads and validates the JSON config file.
       Supports profile selection via "profiles" structure or flat "tables" structure.
+    - find_table_name_for_hyper(config_dir, hyper_filename, profile_name="default"): Table name
+      of the config entry writing a .hyper file, looked up in the config registry.
 
 Raises:
     - ValueError if the configuration file is invalid or the specified profile is missing.
@@ -16,7 +18,8 @@ Author: Jaimie Garner
 Date: 2025-06-06
 """
 import json
-import os
+
+from airtable_to_tableau.libs.config_registry import get_config_registry
 
 
 def load_config(path, profile_name=None):
@@ -44,16 +47,7 @@ def load_config(path, profile_name=None):
 
 def find_table_name_for_hyper(config_dir, hyper_filename, profile_name="default"):
     """Find the table name from a config file that matches the given hyper filename."""
-    config_files = [f for f in os.listdir(config_dir) if f.endswith(".json")]
-    for config_file in config_files:
-        config_path = os.path.join(config_dir, config_file)
-        try:
-            config = load_config(config_path, profile_name=profile_name)
-            for entry in config.get("tables", []):
-                output_file = entry.get("output_file", "")
-                if os.path.basename(output_file) == hyper_filename:
-                    return entry.get("table_name", "Data")
-        except Exception as e:
-            print(f"⚠️ Could not process config {config_file}: {e}")
-            continue
-    return None
\ No newline at end of file
+    ref = get_config_registry(config_dir).find_table(hyper_filename, profile_name)
+    if ref is None:
+        return None
+    return ref.table.get("table_name", "Data")
@@ -4,10 +4,25 @@ export_hyper.py
 Description:
     Exports a sanitized pandas DataFrame to a Tableau .hyper file using the Tableau Hyper API.
     Dynamically infers column data types and creates a schema and table in the Hyper file.
+    `HyperTableWriter` appends DataFrame chunks as they are produced, which lets the
+    export pipeline stream page by page. Connections come from the shared Hyper
+    process in `hyper_process.py`.
+
+    Chunks are bulk-loaded with one `COPY ... FROM` statement per chunk: the DataFrame
+    is written to a temporary CSV by pandas' C writer and parsed by Hyper, so no Python
+    row lists are built. Tables with column types COPY can't load (or chunks that fail
+    to load) fall back to the Inserter. Set HYPER_LOAD_METHOD=insert to always use it.
 
 Functions:
     - infer_sqltype(dtype): Infers Tableau SqlType based on pandas dtype.
-    - export_to_hyper(df, output_file, table_name): Writes a DataFrame to a .hyper file with the specified schema.
+    - coerce_to_sqltype(series, sql_type): Bulk-converts a column to a Hyper type.
+    - export_to_hyper(df, output_file, table_name, column_types=None, method=None): Writes a DataFrame to a .hyper file with the specified schema.
+    - copy_dataframe(connection, df, table_def): Bulk-loads an aligned DataFrame with COPY.
+    - load_dataframe(connection, df, table_def, method=None, log=print): COPY with Inserter fallback.
+    - HyperTableWriter(output_file, table_name, column_types=None, method=None, extract=None, columns=None, log=print): Appends DataFrame chunks to a new Hyper table.
+    - HyperExtract(output_file): One .hyper database that several tables are written into over one connection.
+    - upsert_into_hyper(df, output_file, table_name, key_column, extract=None, log=print): Replaces rows by key in an existing table.
+    - sort_hyper_table(connection, table_name, keys): Rewrites a table physically ordered by join keys.
 
 Usage:
     Typically used within the CLI pipeline or automated export tools.
@@ -19,53 +34,440 @@ Requires:
 Author: Jaimie Garner
 Date: 2025-06-06
 """
+import contextlib
+import decimal
+import os
+import tempfile
+import threading
+
 import pandas as pd
 from tableauhyperapi import (
-    HyperProcess,
-    Connection,
-    Telemetry,
     TableDefinition,
     SqlType,
     Inserter,
     TableName,
     CreateMode,
     Name,
+    Persistence,
+    TypeTag,
+    HyperException,
+    escape_string_literal,
 )
 
+from airtable_to_tableau.libs.hyper_process import hyper_connection
+
+SCHEMA_NAME = "Extract"
+# NULL marker in staged CSV files; an empty field is an empty string
+COPY_NULL = "\\N"
+COPY_TYPE_TAGS = {
+    TypeTag.TEXT,
+    TypeTag.VARCHAR,
+    TypeTag.CHAR,
+    TypeTag.BOOL,
+    TypeTag.BIG_INT,
+    TypeTag.INT,
+    TypeTag.SMALL_INT,
+    TypeTag.DOUBLE,
+    TypeTag.NUMERIC,
+    TypeTag.DATE,
+    TypeTag.TIMESTAMP,
+    TypeTag.TIMESTAMP_TZ,
+}
+
+
+def default_load_method():
+    return os.getenv("HYPER_LOAD_METHOD", "copy").lower()
+
 
 def infer_sqltype(dtype):
-    if pd.api.types.is_integer_dtype(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return SqlType.bool()
+    elif pd.api.types.is_integer_dtype(dtype):
         return SqlType.big_int()
     elif pd.api.types.is_float_dtype(dtype):
         return SqlType.double()
-    elif pd.api.types.is_bool_dtype(dtype):
-        return SqlType.bool()
     elif pd.api.types.is_datetime64_any_dtype(dtype):
         return SqlType.timestamp()
     else:
         return SqlType.text()
 
 
-def export_to_hyper(df, output_file="output.hyper", table_name="Data"):
-    # Define schema and table
-    schema_name = "Extract"
-    table = TableName(schema_name, table_name)
+def _to_utc_datetimes(series):
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if getattr(series.dt, "tz", None) is None:
+            return series.dt.tz_localize("UTC")
+        return series.dt.tz_convert("UTC")
+    return pd.to_datetime(series, errors="coerce", utc=True, format="mixed")
+
+
+def _to_decimals(series, scale, decimals=True):
+    """NUMERIC columns are inserted as Decimal values (or COPY-ed as floats) rounded to the column's scale."""
+    numbers = pd.to_numeric(series, errors="coerce").astype("Float64").round(scale)
+    if not decimals:
+        return numbers
+    mask = numbers.notna()
+    out = pd.Series(None, index=series.index, dtype=object)
+    out[mask] = [decimal.Decimal(format(v, f".{scale}f")) for v in numbers[mask].to_numpy(dtype=float)]
+    return out
+
+
+def coerce_to_sqltype(series, sql_type, decimals=True):
+    """
+    Convert a column in bulk to the type declared for it in the Hyper table.
+    `decimals=False` keeps NUMERIC columns as floats for COPY instead of Decimal objects.
+    """
+    tag = sql_type.tag
+    if tag in (TypeTag.TEXT, TypeTag.VARCHAR, TypeTag.CHAR):
+        if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            if series.map(lambda v: v is None or isinstance(v, str)).all():
+                return series
+        return series.where(series.isna(), series.astype(str))
+    if tag in (TypeTag.BIG_INT, TypeTag.INT, TypeTag.SMALL_INT):
+        numbers = pd.to_numeric(series, errors="coerce")
+        if pd.api.types.is_float_dtype(numbers.dtype):
+            # Round explicitly (half to even) instead of letting the cast truncate 2.6 to 2
+            numbers = numbers.round()
+        return numbers.astype("Int64")
+    if tag == TypeTag.DOUBLE:
+        return pd.to_numeric(series, errors="coerce").astype("Float64")
+    if tag == TypeTag.NUMERIC:
+        return _to_decimals(series, sql_type.scale, decimals)
+    if tag == TypeTag.BOOL:
+        return series.astype("boolean")
+    if tag == TypeTag.DATE:
+        return _to_utc_datetimes(series).dt.date
+    if tag == TypeTag.TIMESTAMP_TZ:
+        return _to_utc_datetimes(series)
+    if tag == TypeTag.TIMESTAMP:
+        if pd.api.types.is_datetime64_any_dtype(series.dtype) and getattr(series.dt, "tz", None) is None:
+            return series
+        return _to_utc_datetimes(series).dt.tz_convert(None)
+    return series
+
+
+def dataframe_to_rows(df):
+    """Row lists for the Inserter with every NaN/NA/NaT replaced by None (SQL NULL)."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def align_to_table(df, table_def, decimals=True, log=print):
+    """Reorder/complete `df` to the columns of `table_def` and coerce each column to its declared type."""
+    columns = [c.name.unescaped for c in table_def.columns]
+    extra = [c for c in df.columns if c not in columns]
+    if extra:
+        log(f"⚠️  Dropping columns not in the table schema: {', '.join(map(str, extra))}")
+    df = df.reindex(columns=columns)
+    for column in table_def.columns:
+        name = column.name.unescaped
+        # Object columns are declared as text but may still hold bools/numbers
+        if infer_sqltype(df[name].dtype) != column.type or column.type == SqlType.text():
+            df[name] = coerce_to_sqltype(df[name], column.type, decimals)
+    return df
+
+
+def supports_copy(table_def):
+    return all(column.type.tag in COPY_TYPE_TAGS for column in table_def.columns)
+
+
+def copy_dataframe(connection, df, table_def):
+    """
+    Load `df` (already aligned with `decimals=False`) into `table_def` with one COPY
+    statement from a temporary CSV file. Returns the number of rows loaded, or None
+    when the data can't be represented in the staged file (text equal to the NULL marker).
+    """
+    for column in table_def.columns:
+        name = column.name.unescaped
+        if column.type.tag in (TypeTag.TEXT, TypeTag.VARCHAR, TypeTag.CHAR) and (df[name] == COPY_NULL).any():
+            return None
+
+    fd, path = tempfile.mkstemp(prefix="hyper-copy-", suffix=".csv")
+    os.close(fd)
+    try:
+        df.to_csv(path, header=False, index=False, na_rep=COPY_NULL)
+        return connection.execute_command(
+            f"COPY {table_def.table_name} FROM {escape_string_literal(path)} "
+            f"WITH (FORMAT csv, NULL {escape_string_literal(COPY_NULL)}, HEADER false)"
+        )
+    finally:
+        os.remove(path)
+
+
+def _insert_dataframe(connection, df, table_def, log=print):
+    with Inserter(connection, table_def) as inserter:
+        inserter.add_rows(dataframe_to_rows(align_to_table(df, table_def, log=log)))
+        inserter.execute()
+    return len(df)
+
+
+def load_dataframe(connection, df, table_def, method=None, log=print):
+    """Bulk-load `df` into an existing table with COPY, falling back to the Inserter."""
+    if (method or default_load_method()) == "copy" and supports_copy(table_def):
+        try:
+            loaded = copy_dataframe(connection, align_to_table(df, table_def, decimals=False, log=log), table_def)
+        except HyperException as e:
+            log(f"⚠️  COPY into {table_def.table_name} failed, using the Inserter: {e.main_message}")
+            loaded = None
+        if loaded is not None:
+            return loaded
+    return _insert_dataframe(connection, df, table_def, log)
+
+
+class HyperExtract:
+    """
+    One .hyper database shared by several tables. Every table is written over a single
+    pooled connection, and `lock` serializes statements from tables exported in
+    parallel. The file is kept between runs: full tables replace only their own table
+    and incremental tables upsert into theirs.
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.lock = threading.RLock()
+        self.connection = None
+        self._resources = contextlib.ExitStack()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        self.connection = self._resources.enter_context(
+            hyper_connection(self.output_file, CreateMode.CREATE_IF_NOT_EXISTS)
+        )
+        self.connection.catalog.create_schema_if_not_exists(SCHEMA_NAME)
+
+    def close(self):
+        self._resources.close()
+        self.connection = None
+
+    def table_columns(self, table_name):
+        """Column names of a table in this extract, or None if it doesn't exist yet."""
+        table = TableName(SCHEMA_NAME, table_name)
+        with self.lock:
+            if not self.connection.catalog.has_table(table):
+                return None
+            return [c.name.unescaped for c in self.connection.catalog.get_table_definition(table).columns]
+
+
+class HyperTableWriter:
+    """
+    Creates (or replaces) `output_file` with one table in the Extract schema and
+    appends DataFrame chunks, one COPY per chunk (`method="copy"`, the default from
+    HYPER_LOAD_METHOD) or through a single open Inserter (`method="insert"`, and the
+    fallback when COPY can't load the table's types or a chunk). The table schema is
+    taken from the first chunk, with `column_types` ({column: SqlType}, see
+    `hyper_schema.py`) overriding the dtype-inferred type of any column; every
+    chunk is aligned and coerced to it. `columns` (every output column, from the
+    table's field metadata, see `hyper_schema.output_columns`) fixes the column list
+    up front, so a field that is empty in the first chunk is not dropped; columns the
+    first chunk doesn't have are typed from `column_types`, or text.
+    Nothing is created until the first chunk arrives.
+
+    Chunks are loaded into "<output_file>.partial", which replaces `output_file` only
+    when the writer is closed with `commit=True`; an abandoned or failed write deletes
+    it, so the previous extract stays intact.
+
+    With `extract` (a `HyperExtract`), the chunks are loaded into a "<table>__partial"
+    staging table of that shared database instead (under the extract's lock), which is
+    swapped in under the table's name on commit and dropped otherwise.
+    Warnings (dropped columns, COPY fallbacks) go through `log`.
+    """
+
+    def __init__(self, output_file, table_name="Data", column_types=None, method=None, extract=None, columns=None,
+                 log=print):
+        self.output_file = output_file
+        self.log = log
+        self.extract = extract
+        self.column_types = column_types or {}
+        self.columns = list(columns or [])
+        self.method = (method or default_load_method()).lower()
+        self._use_copy = False
+        self.table = TableName(SCHEMA_NAME, table_name)
+        self.partial_file = f"{output_file}.partial"
+        self.partial_table = TableName(SCHEMA_NAME, f"{table_name}__partial")
+        self.table_def = None
+        self.rows_written = 0
+        self._resources = contextlib.ExitStack()
+        self._connection = None
+        self._inserter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+    def _open(self, df):
+        self.table_def = TableDefinition(table_name=self.partial_table if self.extract is not None else self.table)
+        dtypes = dict(df.dtypes.items())
+        for col_name in self.columns + [c for c in df.columns if c not in self.columns]:
+            sql_type = self.column_types.get(col_name) or infer_sqltype(dtypes.get(col_name, object))
+            self.table_def.add_column(Name(col_name), sql_type)
+
+        if self.extract is not None:
+            with self.extract.lock:
+                self._connection = self.extract.connection
+                self._connection.execute_command(f"DROP TABLE IF EXISTS {self.partial_table}")
+                self._connection.catalog.create_table(self.table_def)
+            return
+
+        directory = os.path.dirname(self.output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = self._resources.enter_context(
+            hyper_connection(self.partial_file, CreateMode.CREATE_AND_REPLACE)
+        )
+        self._connection.catalog.create_schema(SCHEMA_NAME)
+        self._connection.catalog.create_table(self.table_def)
+        self._use_copy = self.method == "copy" and supports_copy(self.table_def)
+
+    def _copy(self, df):
+        try:
+            loaded = copy_dataframe(
+                self._connection, align_to_table(df, self.table_def, decimals=False, log=self.log), self.table_def
+            )
+        except HyperException as e:
+            self.log(f"⚠️  COPY into {self.table} failed, using the Inserter: {e.main_message}")
+            loaded = None
+        if loaded is None:
+            # A failed COPY loads nothing, so the chunk is retried through the Inserter
+            self._use_copy = False
+            return False
+        self.rows_written += len(df)
+        return True
+
+    def write(self, df):
+        """Append a DataFrame chunk to the table."""
+        if self._connection is None:
+            self._open(df)
+        if self.extract is not None:
+            # The connection is shared, so no Inserter can stay open between chunks
+            with self.extract.lock:
+                load_dataframe(self._connection, df, self.table_def, self.method, log=self.log)
+            self.rows_written += len(df)
+            return
+        if self._use_copy and self._copy(df):
+            return
+        if self._inserter is None:
+            self._inserter = Inserter(self._connection, self.table_def)
+        df = align_to_table(df, self.table_def, log=self.log)
+        self._inserter.add_rows(dataframe_to_rows(df))
+        self.rows_written += len(df)
+
+    def _publish_partial_table(self):
+        with self.extract.lock:
+            self._connection.execute_command("BEGIN TRANSACTION")
+            try:
+                self._connection.execute_command(f"DROP TABLE IF EXISTS {self.table}")
+                self._connection.execute_command(f"ALTER TABLE {self.partial_table} RENAME TO {self.table.name}")
+                self._connection.execute_command("COMMIT")
+            except Exception:
+                self._connection.execute_command("ROLLBACK")
+                raise
+
+    def _discard_partial(self):
+        if self.extract is not None:
+            try:
+                with self.extract.lock:
+                    self.extract.connection.execute_command(f"DROP TABLE IF EXISTS {self.partial_table}")
+            except HyperException as e:
+                self.log(f"⚠️  Could not drop {self.partial_table}: {e.main_message}")
+        elif os.path.exists(self.partial_file):
+            os.remove(self.partial_file)
+
+    def close(self, commit=True):
+        """Publish the loaded table (`commit=True`) or throw it away, keeping the previous one."""
+        if self.table_def is None:
+            return
+        committed = False
+        try:
+            if self._inserter is not None:
+                if commit:
+                    self._inserter.execute()
+                else:
+                    self._inserter.close()
+            if commit and self.extract is not None:
+                self._publish_partial_table()
+            committed = commit
+        finally:
+            # Returns the connection to the shared pool (and detaches the partial file)
+            self._resources.close()
+            self._inserter = self._connection = None
+            self.table_def = None
+            if committed and self.extract is None:
+                os.replace(self.partial_file, self.output_file)
+            elif not committed:
+                self._discard_partial()
+
+
+def export_to_hyper(df, output_file="output.hyper", table_name="Data", column_types=None, method=None, extract=None):
+    with HyperTableWriter(output_file, table_name, column_types=column_types, method=method, extract=extract) as writer:
+        writer.write(df)
+
+
+def upsert_into_hyper(df, output_file, table_name, key_column, extract=None, log=print):
+    """
+    Replace the rows of an existing Hyper table whose `key_column` matches a row in `df`,
+    then insert the rest. Rows are staged in a temporary table and swapped in with one
+    DELETE + INSERT inside a transaction. Returns the number of rows upserted.
+    """
+    if extract is not None:
+        with extract.lock:
+            return _upsert(extract.connection, df, table_name, key_column, log)
+    with hyper_connection(output_file) as connection:
+        return _upsert(connection, df, table_name, key_column, log)
+
+
+def _upsert(connection, df, table_name, key_column, log=print):
+    target = TableName(SCHEMA_NAME, table_name)
+    key = Name(key_column)
+
+    table_def = connection.catalog.get_table_definition(target)
+    staging_def = TableDefinition(
+        table_name=TableName("upsert_staging"),
+        columns=table_def.columns,
+        persistence=Persistence.TEMPORARY,
+    )
+    connection.catalog.create_table(staging_def)
+    try:
+        load_dataframe(connection, df, staging_def, log=log)
 
-    # Initialize table definition
-    table_def = TableDefinition(table_name=table)
+        connection.execute_command("BEGIN TRANSACTION")
+        try:
+            connection.execute_command(
+                f"DELETE FROM {target} WHERE {key} IN (SELECT {key} FROM {staging_def.table_name})"
+            )
+            connection.execute_command(f"INSERT INTO {target} SELECT * FROM {staging_def.table_name}")
+            connection.execute_command("COMMIT")
+        except Exception:
+            connection.execute_command("ROLLBACK")
+            raise
+    finally:
+        # Temporary tables live as long as the pooled connection, not this call
+        connection.execute_command(f"DROP TABLE IF EXISTS {staging_def.table_name}")
 
-    # Add each column using .add_column
-    for col_name, dtype in df.dtypes.items():
-        table_def.add_column(Name(col_name), infer_sqltype(dtype))
+    return len(df)
 
-    with HyperProcess(telemetry=Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU) as hyper:
-        with Connection(endpoint=hyper.endpoint, database=output_file, create_mode=CreateMode.CREATE_AND_REPLACE) as connection:
-            # ✅ Create the "Extract" schema first
-            connection.catalog.create_schema(schema_name)
 
-            # Then create the table
-            connection.catalog.create_table(table_def)
+def sort_hyper_table(connection, table_name, keys):
+    """
+    Rewrite a table physically ordered by `keys`. Hyper has no secondary indexes, but
+    sorted join keys let it prune blocks and merge-join instead of hashing.
+    """
+    table = TableName(SCHEMA_NAME, table_name)
+    sorted_table = TableName(SCHEMA_NAME, f"{table_name}__sorted")
+    order_by = ", ".join(str(Name(key)) for key in keys)
 
-            with Inserter(connection, table_def) as inserter:
-                inserter.add_rows(df.values.tolist())
-                inserter.execute()
\ No newline at end of file
+    connection.execute_command(f"DROP TABLE IF EXISTS {sorted_table}")
+    connection.execute_command(f"CREATE TABLE {sorted_table} AS SELECT * FROM {table} ORDER BY {order_by}")
+    connection.execute_command("BEGIN TRANSACTION")
+    try:
+        connection.execute_command(f"DROP TABLE {table}")
+        connection.execute_command(f"ALTER TABLE {sorted_table} RENAME TO {Name(table_name)}")
+        connection.execute_command("COMMIT")
+    except Exception:
+        connection.execute_command("ROLLBACK")
+        raise
@@ -0,0 +1,575 @@
+"""
+export_runner.py
+
+Description:
+    Runs the export pipeline (fetch → flatten → sanitize → transform → outputs)
+    for every table in a profile. Tables are processed by a pool of worker
+    threads so a profile's wall-clock time approaches its slowest table rather
+    than the sum of all of them. Airtable requests are throttled per base by
+    the shared token buckets in `rate_limiter.py`, and page/retry counts from
+    the shared Airtable client are reported in the summary.
+
+    Each table is fetched and transformed once and written to every sink in its
+    "outputs" list (a Hyper extract by default, Parquet files too), see `sinks.py`.
+
+    In streaming mode each batch of pages is transformed and appended to the
+    open sinks as soon as it arrives instead of materializing the whole table
+    first.
+
+    Incremental tables keep a watermark per output file (see `watermarks.py`),
+    fetch only records whose LAST_MODIFIED_TIME() is after it, and upsert
+    them into the existing extract by Airtable record ID. Only the Hyper output
+    of an incremental table is written.
+
+    Requests only ask for the fields the column config reads (plus optional
+    view/sort/pageSize settings), see `field_projection.py`.
+
+    Raw pages can be recorded to and replayed from compressed snapshots
+    (`snapshot_cache.py`) so transforms can be re-run without refetching.
+
+    Tables that share an `output_file` are written into one .hyper database over a
+    single connection (`HyperExtract`), still fetched and transformed in parallel.
+    An extract is opened when its first table starts and closed after its last one.
+    `join_keys` sorts a table on the columns Tableau joins it by.
+
+    Records are ingested column by column (`columnar.py`): each page is split into
+    typed per-field columns as it arrives instead of keeping every record dict for
+    `pd.DataFrame(records)`. Set `"ingest": "pandas"` on a table (or AIRTABLE_INGEST=pandas)
+    to use the DataFrame path; `"sanitize": "legacy"` always does.
+
+    Hyper column types come from the table's Airtable field metadata (dates,
+    timestamps, money, counts), see `hyper_schema.py`. Set `"typed_schema": false`
+    on a table to skip the metadata lookup and type columns from their dtypes.
+
+Functions:
+    - load_table_schema(entry, api_key, log=print): Airtable field metadata for a table entry, or None.
+    - ingest_mode(entry): "columnar" or "pandas" for a table entry.
+    - collect_records(pages, entry, schema_fields=None): Drains record pages for a full (non-streamed) table.
+    - transform_records(records, entry, schema_fields=None): Flatten, sanitize and transform records for a table entry.
+    - export_table(entry, api_key, stream=False, batch_pages=1, snapshot=None, extract=None, log=print): Runs the pipeline for one table config entry.
+    - open_page_source(entry, api_key, ...): Record pages and schema from Airtable or a snapshot.
+    - run_exports(tables, api_key, jobs=1, ..., log=print, progress=None): Runs all tables with `jobs` workers.
+    - print_summary(results, elapsed=None, log=print): Prints a per-table summary of a run.
+
+Usage:
+    Called by the CLI `export` command.
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import contextlib
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from airtable_to_tableau.libs.fetch_airtable import (
+    RECORD_ID_FIELD,
+    iter_airtable_pages,
+    modified_since_formula,
+)
+from airtable_to_tableau.libs.airtable_metadata import get_airtable_metadata
+from airtable_to_tableau.libs.field_projection import build_request_params
+from airtable_to_tableau.libs.hyper_schema import build_hyper_schema, field_types, output_columns
+from airtable_to_tableau.libs.columnar import ColumnAccumulator, records_to_frame
+from airtable_to_tableau.libs.export_hyper import upsert_into_hyper, sort_hyper_table, HyperExtract
+from airtable_to_tableau.libs.sinks import hyper_output_path, open_sinks, table_outputs
+from airtable_to_tableau.libs.hyper_process import get_hyper_manager, hyper_connection
+from airtable_to_tableau.libs.read_hyper import get_hyper_table_columns
+from airtable_to_tableau.libs.watermarks import load_watermark, save_watermark
+from airtable_to_tableau.libs.snapshot_cache import (
+    latest_snapshot,
+    iter_snapshot_pages,
+    read_snapshot_header,
+    record_snapshot,
+)
+from airtable_to_tableau.libs.sanitize_dataframe import sanitize_dataframe
+from airtable_to_tableau.libs.flatten_utils import flatten_lists_in_dataframe
+from airtable_to_tableau.libs.transform_utils import apply_column_transformations
+
+DEFAULT_ID_COLUMN = "Airtable Record ID"
+# Subtracted from the run start when storing a watermark to absorb clock skew
+DEFAULT_OVERLAP_SECONDS = 60
+
+
+def load_table_schema(entry, api_key, log=print):
+    """Return the table's Airtable metadata fields, or None when disabled or unavailable."""
+    if not entry.get("typed_schema", True):
+        return None
+    try:
+        return get_airtable_metadata(entry["base_id"], entry["table_name"], api_key=api_key)
+    except Exception as e:
+        log(f"⚠️  [{entry['table_name']}] Could not load schema, typing columns from data: {e}")
+        return None
+
+
+def ingest_mode(entry):
+    """How records become a DataFrame: "columnar" (default, AIRTABLE_INGEST) or "pandas"."""
+    if entry.get("sanitize") == "legacy":
+        return "pandas"
+    return (entry.get("ingest") or os.getenv("AIRTABLE_INGEST", "columnar")).lower()
+
+
+def collect_records(pages, entry, schema_fields=None):
+    """
+    Drain record pages for a table that is transformed in one piece: into a
+    `ColumnAccumulator` page by page (columnar ingest), or into a list of records.
+    """
+    if ingest_mode(entry) == "columnar":
+        accumulator = ColumnAccumulator(schema_fields, options=entry.get("flatten"))
+        for page in pages:
+            accumulator.add(page)
+        return accumulator
+    return [record for page in pages for record in page]
+
+
+def transform_records(records, entry, schema_fields=None):
+    """
+    Flatten, sanitize and transform Airtable field dicts (a list, or a `ColumnAccumulator`
+    from `collect_records`) into an export-ready DataFrame using the table entry's
+    "flatten", "sanitize", "columns" and "column_order". `schema_fields` (Airtable
+    metadata) tells flatten which columns can be nested.
+    """
+    if isinstance(records, ColumnAccumulator):
+        df = records.to_frame()
+    elif ingest_mode(entry) == "columnar":
+        df = records_to_frame(records, schema_fields, options=entry.get("flatten"))
+    else:
+        df = flatten_lists_in_dataframe(records, field_types=field_types(schema_fields), options=entry.get("flatten"))
+        df = sanitize_dataframe(df, legacy=entry.get("sanitize") == "legacy")
+    return apply_column_transformations(df, entry.get("columns", []), entry.get("column_order"))
+
+
+def iter_record_batches(pages, batch_pages=1):
+    """Group an iterator of record pages into lists of records spanning `batch_pages` pages."""
+    batch_pages = max(1, int(batch_pages or 1))
+    batch = []
+    count = 0
+    for page in pages:
+        batch.extend(page)
+        count += 1
+        if count >= batch_pages:
+            yield batch
+            batch = []
+            count = 0
+    if batch:
+        yield batch
+
+
+def incremental_settings(entry):
+    """Normalize a table's `incremental` option into a settings dict, or None when disabled."""
+    setting = entry.get("incremental")
+    if not setting:
+        return None
+    if setting is True:
+        setting = {}
+    if not setting.get("enabled", True):
+        return None
+    return {
+        "id_column": setting.get("id_column", DEFAULT_ID_COLUMN),
+        "overlap_seconds": float(setting.get("overlap_seconds", DEFAULT_OVERLAP_SECONDS)),
+    }
+
+
+def with_record_id_column(entry, id_column):
+    """Copy of `entry` whose column config also carries the Airtable record ID as `id_column`."""
+    entry = dict(entry)
+    id_config = {"source": RECORD_ID_FIELD, "rename": id_column, "type": "str"}
+    entry["columns"] = [id_config] + list(entry.get("columns", []))
+    if entry.get("column_order"):
+        entry["column_order"] = [id_column] + list(entry["column_order"])
+    return entry
+
+
+def export_table(entry, api_key, stream=False, batch_pages=1, snapshot=None, extract=None, log=print):
+    """
+    Export a single table config entry and return a result dict for the summary.
+    With `stream` (or `"stream": true` on the entry) every `batch_pages` pages are
+    transformed and appended to the open output sinks as they arrive, so memory
+    stays flat regardless of table size. Tables with `"incremental"` set fetch only
+    records modified since the stored watermark and upsert them by record ID.
+    `snapshot` holds the raw-page snapshot options, see `open_page_source`.
+    `extract` is the shared `HyperExtract` when several tables write to one file.
+    Progress messages go through `log` (print-compatible; the web job queue passes its own).
+    """
+    table_name = entry["table_name"]
+    stream = entry.get("stream", stream)
+    batch_pages = entry.get("batch_pages", batch_pages)
+
+    result = {
+        "table_name": table_name,
+        "output_file": entry.get("output_file"),
+        "status": "failed",
+        "rows": 0,
+        "fetch_seconds": 0.0,
+        "seconds": 0.0,
+        "pages": 0,
+        "retries": 0,
+        "error": None,
+    }
+    fetch_stats = {}
+    started = time.perf_counter()
+    run_started = datetime.datetime.now(datetime.timezone.utc)
+
+    try:
+        outputs = table_outputs(entry)
+    except ValueError as e:
+        log(f"❌ [{table_name}] {e}")
+        result["error"] = f"config: {e}"
+        return result
+    # The Hyper output (if any) carries the watermark and join-key sorting
+    output_file = hyper_output_path(entry)
+    result["output_file"] = output_file or outputs[0]["path"]
+
+    incremental = incremental_settings(entry)
+    if incremental and not output_file:
+        log(f"⚠️  [{table_name}] Incremental exports need a Hyper output; exporting the full table.")
+        incremental = None
+    elif incremental and len(outputs) > 1:
+        log(f"⚠️  [{table_name}] Incremental tables only update their Hyper output; other outputs are skipped.")
+    fetch_options = {}
+    watermark = None
+    if incremental:
+        entry = with_record_id_column(entry, incremental["id_column"])
+        fetch_options["include_id"] = True
+        watermark = load_watermark(output_file, table_name)
+        if extract is not None:
+            existing_columns = extract.table_columns(table_name)
+        else:
+            existing_columns = get_hyper_table_columns(output_file, table_name)
+        if watermark and incremental["id_column"] not in (existing_columns or []):
+            log(f"⚠️  [{table_name}] Existing extract has no '{incremental['id_column']}' column; rebuilding.")
+            watermark = None
+
+    if incremental and snapshot:
+        log(f"⚠️  [{table_name}] Snapshots are not used for incremental tables.")
+        snapshot = None
+
+    try:
+        pages, schema_fields = open_page_source(entry, api_key, fetch_stats, fetch_options, snapshot, watermark, log)
+    except Exception as e:
+        log(f"❌ [{table_name}] {e}")
+        status, error = "failed", f"fetch: {e}"
+    else:
+        if watermark:
+            status, error = _run_incremental(
+                entry, output_file, pages, incremental["id_column"], watermark, result, schema_fields, extract, log
+            )
+        elif stream:
+            status, error = _run_streaming(entry, pages, batch_pages, result, schema_fields, extract, log)
+        else:
+            status, error = _run_full(entry, pages, result, schema_fields, extract, log)
+
+    if status == "ok" and result["rows"] and entry.get("join_keys") and output_file:
+        _sort_on_join_keys(entry, output_file, extract, log)
+
+    if incremental and status in ("ok", "skipped") and os.path.exists(output_file):
+        new_watermark = run_started - datetime.timedelta(seconds=incremental["overlap_seconds"])
+        save_watermark(output_file, table_name, new_watermark, rows=result["rows"], mode="incremental" if watermark else "full")
+
+    result["pages"] = fetch_stats.get("pages", 0)
+    result["retries"] = fetch_stats.get("retries", 0)
+    result["status"] = status
+    result["error"] = error
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def open_page_source(entry, api_key, fetch_stats, fetch_options, snapshot=None, watermark=None, log=print):
+    """
+    Return `(pages, schema_fields)` for a table: record pages replayed from a raw-page
+    snapshot, or fetched from Airtable (and recorded to a new snapshot when requested),
+    plus the table's metadata fields (from the snapshot header when replaying).
+
+    `snapshot` options:
+        - replay:  Only replay a snapshot; fail when none is usable (no network).
+        - max_age: Replay the newest snapshot if it is younger than this many seconds,
+                   otherwise fetch and record a fresh one.
+        - write:   Record every fetch to a new snapshot.
+    """
+    base_id = entry["base_id"]
+    table_name = entry["table_name"]
+    snapshot = snapshot or {}
+    max_age = snapshot.get("max_age")
+
+    if snapshot.get("replay") or max_age is not None:
+        path = latest_snapshot(base_id, table_name, max_age=max_age)
+        if path:
+            log(f"♻️  [{table_name}] Replaying snapshot {path}")
+            fetch_stats["snapshot"] = path
+            schema_fields = read_snapshot_header(path).get("fields") if entry.get("typed_schema", True) else None
+            return iter_snapshot_pages(path), schema_fields
+        if snapshot.get("replay"):
+            age = f" younger than {max_age:g}s" if max_age is not None else ""
+            raise FileNotFoundError(f"No snapshot{age} for {base_id}/{table_name}")
+
+    writing = snapshot.get("write") or max_age is not None
+    schema_fields = load_table_schema(entry, api_key, log)
+    if writing:
+        # Snapshots keep every field so later replays work with any column config
+        params = build_request_params(dict(entry, project_fields=False), api_key, log)
+    else:
+        params = build_request_params(entry, api_key, log)
+
+    pages = iter_airtable_pages(
+        base_id,
+        table_name,
+        api_key,
+        stats=fetch_stats,
+        include_id=fetch_options.get("include_id", False),
+        filter_formula=modified_since_formula(watermark) if watermark else None,
+        params=params,
+    )
+    if writing:
+        pages = record_snapshot(pages, base_id, table_name, params=params, fields=schema_fields)
+    return pages, schema_fields
+
+
+def _sort_on_join_keys(entry, output_file, extract=None, log=print):
+    table_name = entry["table_name"]
+    keys = entry["join_keys"]
+    try:
+        if extract is not None:
+            with extract.lock:
+                sort_hyper_table(extract.connection, table_name, keys)
+        else:
+            with hyper_connection(output_file) as connection:
+                sort_hyper_table(connection, table_name, keys)
+    except Exception as e:
+        log(f"⚠️  [{table_name}] Could not sort on join keys {keys}: {e}")
+
+
+def _run_full(entry, pages, result, schema_fields=None, extract=None, log=print):
+    table_name = entry["table_name"]
+
+    log(f"📥 [{table_name}] Fetching...")
+
+    started = time.perf_counter()
+    try:
+        records = collect_records(pages, entry, schema_fields)
+    except Exception as e:
+        log(f"❌ [{table_name}] Error fetching data: {e}")
+        return "failed", f"fetch: {e}"
+    result["fetch_seconds"] = time.perf_counter() - started
+
+    if not records:
+        log(f"⚠️  [{table_name}] No records returned. Skipping.")
+        return "skipped", "no records"
+
+    try:
+        df = transform_records(records, entry, schema_fields)
+    except Exception as e:
+        log(f"❌ [{table_name}] Error processing records: {e}")
+        return "failed", f"transform: {e}"
+
+    try:
+        column_types = build_hyper_schema(entry.get("columns", []), schema_fields)
+        columns = output_columns(entry.get("columns", []), schema_fields, entry.get("column_order"))
+        with open_sinks(entry, column_types, extract, columns, log) as sinks:
+            log(f"💾 [{table_name}] Writing {len(df)} rows to {sinks}...")
+            sinks.write(df)
+    except Exception as e:
+        log(f"❌ [{table_name}] Failed to export: {e}")
+        return "failed", f"export: {e}"
+
+    result["rows"] = len(df)
+    log(f"✅ [{table_name}] Done.")
+    return "ok", None
+
+
+def _run_streaming(entry, pages, batch_pages, result, schema_fields=None, extract=None, log=print):
+    table_name = entry["table_name"]
+
+    batches = iter_record_batches(pages, batch_pages)
+    stage = "fetch"
+    try:
+        column_types = build_hyper_schema(entry.get("columns", []), schema_fields)
+        columns = output_columns(entry.get("columns", []), schema_fields, entry.get("column_order"))
+        with open_sinks(entry, column_types, extract, columns, log) as sinks:
+            log(f"📥 [{table_name}] Streaming to {sinks} ({batch_pages} page(s) per batch)...")
+            while True:
+                stage = "fetch"
+                waited = time.perf_counter()
+                records = next(batches, None)
+                result["fetch_seconds"] += time.perf_counter() - waited
+                if records is None:
+                    break
+                stage = "transform"
+                df = transform_records(records, entry, schema_fields)
+                stage = "export"
+                sinks.write(df)
+                result["rows"] = sinks.rows_written
+    except Exception as e:
+        log(f"❌ [{table_name}] Streaming export failed during {stage}: {e}")
+        return "failed", f"{stage}: {e}"
+
+    if not result["rows"]:
+        log(f"⚠️  [{table_name}] No records returned. Skipping.")
+        return "skipped", "no records"
+
+    log(f"✅ [{table_name}] Streamed {result['rows']} rows.")
+    return "ok", None
+
+
+def _run_incremental(entry, output_file, pages, id_column, watermark, result, schema_fields=None, extract=None, log=print):
+    table_name = entry["table_name"]
+
+    log(f"📥 [{table_name}] Fetching records modified since {watermark}...")
+
+    started = time.perf_counter()
+    try:
+        records = collect_records(pages, entry, schema_fields)
+    except Exception as e:
+        log(f"❌ [{table_name}] Error fetching data: {e}")
+        return "failed", f"fetch: {e}"
+    result["fetch_seconds"] = time.perf_counter() - started
+
+    if not records:
+        log(f"✅ [{table_name}] Up to date; no modified records.")
+        return "ok", None
+
+    try:
+        df = transform_records(records, entry, schema_fields)
+    except Exception as e:
+        log(f"❌ [{table_name}] Error processing records: {e}")
+        return "failed", f"transform: {e}"
+
+    log(f"💾 [{table_name}] Upserting {len(df)} rows into {output_file}...")
+    try:
+        upsert_into_hyper(df, output_file, table_name, id_column, extract=extract, log=log)
+    except Exception as e:
+        log(f"❌ [{table_name}] Failed to upsert into Hyper: {e}")
+        return "failed", f"export: {e}"
+
+    result["rows"] = len(df)
+    log(f"✅ [{table_name}] Done.")
+    return "ok", None
+
+
+def _hyper_path(entry):
+    try:
+        path = hyper_output_path(entry)
+    except ValueError:
+        # Reported by export_table
+        return None
+    return os.path.abspath(path) if path else None
+
+
+def shared_output_files(tables):
+    """Hyper output files that more than one table entry writes to."""
+    counts = {}
+    for entry in tables:
+        path = _hyper_path(entry)
+        if path:
+            counts[path] = counts.get(path, 0) + 1
+    return [path for path, count in counts.items() if count > 1]
+
+
+class _SharedExtracts:
+    """
+    The `HyperExtract` of each shared output file, opened when its first table starts and
+    closed once its last table finishes, so only files with work in flight hold a pooled
+    connection.
+    """
+
+    def __init__(self, tables, log=print):
+        self.log = log
+        self._lock = threading.Lock()
+        self._remaining = {path: sum(_hyper_path(e) == path for e in tables) for path in shared_output_files(tables)}
+        self._open = {}
+
+    def acquire(self, path):
+        if path not in self._remaining:
+            return None
+        with self._lock:
+            if path not in self._open:
+                self.log(f"🗄️  Writing {self._remaining[path]} tables into {path}")
+                self._open[path] = HyperExtract(path).__enter__()
+            return self._open[path]
+
+    def release(self, path):
+        if path not in self._remaining:
+            return
+        with self._lock:
+            self._remaining[path] -= 1
+            extract = self._open.pop(path, None) if self._remaining[path] == 0 else None
+        if extract is not None:
+            extract.close()
+
+    def close(self):
+        with self._lock:
+            for extract in self._open.values():
+                extract.close()
+            self._open = {}
+
+
+def _grouped_order(tables):
+    """Indexes of `tables` with the tables of each output file next to each other, in config order."""
+    first = {}
+    for i, entry in enumerate(tables):
+        first.setdefault(_hyper_path(entry) or i, i)
+    return sorted(range(len(tables)), key=lambda i: first[_hyper_path(tables[i]) or i])
+
+
+def run_exports(tables, api_key, jobs=1, stream=False, batch_pages=1, snapshot=None, log=print, progress=None):
+    """
+    Export every table entry using up to `jobs` concurrent workers; results keep config order.
+    Tables sharing an output file are written into one `HyperExtract`. Messages go through
+    `log`, and `progress(result)` (if given) is called as each table finishes.
+
+    Every worker can hold a pooled Hyper connection, so `jobs` is capped one below
+    HYPER_POOL_SIZE. Tables sharing a file run back to back, which keeps the number of
+    open extracts within the number of workers.
+    """
+    jobs = max(1, int(jobs or 1))
+    pool_size = get_hyper_manager().pool_size
+    if jobs >= pool_size > 1:
+        log(f"⚠️  Running {pool_size - 1} tables at a time instead of {jobs} (HYPER_POOL_SIZE={pool_size})")
+        jobs = pool_size - 1
+
+    with contextlib.closing(_SharedExtracts(tables, log)) as extracts:
+
+        def run(entry):
+            path = _hyper_path(entry)
+            extract = extracts.acquire(path)
+            try:
+                result = export_table(
+                    entry, api_key, stream=stream, batch_pages=batch_pages, snapshot=snapshot, extract=extract, log=log
+                )
+            finally:
+                extracts.release(path)
+            if progress is not None:
+                progress(result)
+            return result
+
+        order = _grouped_order(tables)
+        if jobs == 1 or len(tables) <= 1:
+            results = {i: run(tables[i]) for i in order}
+        else:
+            with ThreadPoolExecutor(max_workers=min(jobs, len(tables))) as pool:
+                futures = {i: pool.submit(run, tables[i]) for i in order}
+                results = {i: future.result() for i, future in futures.items()}
+        return [results[i] for i in range(len(tables))]
+
+
+def print_summary(results, elapsed=None, log=print):
+    """Print one line per table with row count, timings and status."""
+    icons = {"ok": "✅", "skipped": "⚠️ ", "failed": "❌"}
+
+    log("\n📋 Export summary:")
+    width = max([len(r["table_name"]) for r in results] + [5])
+    for r in results:
+        line = (
+            f"  {icons.get(r['status'], '•')} {r['table_name']:<{width}}  "
+            f"{r['rows']:>9} rows  {r['pages']:>5} pages  {r['retries']:>3} retries  "
+            f"fetch {r['fetch_seconds']:7.2f}s  total {r['seconds']:7.2f}s"
+        )
+        if r["error"]:
+            line += f"  ({r['error']})"
+        log(line)
+
+    if elapsed is not None:
+        total_rows = sum(r["rows"] for r in results)
+        serial = sum(r["seconds"] for r in results)
+        log(f"  ⏱️  {total_rows} rows in {elapsed:.2f}s wall clock ({serial:.2f}s summed across tables)")
@@ -0,0 +1,282 @@
+"""
+fake_airtable.py
+
+Description:
+    A local stand-in for the Airtable REST API, used by the tests and the
+    `airtable-export bench` command so the export pipeline can be exercised and
+    benchmarked without touching the real API.
+
+    Serves synthetic bases of configurable row count, field mix, page size and
+    latency. Records are generated on demand from their row index, so a
+    million-row table costs no server memory. Supports:
+        - GET /v0/{base_id}/{table}                 (offset, pageSize, fields[],
+                                                      filterByFormula on LAST_MODIFIED_TIME())
+        - GET /v0/meta/bases/{base_id}/tables       (table schemas)
+        - Injected 429 responses every N requests
+
+Classes:
+    - SyntheticTable(name, rows, fields=None, seed=0): Deterministic fake table.
+    - FakeAirtableServer(bases, page_size=100, latency=0.0, fail_every=0): Threaded HTTP server.
+
+Usage:
+    with FakeAirtableServer({"appBench": [SyntheticTable("Building", 10000)]}) as server:
+        os.environ["AIRTABLE_API_URL"] = server.url
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+MAX_PAGE_SIZE = 100
+
+# Field name → Airtable field type used when no field mix is given
+DEFAULT_FIELDS = {
+    "Name": "singleLineText",
+    "Notes": "multilineText",
+    "Capacity": "number",
+    "Budget": "currency",
+    "Active": "checkbox",
+    "Status": "singleSelect",
+    "Tags": "multipleSelects",
+    "Opened": "date",
+    "Owner": "singleCollaborator",
+    "Photos": "multipleAttachments",
+    "Last Modified": "lastModifiedTime",
+}
+
+# Field options the metadata API reports for these types
+FIELD_OPTIONS = {
+    "number": {"precision": 0},
+    "currency": {"precision": 2, "symbol": "$"},
+    "percent": {"precision": 0},
+}
+
+_WORDS = ["north", "south", "east", "west", "tower", "annex", "plaza", "hall", "lab", "depot"]
+_STATUSES = ["Planned", "Active", "Closed"]
+_TAGS = ["HQ", "Leased", "Owned", "Remote", "Shared"]
+_EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+_FILTER_PATTERN = re.compile(r"IS_AFTER\(LAST_MODIFIED_TIME\(\),\s*'([^']+)'\)")
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class SyntheticTable:
+    """A deterministic fake Airtable table; row `i` always produces the same record."""
+
+    def __init__(self, name, rows, fields=None, seed=0, empty_ratio=0.1):
+        self.name = name
+        self.rows = rows
+        self.fields = dict(fields or DEFAULT_FIELDS)
+        self.seed = seed
+        self.empty_ratio = empty_ratio
+        self.table_id = f"tbl{zlib.crc32(f'{name}:{seed}'.encode('utf-8')):014d}"
+
+    def schema(self):
+        return {
+            "id": self.table_id,
+            "name": self.name,
+            "fields": [
+                dict(
+                    {"id": f"fld{i:014d}", "name": name, "type": field_type},
+                    **({"options": FIELD_OPTIONS[field_type]} if field_type in FIELD_OPTIONS else {}),
+                )
+                for i, (name, field_type) in enumerate(self.fields.items())
+            ],
+        }
+
+    def modified_time(self, index):
+        # Later rows were modified later, so "modified since" is a contiguous suffix
+        return _EPOCH + datetime.timedelta(seconds=index)
+
+    def first_modified_after(self, watermark):
+        seconds = (watermark - _EPOCH).total_seconds()
+        return min(self.rows, max(0, int(seconds) + 1))
+
+    def _value(self, rng, index, name, field_type):
+        if field_type == "singleLineText":
+            return f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()} {index}"
+        if field_type == "multilineText":
+            return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 40)))
+        if field_type == "number":
+            return rng.randint(0, 5000)
+        if field_type in ("currency", "percent"):
+            return round(rng.uniform(0, 1_000_000), 2)
+        if field_type == "checkbox":
+            return rng.random() < 0.5
+        if field_type == "singleSelect":
+            return rng.choice(_STATUSES)
+        if field_type == "multipleSelects":
+            return rng.sample(_TAGS, rng.randint(1, 3))
+        if field_type == "date":
+            return (_EPOCH.date() + datetime.timedelta(days=rng.randint(0, 3650))).isoformat()
+        if field_type in ("dateTime", "createdTime"):
+            return _iso(_EPOCH + datetime.timedelta(minutes=rng.randint(0, 10 ** 6)))
+        if field_type == "lastModifiedTime":
+            return _iso(self.modified_time(index))
+        if field_type == "singleCollaborator":
+            user = rng.randint(1, 50)
+            return {"id": f"usr{user:014d}", "email": f"user{user}@example.com", "name": f"User {user}"}
+        if field_type == "multipleAttachments":
+            return [
+                {
+                    "id": f"att{index:08d}{n}",
+                    "url": f"https://dl.example.com/{index}/{n}.jpg",
+                    "filename": f"{index}-{n}.jpg",
+                    "size": rng.randint(10 ** 4, 10 ** 6),
+                    "type": "image/jpeg",
+                }
+                for n in range(rng.randint(1, 2))
+            ]
+        if field_type == "multipleRecordLinks":
+            return [f"rec{rng.randint(0, 10 ** 6):014d}" for _ in range(rng.randint(1, 3))]
+        return f"{name} {index}"
+
+    def record(self, index, fields=None):
+        rng = random.Random(self.seed * 1_000_003 + index)
+        values = {}
+        for name, field_type in self.fields.items():
+            # Airtable omits empty fields from the record entirely
+            if field_type not in ("lastModifiedTime", "singleLineText") and rng.random() < self.empty_ratio:
+                continue
+            value = self._value(rng, index, name, field_type)
+            if fields is None or name in fields:
+                values[name] = value
+        return {"id": f"rec{index:014d}", "createdTime": _iso(_EPOCH), "fields": values}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeAirtable/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._send_json(401, {"error": "AUTHENTICATION_REQUIRED"})
+
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fake.should_throttle():
+            return self._send_json(
+                429,
+                {"errors": [{"error": "RATE_LIMIT_REACHED"}]},
+                headers={"Retry-After": str(fake.retry_after)},
+            )
+
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        query = parse_qs(url.query)
+
+        if len(parts) == 5 and parts[:3] == ["v0", "meta", "bases"] and parts[4] == "tables":
+            tables = fake.bases.get(parts[3])
+            if tables is None:
+                return self._send_json(404, {"error": "NOT_FOUND"})
+            return self._send_json(200, {"tables": [t.schema() for t in tables]})
+
+        if len(parts) == 3 and parts[0] == "v0":
+            table = fake.table(parts[1], parts[2])
+            if table is None:
+                return self._send_json(404, {"error": "TABLE_NOT_FOUND"})
+            return self._send_json(200, fake.list_records(table, query))
+
+        return self._send_json(404, {"error": "NOT_FOUND"})
+
+
+class FakeAirtableServer:
+    """
+    Threaded local HTTP server speaking enough of the Airtable API for the export pipeline.
+    `bases` maps base IDs to lists of SyntheticTable. `fail_every=N` answers every Nth
+    request with a 429.
+    """
+
+    def __init__(self, bases, page_size=MAX_PAGE_SIZE, latency=0.0, fail_every=0, retry_after=0, port=0):
+        self.bases = bases
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.throttled_count = 0
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def should_throttle(self):
+        with self._count_lock:
+            self.request_count += 1
+            if self.fail_every and self.request_count % self.fail_every == 0:
+                self.throttled_count += 1
+                return True
+        return False
+
+    def table(self, base_id, name_or_id):
+        for table in self.bases.get(base_id, []):
+            if name_or_id in (table.name, table.table_id):
+                return table
+        return None
+
+    def list_records(self, table, query):
+        page_size = self.page_size
+        if "pageSize" in query:
+            page_size = max(1, min(MAX_PAGE_SIZE, int(query["pageSize"][0])))
+        fields = set(query["fields[]"]) if "fields[]" in query else None
+
+        start = 0
+        formula = query.get("filterByFormula", [None])[0]
+        if formula:
+            match = _FILTER_PATTERN.search(formula)
+            if match:
+                watermark = datetime.datetime.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S.%fZ")
+                start = table.first_modified_after(watermark.replace(tzinfo=datetime.timezone.utc))
+
+        if "offset" in query:
+            start = int(query["offset"][0].replace("itr", ""))
+
+        end = min(table.rows, start + page_size)
+        payload = {"records": [table.record(i, fields) for i in range(start, end)]}
+        if end < table.rows:
+            payload["offset"] = f"itr{end}"
+        return payload
@@ -4,6 +4,10 @@ fetch_airtable.py
 Description:
     Contains the function to fetch data from Airtable using its REST API.
     Handles pagination and returns the complete list of Airtable records.
+    Requests go through the shared `AirtableClient`, which pools connections,
+    retries throttled or failed pages and applies the per-base rate limiter.
+    `iter_airtable_pages` yields one page (up to 100 records) at a time for
+    the streaming export pipeline.
 
 Used by:
     - CLI export command
@@ -12,22 +16,75 @@ Used by:
 Author: Jaimie Garner
 Date: 2025-06-06
 """
-import requests
+from requests.utils import quote
 
-def fetch_airtable(base_id, table_name, api_key):
-    url = f"https://api.airtable.com/v0/{base_id}/{table_name}"
-    headers = { "Authorization": f"Bearer {api_key}" }
+from airtable_to_tableau.libs.airtable_client import get_client
+
+# Field name under which the Airtable record ID is added when `include_id` is set
+RECORD_ID_FIELD = "_airtable_record_id"
+
+
+def modified_since_formula(watermark):
+    """filterByFormula expression matching records modified after an ISO `watermark`."""
+    return f"IS_AFTER(LAST_MODIFIED_TIME(), '{watermark}')"
+
+
+def _record_fields(record, include_id):
+    if not include_id:
+        return record["fields"]
+    fields = dict(record["fields"])
+    fields[RECORD_ID_FIELD] = record["id"]
+    return fields
+
+
+def iter_airtable_pages(
+    base_id, table_name, api_key, stats=None, include_id=False, filter_formula=None, params=None
+):
+    """
+    Yield the field dicts of each page of `table_name` as it arrives.
+    `stats`, when given, collects "pages", "requests" and "retries" counters.
+    `include_id` adds each record's ID under RECORD_ID_FIELD and `filter_formula`
+    is passed to Airtable as filterByFormula. `params` holds extra list-records
+    query params (fields[], view, sort, pageSize) sent with every page.
+    """
+    client = get_client(api_key)
+    path = f"v0/{base_id}/{quote(table_name, safe='')}"
+    if stats is None:
+        stats = {}
 
-    all_records = []
     offset = None
 
     while True:
-        params = {"offset": offset} if offset else {}
-        response = requests.get(url, headers=headers, params=params)
-        data = response.json()
-        all_records.extend(data["records"])
+        page_params = dict(params or {})
+        if offset:
+            page_params["offset"] = offset
+        if filter_formula:
+            page_params["filterByFormula"] = filter_formula
+        data = client.get_json(path, params=page_params, base_id=base_id, stats=stats)
+        stats["pages"] = stats.get("pages", 0) + 1
+        yield [_record_fields(r, include_id) for r in data.get("records", [])]
         offset = data.get("offset")
         if not offset:
             break
 
-        return [r["fields"] for r in all_records]
\ No newline at end of file
+
+def fetch_airtable(
+    base_id, table_name, api_key, stats=None, include_id=False, filter_formula=None, params=None
+):
+    """
+    Fetch every record of `table_name` and return the list of field dicts.
+    `stats`, when given, collects "pages", "requests" and "retries" counters.
+    """
+    all_records = []
+    pages = iter_airtable_pages(
+        base_id,
+        table_name,
+        api_key,
+        stats=stats,
+        include_id=include_id,
+        filter_formula=filter_formula,
+        params=params,
+    )
+    for page in pages:
+        all_records.extend(page)
+    return all_records
@@ -0,0 +1,84 @@
+"""
+field_projection.py
+
+Description:
+    Pushes a table's column config down into the Airtable list-records request.
+    Only the fields the `columns` config reads are requested (`fields[]`), so
+    long text, attachments and lookups that would be dropped by the transform
+    step are never transferred or parsed. `regex: true` sources are resolved
+    against the table schema from the Airtable metadata API.
+
+    Optional table settings passed through to the request:
+        - view:      Airtable view name or ID
+        - sort:      [{"field": "Name", "direction": "asc"}, ...]
+        - page_size: Records per page (1-100)
+        - project_fields: false to request every field
+
+Functions:
+    - build_field_projection(column_config, schema_fields=None): Field names the config reads.
+    - build_request_params(entry, api_key=None, log=print): Airtable query params for a table config entry.
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import re
+
+from airtable_to_tableau.libs.airtable_metadata import get_airtable_metadata
+from airtable_to_tableau.libs.fetch_airtable import RECORD_ID_FIELD
+
+MAX_PAGE_SIZE = 100
+
+
+def build_field_projection(column_config, schema_fields=None):
+    """
+    Return the Airtable field names read by `column_config`, in config order.
+    Returns None (fetch every field) when the config is empty, or when it has regex
+    sources and no schema to resolve them against.
+    """
+    if not column_config:
+        return None
+
+    names = []
+    for col in column_config:
+        source = col["source"]
+        if source == RECORD_ID_FIELD:
+            continue
+        if col.get("regex", False):
+            if schema_fields is None:
+                return None
+            pattern = re.compile(source)
+            names.extend(f["name"] for f in schema_fields if pattern.match(f["name"]))
+        else:
+            names.append(source)
+
+    names = list(dict.fromkeys(names))
+    return names or None
+
+
+def build_request_params(entry, api_key=None, log=print):
+    """Build the list-records query params (fields[], view, sort, pageSize) for a table entry."""
+    params = {}
+
+    if entry.get("project_fields", True):
+        column_config = entry.get("columns", [])
+        schema_fields = None
+        if any(col.get("regex", False) for col in column_config):
+            try:
+                schema_fields = get_airtable_metadata(entry["base_id"], entry["table_name"], api_key=api_key)
+            except Exception as e:
+                log(f"⚠️  [{entry['table_name']}] Could not load schema to resolve regex columns, fetching all fields: {e}")
+        fields = build_field_projection(column_config, schema_fields)
+        if fields:
+            params["fields[]"] = fields
+
+    if entry.get("view"):
+        params["view"] = entry["view"]
+
+    for i, sort in enumerate(entry.get("sort", [])):
+        params[f"sort[{i}][field]"] = sort["field"]
+        params[f"sort[{i}][direction]"] = sort.get("direction", "asc")
+
+    if entry.get("page_size"):
+        params["pageSize"] = max(1, min(MAX_PAGE_SIZE, int(entry["page_size"])))
+
+    return params
@@ -3,11 +3,23 @@ flatten_utils.py
 
 Description:
     Utilities to flatten nested values in Airtable records, specifically handling list-type fields.
-    Converts lists (e.g. multiple select values or linked records) into comma-separated strings.
+    Converts lists (e.g. multiple select values or linked records) into comma-separated strings,
+    and attachment / collaborator objects into one configurable attribute (URL, name, email...).
+
+    Only columns that can actually hold lists or dicts are touched. They are found from the
+    Airtable field types when known, otherwise with one C-level dtype inference per object
+    column. Numeric, boolean and plain-text columns are left as they are (no copy).
 
 Functions:
-    - flatten_value(val): Converts list values to comma-separated strings.
-    - flatten_lists_in_dataframe(records): Converts a list of dicts to a flattened DataFrame.
+    - flatten_value(val, options=None): Converts list/dict values to strings.
+    - nested_columns(df, field_types=None): Names of the columns that need flattening.
+    - flatten_lists_in_dataframe(records, field_types=None, options=None): Converts a list of dicts
+      to a flattened DataFrame.
+
+Options (the table config's "flatten" entry):
+    - attachment:   Attachment attribute to keep (default: "url"; e.g. "filename")
+    - collaborator: Collaborator attribute to keep (default: "name"; e.g. "email", "id")
+    - separator:    Joins list items (default: ", ")
 
 Usage:
     Used as part of the Airtable export pipeline to sanitize and prepare data before transformation.
@@ -18,14 +30,118 @@ Requires:
 Author: Jaimie Garner
 Date: 2025-06-06
 """
+import json
+
 import pandas as pd
 
-def flatten_value(val):
+DEFAULT_OPTIONS = {
+    "attachment": "url",
+    "collaborator": "name",
+    "separator": ", ",
+}
+
+# Airtable field types whose cell values are (or, for formulas, rollups and lookups,
+# can be) lists or objects; only their list/dict values are flattened
+NESTED_FIELD_TYPES = {
+    "multipleSelects",
+    "multipleRecordLinks",
+    "multipleAttachments",
+    "multipleCollaborators",
+    "singleCollaborator",
+    "createdBy",
+    "lastModifiedBy",
+    "multipleLookupValues",
+    "lookup",
+    "rollup",
+    "formula",
+    "button",
+    "barcode",
+    "aiText",
+}
+
+# infer_dtype results for object columns that cannot contain lists or dicts
+_FLAT_INFERRED_TYPES = {
+    "empty",
+    "string",
+    "bytes",
+    "integer",
+    "floating",
+    "mixed-integer-float",
+    "decimal",
+    "boolean",
+    "datetime",
+    "datetime64",
+    "date",
+    "time",
+}
+
+
+def _resolve_options(options):
+    resolved = dict(DEFAULT_OPTIONS)
+    resolved.update(options or {})
+    return resolved
+
+
+def _flatten_object(obj, options):
+    if "filename" in obj and "url" in obj:
+        return obj.get(options["attachment"])
+    if "email" in obj:
+        return obj.get(options["collaborator"])
+    for key in ("name", "text", "label", "value", "url"):
+        if key in obj:
+            return obj[key]
+    return json.dumps(obj, default=str)
+
+
+def _flatten(val, options):
+    if isinstance(val, dict):
+        return _flatten_object(val, options)
     if isinstance(val, list):
-        return ", ".join(map(str, val))
+        try:
+            # Selects, record links and lookups of text are lists of strings
+            return options["separator"].join(val)
+        except TypeError:
+            pass
+        return options["separator"].join(
+            str(_flatten_object(v, options) if isinstance(v, dict) else v) for v in val
+        )
     return val
 
-def flatten_lists_in_dataframe(records):
-    """Convert list of dicts into DataFrame and flatten list fields."""
+
+def flatten_value(val, options=None):
+    return _flatten(val, _resolve_options(options))
+
+
+def nested_columns(df, field_types=None):
+    """
+    Return the columns that may hold lists or dicts. Columns with a known Airtable type are
+    decided by that type; the rest are checked only when they have object dtype.
+    """
+    field_types = field_types or {}
+    columns = []
+    for name in df.columns:
+        field_type = field_types.get(name)
+        if field_type is not None:
+            if field_type in NESTED_FIELD_TYPES:
+                columns.append(name)
+            continue
+        if not pd.api.types.is_object_dtype(df[name].dtype):
+            continue
+        if pd.api.types.infer_dtype(df[name], skipna=True) not in _FLAT_INFERRED_TYPES:
+            columns.append(name)
+    return columns
+
+
+def flatten_lists_in_dataframe(records, field_types=None, options=None):
+    """Convert list of dicts into DataFrame and flatten list/object fields."""
     df = pd.DataFrame(records)  # 🔁 Convert list to DataFrame
-    return df.applymap(flatten_value)
+    options = _resolve_options(options)
+
+    for name in nested_columns(df, field_types):
+        values = df[name].to_numpy(dtype=object)
+        df[name] = pd.Series(
+            [_flatten(v, options) if isinstance(v, (list, dict)) else v for v in values],
+            index=df.index,
+            dtype=object,
+        )
+    return df
@@ -0,0 +1,250 @@
+"""
+hyper_dump.py
+
+Description:
+    Streams a Hyper table out as CSV, NDJSON or Parquet without loading it into a
+    DataFrame. Rows are pulled from the Hyper result cursor in fixed-size batches and
+    each batch is encoded (and optionally gzip-compressed) as soon as it is read, so
+    memory stays at one batch no matter how large the table is.
+
+    Parquet batches become row groups: pyarrow's ParquetWriter writes into a buffer
+    that is drained after every row group, and the footer follows the last one. Column
+    types come from the Hyper result schema (see `sinks.arrow_type`).
+
+    The rows to dump are chosen with a `hyper_query` spec, so columns, filters,
+    ordering and limits work as in the query API; an empty spec dumps the whole table.
+
+Functions:
+    - dump_chunks(hyper_file_path, spec=None, fmt="csv", compress=False, batch_rows=None, timeout=None):
+      Context manager yielding an iterator of encoded byte chunks.
+    - dump_to_file(hyper_file_path, output_path, spec=None, fmt=None, compress=None, batch_rows=None):
+      Writes a dump to a file (through a ".partial" file) and returns the bytes written.
+    - format_for_path(path): (format, gzip) implied by a file name like "x.csv.gz".
+
+Requires:
+    - tableauhyperapi
+    - pyarrow (optional, for Parquet: pip install "airtable-to-tableau[parquet]")
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import contextlib
+import csv
+import io
+import json
+import os
+import zlib
+
+from tableauhyperapi import TypeTag, Date, Timestamp
+
+from airtable_to_tableau.libs.hyper_query import query_rows, json_value
+from airtable_to_tableau.libs.sinks import arrow_type, _require_pyarrow
+
+FORMATS = ("csv", "ndjson", "parquet")
+EXTENSIONS = {"csv": ".csv", "ndjson": ".ndjson", "parquet": ".parquet"}
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+DEFAULT_BATCH_ROWS = 10_000
+# Parquet batches are row groups, which compress and scan better when larger
+DEFAULT_PARQUET_BATCH_ROWS = 64 * 1024
+
+
+def format_for_path(path):
+    """(format, gzip) implied by a file name: "a.csv.gz" -> ("csv", True), unknown -> (None, gz)."""
+    name = path.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[:-3]
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson", compress
+    if name.endswith(".parquet"):
+        return "parquet", compress
+    if name.endswith(".csv"):
+        return "csv", compress
+    return None, compress
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_value(value):
+    value = json_value(value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+class _CsvEncoder:
+    def __init__(self, columns, schema):
+        self.columns = columns
+
+    def _encode(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def header(self):
+        return self._encode([self.columns])
+
+    def encode(self, batch):
+        return self._encode([[_csv_value(v) for v in row] for row in batch])
+
+    def finish(self):
+        return b""
+
+
+class _NdjsonEncoder:
+    def __init__(self, columns, schema):
+        self.columns = columns
+
+    def header(self):
+        return b""
+
+    def encode(self, batch):
+        lines = (json.dumps(dict(zip(self.columns, map(json_value, row))), default=str) for row in batch)
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def finish(self):
+        return b""
+
+
+class _Drain:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_value(value):
+    if isinstance(value, Timestamp):
+        return value.to_datetime()
+    if isinstance(value, Date):
+        return value.to_date()
+    return value
+
+
+class _ParquetEncoder:
+    def __init__(self, columns, schema):
+        self._pa, pq = _require_pyarrow()
+        self.types = [arrow_type(column.type) for column in schema.columns]
+        self._strings = [t == self._pa.string() and column.type.tag != TypeTag.TEXT
+                         for t, column in zip(self.types, schema.columns)]
+        self.schema = self._pa.schema(list(zip(columns, self.types)))
+        self._sink = _Drain()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="snappy")
+
+    def header(self):
+        return b""
+
+    def encode(self, batch):
+        arrays = []
+        for i, arrow_t in enumerate(self.types):
+            values = [_arrow_value(row[i]) for row in batch]
+            if self._strings[i]:
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(self._pa.array(values, type=arrow_t))
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+        return self._sink.drain()
+
+    def finish(self):
+        self._writer.close()
+        return self._sink.drain()
+
+
+ENCODERS = {"csv": _CsvEncoder, "ndjson": _NdjsonEncoder, "parquet": _ParquetEncoder}
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _encode(encoder, rows, batch_rows):
+    header = encoder.header()
+    if header:
+        yield header
+    for batch in _batches(rows, batch_rows):
+        data = encoder.encode(batch)
+        if data:
+            yield data
+    tail = encoder.finish()
+    if tail:
+        yield tail
+
+
+@contextlib.contextmanager
+def dump_chunks(hyper_file_path, spec=None, fmt="csv", compress=False, batch_rows=None, timeout=None):
+    """
+    Run `spec` (a `hyper_query` spec; default: the whole single table) and yield an
+    iterator of encoded byte chunks, one or more per batch of `batch_rows` rows. The
+    Hyper connection stays open until the block exits. Raises ValueError for an
+    unknown format, QueryError for a bad spec, ImportError for Parquet without pyarrow
+    and PoolExhausted when no Hyper connection frees up within `timeout` seconds.
+    """
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unknown dump format: {fmt} (expected one of: {', '.join(FORMATS)})")
+    if batch_rows is None:
+        batch_rows = DEFAULT_PARQUET_BATCH_ROWS if fmt == "parquet" else DEFAULT_BATCH_ROWS
+    with query_rows(hyper_file_path, spec or {}, timeout=timeout) as (columns, rows):
+        encoder = ENCODERS[fmt](columns, rows.schema)
+        chunks = _encode(encoder, rows, max(1, int(batch_rows)))
+        yield _gzip(chunks) if compress else chunks
+
+
+def dump_to_file(hyper_file_path, output_path, spec=None, fmt=None, compress=None, batch_rows=None):
+    """
+    Dump to `output_path`; the format and gzip default to what the file name implies
+    (csv otherwise). The file appears only once the dump is complete. Returns bytes written.
+    """
+    implied_fmt, implied_gzip = format_for_path(output_path)
+    fmt = fmt or implied_fmt or "csv"
+    compress = implied_gzip if compress is None else compress
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    partial_path = f"{output_path}.partial"
+    written = 0
+    try:
+        with dump_chunks(hyper_file_path, spec, fmt, compress, batch_rows) as chunks, open(partial_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return written
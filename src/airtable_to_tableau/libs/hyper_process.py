@@ -0,0 +1,226 @@
+"""
+hyper_process.py
+
+Description:
+    One long-lived Hyper server per Python process, shared by exports, reads and
+    web requests. Starting `hyperd` costs hundreds of milliseconds, so instead of
+    every call spinning up its own `HyperProcess`, the manager starts one lazily
+    and hands out connections from a small pool.
+
+    Pooled connections are opened without a database; `connection(database)`
+    attaches the requested .hyper file (creating or replacing it first when asked)
+    as the connection's only database, so unqualified `"Extract"."Table"` names
+    work as before, and detaches it again when the connection is returned.
+
+    If Hyper dies, the next checkout fails to connect, the process is restarted
+    and connections from the old process are discarded. The process is shut down
+    at interpreter exit. Forked children (e.g. benchmark workers) start their own.
+
+Classes / Functions:
+    - HyperProcessManager(pool_size=None, parameters=None): The process + connection pool.
+    - get_hyper_manager(): The process-wide manager.
+    - hyper_connection(database=None, create_mode=CreateMode.NONE, timeout=None): Context manager for a pooled connection.
+    - PoolExhausted: Raised when no connection frees up within the checkout timeout.
+
+Environment:
+    - HYPER_POOL_SIZE: Maximum concurrent connections (default: 8).
+    - HYPER_POOL_TIMEOUT: Seconds a checkout waits for a free connection (default: no limit).
+    - HYPER_LOG_DIR:   Directory for hyperd.log (default: "airtable_to_tableau" in the system temp directory).
+
+Requires:
+    - tableauhyperapi
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import atexit
+import contextlib
+import os
+import tempfile
+import threading
+
+from tableauhyperapi import HyperProcess, Connection, Telemetry, CreateMode, HyperException
+
+DEFAULT_POOL_SIZE = 8
+DATABASE_ALIAS = "extract_db"
+# hyperd writes a verbose log; keep it out of the working directory (and the repo)
+DEFAULT_LOG_DIR = os.path.join(tempfile.gettempdir(), "airtable_to_tableau")
+
+
+class PoolExhausted(TimeoutError):
+    """Every pooled connection stayed checked out for the whole checkout timeout."""
+
+
+def _quiet_close(resource):
+    try:
+        resource.close()
+    except Exception:
+        pass
+
+
+def _attach(connection, database, create_mode):
+    catalog = connection.catalog
+    if create_mode == CreateMode.CREATE_AND_REPLACE:
+        catalog.drop_database_if_exists(database)
+        catalog.create_database(database)
+    elif create_mode == CreateMode.CREATE:
+        catalog.create_database(database)
+    elif create_mode == CreateMode.CREATE_IF_NOT_EXISTS:
+        catalog.create_database_if_not_exists(database)
+    catalog.attach_database(database, alias=DATABASE_ALIAS)
+
+
+class HyperProcessManager:
+    """Lazily started, restartable HyperProcess with a bounded pool of connections."""
+
+    def __init__(self, pool_size=None, parameters=None, timeout=None):
+        self.pool_size = int(pool_size or os.getenv("HYPER_POOL_SIZE", DEFAULT_POOL_SIZE))
+        timeout = timeout if timeout is not None else os.getenv("HYPER_POOL_TIMEOUT")
+        self.timeout = float(timeout) if timeout not in (None, "") else None
+        self.parameters = parameters
+        self.starts = 0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._process = None
+        self._generation = 0
+        self._idle = []
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # The parent's hyperd and sockets are not ours to use or close
+            self._reset()
+
+    def _parameters(self):
+        parameters = dict(self.parameters or {})
+        log_dir = os.getenv("HYPER_LOG_DIR") or DEFAULT_LOG_DIR
+        if "log_dir" not in parameters:
+            os.makedirs(log_dir, exist_ok=True)
+            parameters["log_dir"] = log_dir
+        return parameters or None
+
+    def _ensure_process(self):
+        # Caller holds self._lock
+        if self._process is None or not self._process.is_open:
+            self._process = HyperProcess(
+                telemetry=Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+                parameters=self._parameters(),
+            )
+            self._generation += 1
+            self.starts += 1
+        return self._process
+
+    def _shutdown_locked(self):
+        for connection, _ in self._idle:
+            _quiet_close(connection)
+        self._idle = []
+        if self._process is not None:
+            _quiet_close(self._process)
+            self._process = None
+
+    def _checkout(self, fresh=False):
+        """Return (connection, generation, pooled); `fresh` discards every idle connection first."""
+        with self._lock:
+            if fresh:
+                for connection, _ in self._idle:
+                    _quiet_close(connection)
+                self._idle = []
+            while self._idle:
+                connection, generation = self._idle.pop()
+                if generation == self._generation and connection.is_open:
+                    return connection, generation, True
+                _quiet_close(connection)
+            process = self._ensure_process()
+            generation = self._generation
+        try:
+            return Connection(endpoint=process.endpoint), generation, False
+        except HyperException:
+            # Hyper went away underneath us: start a fresh process and retry once
+            print("⚠️  Hyper process is not responding; restarting it.")
+            with self._lock:
+                if generation == self._generation:
+                    self._shutdown_locked()
+                process = self._ensure_process()
+                generation = self._generation
+            return Connection(endpoint=process.endpoint), generation, False
+
+    def _checkin(self, connection, generation, healthy):
+        with self._lock:
+            if healthy and generation == self._generation and connection.is_open:
+                self._idle.append((connection, generation))
+                return
+        _quiet_close(connection)
+
+    @contextlib.contextmanager
+    def connection(self, database=None, create_mode=CreateMode.NONE, timeout=None):
+        """
+        Yield a pooled connection with `database` (if given) attached as its only
+        database. Waits while `pool_size` connections are already checked out, for at
+        most `timeout` seconds (default: the manager's timeout, else no limit), then
+        raises PoolExhausted.
+        """
+        self._check_fork()
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=-1 if timeout is None else max(0.0, timeout)):
+            raise PoolExhausted(f"All {self.pool_size} Hyper connections are busy (waited {timeout:g}s)")
+        try:
+            connection, generation, pooled = self._checkout()
+            try:
+                if database:
+                    _attach(connection, database, create_mode)
+            except HyperException:
+                _quiet_close(connection)
+                if not pooled:
+                    raise
+                # Idle connections may belong to a Hyper process that has since died
+                connection, generation, _ = self._checkout(fresh=True)
+                try:
+                    if database:
+                        _attach(connection, database, create_mode)
+                except Exception:
+                    _quiet_close(connection)
+                    raise
+
+            healthy = True
+            try:
+                yield connection
+            finally:
+                if database:
+                    try:
+                        connection.catalog.detach_database(DATABASE_ALIAS)
+                    except Exception:
+                        healthy = False
+                self._checkin(connection, generation, healthy)
+        finally:
+            self._slots.release()
+
+    def restart(self):
+        """Stop Hyper and drop every pooled connection; the next checkout starts a new process."""
+        with self._lock:
+            self._shutdown_locked()
+
+    def shutdown(self):
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            self._shutdown_locked()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_hyper_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = HyperProcessManager()
+            atexit.register(_manager.shutdown)
+        return _manager
+
+
+def hyper_connection(database=None, create_mode=CreateMode.NONE, timeout=None):
+    return get_hyper_manager().connection(database, create_mode, timeout)
@@ -0,0 +1,192 @@
+"""
+hyper_profile.py
+
+Description:
+    Per-column statistics of a Hyper table, computed inside Hyper so checking an
+    export never pulls its rows into Python:
+
+      - rows, non-null and null counts, min, max and approximate distinct count
+        for every column come from a single aggregate query
+        (COUNT / MIN / MAX / APPROX_COUNT_DISTINCT);
+      - the most frequent values of every column come from one GROUPING SETS
+        query, ranked per column with ROW_NUMBER(), so it is still one scan for
+        all columns.
+
+    Near-unique columns (IDs, free text, measurements), where the distinct count is
+    close to the non-null count, are left out of the top-values query: their top
+    values would all have a count of 1 and grouping them is most of the cost.
+
+    Profiles are cached in a "<file>.profile.json" next to the extract, keyed by the
+    file's mtime and size, so the web page and CLI answer instantly until an export
+    rewrites the file.
+
+Functions:
+    - profile_table(hyper_file_path, table_name=None, top=5): Compute a profile (no cache).
+    - get_profile(hyper_file_path, table_name=None, top=5, refresh=False): Cached profile.
+    - profile_cache_path(hyper_file_path): Where a file's profiles are cached.
+    - print_profile(profile, log=print): Human-readable profile.
+
+Usage:
+    airtable-export profile --input output/buildings.hyper
+    GET /api/hyper/buildings.hyper/profile  (JSON) or /profile/buildings.hyper (page)
+
+Requires:
+    - tableauhyperapi
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import datetime
+import json
+import os
+import tempfile
+import time
+
+from tableauhyperapi import Name, TypeTag
+
+from airtable_to_tableau.libs.hyper_process import hyper_connection
+from airtable_to_tableau.libs.hyper_query import json_value, _table_name
+
+DEFAULT_TOP = 5
+# Columns whose approximate distinct count is at least this share of their non-null values
+# (and that have more than UNIQUE_MIN_ROWS of them) get no top values
+UNIQUE_RATIO = 0.9
+UNIQUE_MIN_ROWS = 1000
+# Types Hyper can't compare or group
+UNORDERED_TYPES = {TypeTag.GEOGRAPHY, TypeTag.BYTES}
+
+
+def profile_cache_path(hyper_file_path):
+    return f"{hyper_file_path}.profile.json"
+
+
+def _stats_query(table, columns):
+    select = ["COUNT(*)"]
+    for column in columns:
+        name = str(Name(column.name.unescaped))
+        if column.type.tag in UNORDERED_TYPES:
+            select.append(f"COUNT({name}), NULL, NULL, NULL")
+        else:
+            select.append(f"COUNT({name}), MIN({name}), MAX({name}), APPROX_COUNT_DISTINCT({name})")
+    return f"SELECT {', '.join(select)} FROM {table}"
+
+
+def _top_query(table, names, top):
+    quoted = [str(Name(n)) for n in names]
+    which = "CASE " + " ".join(f"WHEN GROUPING({q}) = 0 THEN {i}" for i, q in enumerate(quoted)) + " END"
+    is_null = "CASE " + " ".join(f"WHEN GROUPING({q}) = 0 THEN {q} IS NULL" for q in quoted) + " END"
+    sets = ", ".join(f"({q})" for q in quoted)
+    # NULL groups rank last so they never push a real value out of the top N
+    return (
+        f"SELECT * FROM (SELECT {which} AS col, {', '.join(quoted)}, COUNT(*) AS n, "
+        f"ROW_NUMBER() OVER (PARTITION BY {which} ORDER BY {is_null}, COUNT(*) DESC, {', '.join(quoted)}) AS rank "
+        f"FROM {table} GROUP BY GROUPING SETS ({sets})) ranked "
+        f"WHERE rank <= {int(top) + 1} ORDER BY col, rank"
+    )
+
+
+def profile_table(hyper_file_path, table_name=None, top=DEFAULT_TOP):
+    """Compute the profile of a table (the file's only table when `table_name` is None)."""
+    started = time.perf_counter()
+    with hyper_connection(hyper_file_path) as connection:
+        table = _table_name(connection, {"table": table_name})
+        if not connection.catalog.has_table(table):
+            raise ValueError(f"Table not found: {table.name.unescaped}")
+        table_columns = connection.catalog.get_table_definition(table).columns
+
+        stats = connection.execute_list_query(_stats_query(table, table_columns))[0]
+        rows = stats[0]
+        columns = []
+        for i, column in enumerate(table_columns):
+            non_null, minimum, maximum, distinct = stats[1 + 4 * i: 5 + 4 * i]
+            columns.append({
+                "name": column.name.unescaped,
+                "type": str(column.type),
+                "non_null": non_null,
+                "nulls": rows - non_null,
+                "null_fraction": (rows - non_null) / rows if rows else 0.0,
+                "min": json_value(minimum),
+                "max": json_value(maximum),
+                "distinct_approx": distinct,
+                "top_values": None,
+            })
+
+        grouped = [
+            (i, c) for i, c in enumerate(columns)
+            if table_columns[i].type.tag not in UNORDERED_TYPES and top > 0 and c["non_null"]
+            and not (c["non_null"] > UNIQUE_MIN_ROWS and c["distinct_approx"] >= UNIQUE_RATIO * c["non_null"])
+        ]
+        if grouped:
+            for c in (c for _, c in grouped):
+                c["top_values"] = []
+            query = _top_query(table, [c["name"] for _, c in grouped], top)
+            for row in connection.execute_list_query(query):
+                i, c = grouped[row[0]]
+                value = row[1 + row[0]]
+                if value is not None and len(c["top_values"]) < top:
+                    c["top_values"].append({"value": json_value(value), "count": row[-2]})
+
+    return {
+        "file": os.path.basename(hyper_file_path),
+        "table": table.name.unescaped,
+        "rows": rows,
+        "columns": columns,
+        "top": top,
+        "seconds": round(time.perf_counter() - started, 3),
+        "computed": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def _read_cache(cache_path, version):
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("profiles", {}) if cache.get("version") == version else {}
+
+
+def get_profile(hyper_file_path, table_name=None, top=DEFAULT_TOP, refresh=False):
+    """
+    The profile of a table, from the cache next to the file when it was computed for the
+    file's current mtime and size (`refresh=True` recomputes). Adds `"cached": True/False`.
+    """
+    stat = os.stat(hyper_file_path)
+    version = [stat.st_mtime_ns, stat.st_size]
+    cache_path = profile_cache_path(hyper_file_path)
+    profiles = _read_cache(cache_path, version)
+    key = f"{table_name or ''}|{top}"
+
+    if key in profiles and not refresh:
+        return dict(profiles[key], cached=True)
+
+    profile = profile_table(hyper_file_path, table_name, top)
+    profiles[key] = profile
+    try:
+        # A private temp file per writer, so concurrent requests never interleave writes
+        fd, partial_path = tempfile.mkstemp(prefix=os.path.basename(cache_path), suffix=".partial",
+                                            dir=os.path.dirname(os.path.abspath(cache_path)))
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": version, "profiles": profiles}, f, default=str)
+        os.replace(partial_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  Could not cache profile next to {hyper_file_path}: {e}")
+    return dict(profile, cached=False)
+
+
+def _short(value, width=24):
+    text = "" if value is None else str(value)
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def print_profile(profile, log=print):
+    """Print a profile as one line per column plus its top values."""
+    source = "cache" if profile.get("cached") else f"{profile['seconds']:.2f}s"
+    log(f"\n📊 {profile['file']} / {profile['table']}: {profile['rows']:,} rows ({source})")
+    log(f"{'column':<24} {'type':<16} {'nulls':>10} {'distinct~':>10}  {'min':<24} {'max':<24}")
+    for c in profile["columns"]:
+        log(f"{_short(c['name']):<24} {_short(c['type'], 16):<16} {c['nulls']:>10,} "
+            f"{'' if c['distinct_approx'] is None else format(c['distinct_approx'], ','):>10}  "
+            f"{_short(c['min']):<24} {_short(c['max']):<24}")
+        if c["top_values"]:
+            log("    top: " + ", ".join(f"{_short(t['value'])} ({t['count']:,})" for t in c["top_values"]))
@@ -0,0 +1,328 @@
+"""
+hyper_query.py
+
+Description:
+    Translates a small JSON query spec into Hyper SQL and runs it on a pooled
+    connection, so filtering, sorting, grouping and aggregation happen inside the
+    Hyper engine and callers only iterate the rows they asked for.
+
+    Every identifier is checked against the table definition and quoted with
+    `Name`/`TableName`; every value is rendered as a literal (`escape_string_literal`
+    for strings), so nothing from the spec is pasted into the SQL text. Numbers and
+    booleans compared with a text column are rendered as text ("Code = 7" matches '7'),
+    and a query Hyper still rejects (e.g. "Capacity = abc") is a QueryError.
+
+Spec:
+    {
+      "table": "Building",                       # optional when the file has one table
+      "columns": ["Region", "Name"],             # projection (default: all, or group_by + aggregates)
+      "filters": [                               # ANDed together
+        {"column": "Capacity", "op": ">=", "value": 100},
+        {"column": "Region", "op": "in", "value": ["East", "West"]},
+        {"column": "Notes", "op": "is_null"}
+      ],
+      "group_by": ["Region"],
+      "aggregates": [{"fn": "sum", "column": "Capacity", "as": "Total"}, {"fn": "count"}],
+      "order_by": [{"column": "Total", "direction": "desc"}],   # or "-Total"
+      "limit": 100,
+      "offset": 0
+    }
+
+    Filter ops: =, !=, <, <=, >, >=, in, not_in, like, contains, starts_with, is_null, not_null.
+
+    Filters can also be written as strings (`parse_filter`), as the CLI and query args do:
+        "Capacity >= 100"   "Region in East,West"   "Name contains tower"   "Notes is_null"
+    Values that read as JSON numbers, true/false or null are typed; quote a value
+    ("Code = \"007\"") to keep it a string.
+    Aggregates: count, count_distinct, sum, avg, min, max.
+
+Functions:
+    - build_query(spec, table_def): SQL for a spec against a TableDefinition; raises QueryError.
+    - parse_filter(text): A filter dict from a string like "Capacity >= 100".
+    - query_rows(hyper_file_path, spec, timeout=None): Context manager yielding (column names, row cursor).
+    - json_value(value): A Hyper result value as a JSON-serializable value.
+
+Requires:
+    - tableauhyperapi
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import contextlib
+import datetime
+import decimal
+import json
+import math
+import re
+
+from tableauhyperapi import Name, TableName, Date, Timestamp, Interval, TypeTag, HyperException, escape_string_literal
+
+from airtable_to_tableau.libs.hyper_process import hyper_connection
+
+SCHEMA_NAME = "Extract"
+COMPARISONS = {"=": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+FILTER_PATTERNS = (
+    re.compile(r"^\s*(?P<column>.+?)\s+(?P<op>is_null|not_null)\s*$", re.IGNORECASE),
+    re.compile(r"^\s*(?P<column>.+?)\s+(?P<op>not_in|in|like|contains|starts_with)\s+(?P<value>.*?)\s*$", re.IGNORECASE),
+    re.compile(r"^\s*(?P<column>.+?)\s*(?P<op>>=|<=|!=|=|<|>)\s*(?P<value>.*?)\s*$"),
+)
+TEXT_TYPE_TAGS = {TypeTag.TEXT, TypeTag.VARCHAR, TypeTag.CHAR}
+AGGREGATES = {
+    "count": "COUNT({})",
+    "count_distinct": "COUNT(DISTINCT {})",
+    "sum": "SUM({})",
+    "avg": "AVG({})",
+    "min": "MIN({})",
+    "max": "MAX({})",
+}
+
+
+class QueryError(ValueError):
+    """A query spec that can't be translated (unknown column, op, bad value...)."""
+
+
+def literal(value):
+    """Render a Python value as a SQL literal."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise QueryError(f"Unsupported number: {value}")
+        return repr(value)
+    if isinstance(value, str):
+        return escape_string_literal(value)
+    raise QueryError(f"Unsupported filter value: {value!r}")
+
+
+def _like_pattern(value, prefix="%", suffix="%"):
+    if not isinstance(value, str):
+        raise QueryError("contains/starts_with need a string value")
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escape_string_literal(f"{prefix}{escaped}{suffix}")
+
+
+def _as_list(value, key):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list):
+        raise QueryError(f"'{key}' must be a list")
+    return value
+
+
+class _Columns:
+    def __init__(self, table_def):
+        self.names = [column.name.unescaped for column in table_def.columns]
+        self.text = {column.name.unescaped for column in table_def.columns if column.type.tag in TEXT_TYPE_TAGS}
+
+    def __call__(self, name):
+        if name not in self.names:
+            raise QueryError(f"Unknown column: {name}")
+        return str(Name(name))
+
+
+def _as_text(value):
+    if isinstance(value, list):
+        return [_as_text(v) for v in value]
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _condition(spec, column):
+    if not isinstance(spec, dict) or "column" not in spec:
+        raise QueryError("Each filter needs a 'column'")
+    target = column(spec["column"])
+    op = str(spec.get("op", "=")).lower()
+    value = spec.get("value")
+    if spec["column"] in column.text:
+        # "Code = 7" parses 7 as a number; Hyper won't compare it with text
+        value = _as_text(value)
+    if op in COMPARISONS:
+        if value is None:
+            raise QueryError(f"Filter '{op}' on {spec['column']} needs a value (use is_null/not_null)")
+        return f"{target} {COMPARISONS[op]} {literal(value)}"
+    if op in ("in", "not_in"):
+        values = _as_list(value, "value")
+        if not values:
+            return "FALSE" if op == "in" else "TRUE"
+        keyword = "IN" if op == "in" else "NOT IN"
+        return f"{target} {keyword} ({', '.join(literal(v) for v in values)})"
+    if op == "like":
+        return f"{target} LIKE {literal(value)}"
+    if op == "contains":
+        return f"{target} LIKE {_like_pattern(value)}"
+    if op == "starts_with":
+        return f"{target} LIKE {_like_pattern(value, prefix='')}"
+    if op == "is_null":
+        return f"{target} IS NULL"
+    if op == "not_null":
+        return f"{target} IS NOT NULL"
+    raise QueryError(f"Unknown filter op: {op}")
+
+
+def _typed(text):
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return text
+    return value if value is None or isinstance(value, (str, bool, int, float)) else text
+
+
+def parse_filter(text):
+    """A filter dict from "<column> <op> [value]", e.g. "Capacity >= 100" or "Region in East,West"."""
+    if isinstance(text, dict):
+        return text
+    for pattern in FILTER_PATTERNS:
+        match = pattern.match(str(text))
+        if match:
+            spec = {"column": match.group("column"), "op": match.group("op").lower()}
+            if "value" in pattern.groupindex:
+                value = match.group("value")
+                if spec["op"] in ("in", "not_in"):
+                    spec["value"] = [_typed(v.strip()) for v in value.split(",") if v.strip()]
+                elif spec["op"] in ("like", "contains", "starts_with"):
+                    spec["value"] = value[1:-1] if len(value) > 1 and value[0] == value[-1] == '"' else value
+                else:
+                    spec["value"] = _typed(value)
+            return spec
+    raise QueryError(f"Can't parse filter: {text!r} (expected e.g. \"Capacity >= 100\")")
+
+
+def _aggregate(spec, column):
+    if isinstance(spec, str):
+        spec = {"fn": spec}
+    fn = str(spec.get("fn", "")).lower()
+    if fn not in AGGREGATES:
+        raise QueryError(f"Unknown aggregate: {fn} (expected one of: {', '.join(AGGREGATES)})")
+    if spec.get("column") is None:
+        if fn != "count":
+            raise QueryError(f"Aggregate '{fn}' needs a column")
+        expression, default_alias = "COUNT(*)", "count"
+    else:
+        expression = AGGREGATES[fn].format(column(spec["column"]))
+        default_alias = f"{fn}_{spec['column']}"
+    alias = spec.get("as") or default_alias
+    return f"{expression} AS {Name(alias)}", alias
+
+
+def _order(spec):
+    if isinstance(spec, str):
+        descending = spec.startswith("-")
+        return spec.lstrip("-+"), descending
+    if not isinstance(spec, dict) or "column" not in spec:
+        raise QueryError("Each order_by entry needs a 'column'")
+    direction = str(spec.get("direction", "asc")).lower()
+    if direction not in ("asc", "desc"):
+        raise QueryError(f"Unknown sort direction: {direction}")
+    return spec["column"], direction == "desc"
+
+
+def _count(value, key):
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise QueryError(f"'{key}' must be an integer")
+    if value < 0:
+        raise QueryError(f"'{key}' must not be negative")
+    return value
+
+
+def build_query(spec, table_def):
+    """Translate a query spec (see module docstring) into SQL against `table_def`."""
+    if not isinstance(spec, dict):
+        raise QueryError("The query must be a JSON object")
+    column = _Columns(table_def)
+
+    group_by = _as_list(spec.get("group_by"), "group_by")
+    aggregates = [_aggregate(a, column) for a in _as_list(spec.get("aggregates"), "aggregates")]
+    columns = _as_list(spec.get("columns"), "columns")
+    if (group_by or aggregates) and columns:
+        missing = [c for c in columns if c not in group_by]
+        if missing:
+            raise QueryError(f"Columns must be in group_by when aggregating: {', '.join(missing)}")
+    if not columns:
+        columns = group_by if (group_by or aggregates) else []
+
+    select = [column(c) for c in columns] + [expression for expression, _ in aggregates]
+    sql = f"SELECT {', '.join(select) or '*'} FROM {table_def.table_name}"
+
+    conditions = [_condition(f, column) for f in _as_list(spec.get("filters"), "filters")]
+    if conditions:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+    if group_by:
+        sql += " GROUP BY " + ", ".join(column(c) for c in group_by)
+
+    aliases = {alias for _, alias in aggregates}
+    order = []
+    for entry in _as_list(spec.get("order_by"), "order_by"):
+        name, descending = _order(entry)
+        target = str(Name(name)) if name in aliases else column(name)
+        order.append(f"{target} {'DESC' if descending else 'ASC'}")
+    if order:
+        sql += " ORDER BY " + ", ".join(order)
+
+    limit = _count(spec.get("limit"), "limit")
+    offset = _count(spec.get("offset"), "offset")
+    if limit is not None:
+        sql += f" LIMIT {limit}"
+    if offset:
+        sql += f" OFFSET {offset}"
+    return sql
+
+
+def _table_name(connection, spec):
+    table = spec.get("table")
+    if table:
+        return TableName(SCHEMA_NAME, table)
+    tables = connection.catalog.get_table_names(SCHEMA_NAME)
+    if len(tables) != 1:
+        raise QueryError(f"The file has {len(tables)} tables; pass 'table'")
+    return tables[0]
+
+
+@contextlib.contextmanager
+def query_rows(hyper_file_path, spec, timeout=None):
+    """
+    Run a query spec against a .hyper file and yield `(column_names, rows)`, where `rows`
+    is the open Hyper result cursor: rows are fetched in chunks while it is iterated,
+    so large results are never held in memory. Raises QueryError for bad specs (and
+    queries Hyper rejects), PoolExhausted when no connection frees up within `timeout`.
+    """
+    with hyper_connection(hyper_file_path, timeout=timeout) as connection:
+        table = _table_name(connection, spec)
+        if not connection.catalog.has_table(table):
+            raise QueryError(f"Table not found: {table.name.unescaped}")
+        sql = build_query(spec, connection.catalog.get_table_definition(table))
+        try:
+            result = connection.execute_query(sql)
+        except HyperException as e:
+            raise QueryError(f"Hyper rejected the query: {e.main_message}") from e
+        with result:
+            yield [column.name.unescaped for column in result.schema.columns], result
+
+
+def json_value(value):
+    """Hyper values as JSON values: dates/timestamps as ISO strings, NUMERIC as exact strings."""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, Timestamp):
+        return value.to_datetime().isoformat()
+    if isinstance(value, Date):
+        return value.to_date().isoformat()
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Interval):
+        return {"months": value.months, "days": value.days, "microseconds": value.microseconds}
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
@@ -0,0 +1,152 @@
+"""
+hyper_schema.py
+
+Description:
+    Derives typed Hyper column definitions from Airtable field metadata so dates,
+    timestamps, money and counts land in the extract as DATE / TIMESTAMP_TZ /
+    NUMERIC(p,s) / DOUBLE / BIG INT / BOOL columns instead of TEXT. Tableau can then filter
+    and aggregate them natively, and the extract is smaller.
+
+    Column type resolution, per output column:
+        1. "hyper_type" in the column config (e.g. "numeric(12,2)", "date", "text")
+        2. "format" in the column config → text (the values are formatted strings)
+        3. The Airtable field type from the metadata API (see AIRTABLE_HYPER_TYPES)
+        4. "type": "int" / "bool" / "float" / "str" in the column config → big_int / bool / double / text
+        5. Otherwise inferred from the DataFrame dtype (export_hyper.infer_sqltype)
+
+    The generic "type" comes after the metadata because generated configs always set
+    it (e.g. "float" for currency, "str" for dates); only "hyper_type" pins a type.
+
+Functions:
+    - parse_hyper_type(spec): SqlType for a type name such as "numeric(18,2)".
+    - hyper_type_for_field(field): Hyper type name for an Airtable field, or None.
+    - build_hyper_schema(column_config, schema_fields=None): {output column: SqlType}.
+    - field_types(schema_fields): {field name: Airtable type}.
+    - output_columns(column_config, schema_fields=None, column_order=None): Every output column, or None.
+
+Requires:
+    - tableauhyperapi
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import re
+
+from tableauhyperapi import SqlType
+
+from airtable_to_tableau.libs.transform_utils import compile_transform_plan
+
+# Largest NUMERIC precision that is stored as a 64-bit integer by Hyper
+DEFAULT_NUMERIC_PRECISION = 18
+
+AIRTABLE_HYPER_TYPES = {
+    "checkbox": "bool",
+    "count": "big_int",
+    "autoNumber": "big_int",
+    "rating": "big_int",
+    "duration": "double",
+    "date": "date",
+    "dateTime": "timestamp_tz",
+    "createdTime": "timestamp_tz",
+    "lastModifiedTime": "timestamp_tz",
+}
+
+_SIMPLE_TYPES = {
+    "text": SqlType.text,
+    "str": SqlType.text,
+    "bool": SqlType.bool,
+    "big_int": SqlType.big_int,
+    "int": SqlType.int,
+    "small_int": SqlType.small_int,
+    "double": SqlType.double,
+    "float": SqlType.double,
+    "date": SqlType.date,
+    "timestamp": SqlType.timestamp,
+    "timestamp_tz": SqlType.timestamp_tz,
+}
+
+_NUMERIC_PATTERN = re.compile(r"^numeric\s*\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)$")
+
+# Hyper types of the column config "type" values, for columns the metadata doesn't type
+_CONFIG_TYPES = {"int": "big_int", "bool": "bool", "float": "double", "str": "text"}
+
+
+def parse_hyper_type(spec):
+    """Return the SqlType for a type name ("date", "big_int", "numeric(18,2)", ...)."""
+    name = str(spec).strip().lower()
+    if name in _SIMPLE_TYPES:
+        return _SIMPLE_TYPES[name]()
+    match = _NUMERIC_PATTERN.match(name)
+    if match:
+        return SqlType.numeric(int(match.group(1)), int(match.group(2) or 0))
+    raise ValueError(f"Unknown hyper_type '{spec}'")
+
+
+def _numeric(scale):
+    # Airtable precision only controls display: a "0 decimals" number can still store 2.6
+    if scale <= 0:
+        return "double"
+    return f"numeric({DEFAULT_NUMERIC_PRECISION},{min(scale, DEFAULT_NUMERIC_PRECISION)})"
+
+
+def hyper_type_for_field(field):
+    """Hyper type name for an Airtable metadata field dict, or None when it should stay inferred/text."""
+    field_type = field.get("type")
+    options = field.get("options") or {}
+
+    if field_type == "number":
+        return _numeric(int(options.get("precision", 0)))
+    if field_type == "currency":
+        return _numeric(int(options.get("precision", 2)))
+    if field_type == "percent":
+        # Percent values are fractions (0.5 = 50%), so they need two more decimals than displayed
+        return _numeric(int(options.get("precision", 0)) + 2)
+    if field_type in ("formula", "rollup") and isinstance(options.get("result"), dict):
+        return hyper_type_for_field(options["result"])
+    return AIRTABLE_HYPER_TYPES.get(field_type)
+
+
+def field_types(schema_fields):
+    return {f["name"]: f.get("type") for f in schema_fields or []}
+
+
+def output_columns(column_config, schema_fields=None, column_order=None):
+    """
+    Every output column of the table in order, resolved against the fields in the
+    metadata rather than a chunk of data, so a field that happens to be empty in the
+    first page still gets its column. None without metadata.
+    """
+    if not schema_fields:
+        return None
+    return compile_transform_plan(column_config, column_order).output_columns([f["name"] for f in schema_fields])
+
+
+def build_hyper_schema(column_config, schema_fields=None):
+    """
+    Map each output column of `column_config` to a SqlType using the resolution order
+    in the module docstring. Columns left out of the result are typed from their dtype.
+    """
+    fields_by_name = {f["name"]: f for f in schema_fields or []}
+    types = {}
+
+    for col in column_config:
+        source = col["source"]
+        if col.get("regex", False):
+            pattern = re.compile(source)
+            sources = [name for name in fields_by_name if pattern.match(name)]
+        else:
+            sources = [source]
+
+        for name in sources:
+            output = col.get("rename") or name
+            if col.get("hyper_type"):
+                types[output] = parse_hyper_type(col["hyper_type"])
+            elif col.get("format"):
+                types[output] = SqlType.text()
+            else:
+                spec = hyper_type_for_field(fields_by_name[name]) if name in fields_by_name else None
+                spec = spec or _CONFIG_TYPES.get(col.get("type"))
+                if spec:
+                    types[output] = parse_hyper_type(spec)
+
+    return types
@@ -0,0 +1,149 @@
+"""
+metadata_cache.py
+
+Description:
+    Caches Airtable base schemas from the metadata API. A base's schema is fetched
+    once and shared by every table in it, indexed by table name and table ID so
+    lookups don't rescan the schema. Entries expire after a TTL; expired entries
+    are revalidated with `If-None-Match` when Airtable returned an ETag, so an
+    unchanged schema costs a 304 instead of a full download. An optional on-disk
+    layer lets the cache survive web server restarts and separate CLI runs.
+
+Classes:
+    - MetadataCache(ttl=None, cache_dir=None): Per-base schema cache.
+
+Functions:
+    - get_metadata_cache(): Returns the process-wide cache.
+
+Environment:
+    - AIRTABLE_METADATA_TTL:       Seconds a cached schema stays fresh (default: 300).
+    - AIRTABLE_METADATA_CACHE_DIR: Directory for the on-disk layer (disabled when unset).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import json
+import os
+import threading
+import time
+
+from airtable_to_tableau.libs.airtable_client import get_client
+
+DEFAULT_TTL_SECONDS = 300
+
+
+class MetadataCache:
+    def __init__(self, ttl=None, cache_dir=None):
+        self.ttl = float(ttl if ttl is not None else os.getenv("AIRTABLE_METADATA_TTL", DEFAULT_TTL_SECONDS))
+        self.cache_dir = cache_dir if cache_dir is not None else os.getenv("AIRTABLE_METADATA_CACHE_DIR")
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._base_locks = {}
+
+    def _base_lock(self, base_id):
+        with self._lock:
+            return self._base_locks.setdefault(base_id, threading.Lock())
+
+    def _disk_path(self, base_id):
+        return os.path.join(self.cache_dir, f"{base_id}.json") if self.cache_dir else None
+
+    def _load_from_disk(self, base_id):
+        path = self._disk_path(base_id)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return _index_entry(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable metadata cache {path}: {e}")
+            return None
+
+    def _save_to_disk(self, base_id, entry):
+        path = self._disk_path(base_id)
+        if not path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        payload = {key: entry[key] for key in ("fetched_at", "etag", "tables")}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    def get_base(self, base_id, api_key=None):
+        """Return the cached schema entry for `base_id`, fetching or revalidating it if stale."""
+        entry = self._entries.get(base_id)
+        if self._fresh(entry):
+            self.hits += 1
+            return entry
+
+        with self._base_lock(base_id):
+            # Another thread may have refreshed it while we waited for the lock
+            entry = self._entries.get(base_id) or self._load_from_disk(base_id)
+            if self._fresh(entry):
+                self.hits += 1
+                self._entries[base_id] = entry
+                return entry
+
+            self.misses += 1
+            entry = self._fetch(base_id, entry, api_key)
+            self._entries[base_id] = entry
+            self._save_to_disk(base_id, entry)
+            return entry
+
+    def _fetch(self, base_id, stale_entry, api_key):
+        client = get_client(api_key)
+        headers = {}
+        if stale_entry and stale_entry.get("etag"):
+            headers["If-None-Match"] = stale_entry["etag"]
+
+        response = client.get(f"v0/meta/bases/{base_id}/tables", base_id=base_id, headers=headers)
+        if response.status_code == 304 and stale_entry:
+            stale_entry["fetched_at"] = time.time()
+            return stale_entry
+
+        return _index_entry({
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "tables": response.json().get("tables", []),
+        })
+
+    def get_table_fields(self, base_id, table_name, api_key=None):
+        """Return the field list for a table (by name or ID), or None if the base has no such table."""
+        entry = self.get_base(base_id, api_key)
+        table = entry["by_name"].get(table_name) or entry["by_id"].get(table_name)
+        return table["fields"] if table else None
+
+    def invalidate(self, base_id=None):
+        """Drop one base (or everything) from memory and disk."""
+        with self._lock:
+            base_ids = [base_id] if base_id else list(self._entries)
+            for key in base_ids:
+                self._entries.pop(key, None)
+                path = self._disk_path(key)
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+
+def _index_entry(entry):
+    tables = entry["tables"]
+    entry["by_name"] = {t["name"]: t for t in tables}
+    entry["by_id"] = {t["id"]: t for t in tables if "id" in t}
+    return entry
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_metadata_cache():
+    """Return the process-wide metadata cache, creating it from the environment on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache()
+        return _cache
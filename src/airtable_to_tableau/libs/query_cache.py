@@ -0,0 +1,142 @@
+"""
+query_cache.py
+
+Description:
+    Process-wide LRU cache of Hyper query results, shared by every web request and
+    CLI read. Entries are keyed by `(path, mtime_ns, size, table, query)`, so an
+    export that rewrites a .hyper file changes the key and old results are never
+    returned again; they are dropped as soon as the new version of the file is
+    cached, or pushed out by LRU eviction.
+
+    The cache is bounded by an approximate memory budget: DataFrames are measured
+    with `memory_usage(deep=True)`, scalars count as a few bytes. Results larger than
+    the whole budget are not cached. Cached DataFrames are returned as shallow copies
+    so callers can add or drop columns without changing the cached result.
+
+Classes / Functions:
+    - QueryCache(max_bytes=None): The cache; `get_or_load(path, table, query, loader)`.
+    - get_query_cache(): The process-wide cache.
+    - file_version(path): `(abspath, mtime_ns, size)` of a file, the invalidation key.
+
+Environment:
+    - HYPER_QUERY_CACHE_MB: Memory budget in MB (default: 64; 0 disables the cache).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_CACHE_MB = 64
+
+
+def file_version(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def result_size(value):
+    """Approximate memory held by a cached result in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    return value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+
+
+class QueryCache:
+    """Thread-safe LRU of query results bounded by `max_bytes`."""
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = float(os.getenv("HYPER_QUERY_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, _copy(self._entries[key][0])
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        size = result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            # Results for older versions of the same file can never be hit again
+            path, mtime_ns, file_size = key[:3]
+            for stale in [k for k in self._entries if k[0] == path and k[1:3] != (mtime_ns, file_size)]:
+                self._drop(stale)
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, path, table, query, loader):
+        """
+        Return the cached result of `query` on `table` in the current version of `path`,
+        or call `loader()` and cache what it returns (None results are not cached).
+        """
+        if self.max_bytes <= 0:
+            return loader()
+        key = file_version(path) + (table, query)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = loader()
+        if value is not None:
+            self.put(key, value)
+            value = _copy(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache()
+        return _cache
@@ -0,0 +1,70 @@
+"""
+rate_limiter.py
+
+Description:
+    Thread-safe token-bucket rate limiting for Airtable API calls.
+    Airtable allows 5 requests per second per base, so every request made
+    against a base draws a token from that base's shared bucket, no matter
+    which worker thread makes it.
+
+Functions:
+    - TokenBucket(rate, capacity=None): Blocking token bucket.
+    - get_base_limiter(base_id): Returns the shared bucket for an Airtable base.
+
+Environment:
+    - AIRTABLE_RATE_LIMIT: Requests per second allowed per base (default: 5).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import os
+import threading
+import time
+
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`; `acquire` blocks until a token is free."""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("❌ Rate limit must be greater than zero.")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available and consume them. Returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_base_limiter(base_id):
+    """Return the process-wide token bucket for `base_id`, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(base_id)
+        if limiter is None:
+            rate = float(os.getenv("AIRTABLE_RATE_LIMIT", DEFAULT_REQUESTS_PER_SECOND))
+            limiter = TokenBucket(rate)
+            _limiters[base_id] = limiter
+        return limiter
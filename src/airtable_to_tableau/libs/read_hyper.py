@@ -4,9 +4,27 @@ read_hyper.py
 Description:
     Utility to read Tableau Hyper files (.hyper) and return contents as a pandas DataFrame.
     Useful for validating export results or inspecting data in scripts.
+    Queries run on a pooled connection to the shared Hyper process (`hyper_process.py`).
+
+    `read_hyper_page` pushes pagination into Hyper (`LIMIT`/`OFFSET`), so showing one
+    page costs the same for a thousand-row and a multi-million-row extract.
+
+    `read_hyper_rows` / `write_hyper_rows` are the bounded read path used by
+    `airtable-export read`: the row limit, column projection and filters go into the
+    Hyper query, and the cursor is consumed lazily up to the limit, so a quick look at a
+    production extract costs the same as one at a small file.
+
+    Results (pages, counts, whole tables) are kept in the shared LRU cache of
+    `query_cache.py`, keyed by the file's path, mtime and size, so repeat reads of an
+    unchanged file don't go to Hyper and an export that rewrites the file invalidates them.
 
 Functions:
     - read_hyper_to_dataframe(hyper_file_path, table_name="Building"): Reads and returns Hyper file contents.
+    - read_hyper_page(hyper_file_path, table_name, limit, offset=0, order_by=None): One page of rows.
+    - count_hyper_rows(hyper_file_path, table_name): Row count of a table.
+    - read_hyper_rows(hyper_file_path, table_name=None, limit=5, columns=None, where=None): At most `limit` rows as a DataFrame.
+    - write_hyper_rows(out, hyper_file_path, table_name=None, limit=5, columns=None, where=None, fmt="csv"): Same rows written as CSV/NDJSON.
+    - get_hyper_table_columns(hyper_file_path, table_name): Column names of a table, or None if it doesn't exist.
 
 Usage:
     Used via CLI or programmatically to inspect exported Hyper tables.
@@ -19,25 +37,108 @@ Requires:
 Author: Jaimie Garner
 Date: 2025-06-06
 """
-from tableauhyperapi import HyperProcess, Connection, Telemetry, TableName, HyperException
+from tableauhyperapi import TableName, Name, HyperException
 import pandas as pd
+import itertools
 import os
 
-def read_hyper_to_dataframe(hyper_file_path, table_name="Building"):
-    if not os.path.exists(hyper_file_path):
-        print(f"❌ File not found: {hyper_file_path}")
-        return None
+from airtable_to_tableau.libs.hyper_process import hyper_connection
+from airtable_to_tableau.libs.query_cache import get_query_cache
+from airtable_to_tableau.libs.hyper_query import query_rows, parse_filter
+from airtable_to_tableau.libs.hyper_dump import dump_chunks
+
+DEFAULT_READ_LIMIT = 5
+
 
+def _run_query(hyper_file_path, table_name, query, scalar=False):
     try:
-        with HyperProcess(telemetry=Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU) as hyper:
-            with Connection(endpoint=hyper.endpoint, database=hyper_file_path) as connection:
-                query = f"SELECT * FROM {TableName('Extract', table_name)}"
-                result = connection.execute_query(query)
+        with hyper_connection(hyper_file_path) as connection:
+            if scalar:
+                return connection.execute_scalar_query(query)
+            with connection.execute_query(query) as result:
                 rows = list(result)
                 column_names = [col.name.unescaped for col in result.schema.columns]
-                return pd.DataFrame(rows, columns=column_names)
+            return pd.DataFrame(rows, columns=column_names)
     except HyperException as e:
         print(f"❌ Table not found or query failed: {table_name}")
         print(f"📄 Hyper API error: {e.message}")
         return None
 
+
+def _cached_query(hyper_file_path, table_name, query, scalar=False):
+    if not os.path.exists(hyper_file_path):
+        print(f"❌ File not found: {hyper_file_path}")
+        return None
+
+    return get_query_cache().get_or_load(
+        hyper_file_path, table_name, query, lambda: _run_query(hyper_file_path, table_name, query, scalar)
+    )
+
+
+def read_hyper_to_dataframe(hyper_file_path, table_name="Building"):
+    return _cached_query(hyper_file_path, table_name, f"SELECT * FROM {TableName('Extract', table_name)}")
+
+
+def read_hyper_page(hyper_file_path, table_name, limit, offset=0, order_by=None):
+    """
+    Rows `offset` to `offset + limit` of a table as a DataFrame (None on error).
+    `order_by` (a column name or list of them) gives pages a stable order; without
+    it rows come back in the table's physical order.
+    """
+    query = f"SELECT * FROM {TableName('Extract', table_name)}"
+    if order_by:
+        columns = [order_by] if isinstance(order_by, str) else order_by
+        query += " ORDER BY " + ", ".join(str(Name(column)) for column in columns)
+    query += f" LIMIT {max(0, int(limit))} OFFSET {max(0, int(offset))}"
+    return _cached_query(hyper_file_path, table_name, query)
+
+
+def count_hyper_rows(hyper_file_path, table_name):
+    """`COUNT(*)` of a table, or None on error."""
+    query = f"SELECT COUNT(*) FROM {TableName('Extract', table_name)}"
+    return _cached_query(hyper_file_path, table_name, query, scalar=True)
+
+
+def _read_spec(table_name, limit, columns, where):
+    spec = {"filters": [parse_filter(w) for w in ([where] if isinstance(where, (str, dict)) else where or [])]}
+    if table_name:
+        spec["table"] = table_name
+    if columns:
+        spec["columns"] = [columns] if isinstance(columns, str) else list(columns)
+    if limit is not None:
+        spec["limit"] = limit
+    return spec
+
+
+def read_hyper_rows(hyper_file_path, table_name=None, limit=DEFAULT_READ_LIMIT, columns=None, where=None):
+    """
+    At most `limit` rows (None: all) of `columns` matching `where` as a DataFrame. `where` is a
+    filter string such as "Capacity >= 100" or a list of them (see `hyper_query.parse_filter`).
+    Raises FileNotFoundError, QueryError or HyperException.
+    """
+    if not os.path.exists(hyper_file_path):
+        raise FileNotFoundError(f"File not found: {hyper_file_path}")
+    with query_rows(hyper_file_path, _read_spec(table_name, limit, columns, where)) as (column_names, rows):
+        head = list(itertools.islice(rows, limit)) if limit is not None else list(rows)
+    return pd.DataFrame(head, columns=column_names)
+
+
+def write_hyper_rows(out, hyper_file_path, table_name=None, limit=DEFAULT_READ_LIMIT, columns=None, where=None, fmt="csv"):
+    """Write the rows `read_hyper_rows` selects to the binary file `out` as CSV or NDJSON, batch by batch."""
+    if not os.path.exists(hyper_file_path):
+        raise FileNotFoundError(f"File not found: {hyper_file_path}")
+    with dump_chunks(hyper_file_path, _read_spec(table_name, limit, columns, where), fmt=fmt) as chunks:
+        for chunk in chunks:
+            out.write(chunk)
+
+
+def get_hyper_table_columns(hyper_file_path, table_name):
+    if not os.path.exists(hyper_file_path):
+        return None
+
+    with hyper_connection(hyper_file_path) as connection:
+        table = TableName('Extract', table_name)
+        if not connection.catalog.has_table(table):
+            return None
+        table_def = connection.catalog.get_table_definition(table)
+        return [col.name.unescaped for col in table_def.columns]
@@ -5,10 +5,18 @@ Description:
     Provides functions to clean and normalize Pandas DataFrames prior to export.
     Ensures compatibility with Tableau Hyper file requirements.
 
+    Cleaning is done column by column with a strategy picked from the column's dtype,
+    so numeric, boolean and datetime columns stay native and are written to Hyper as
+    BIG INT / DOUBLE / BOOL / TIMESTAMP instead of TEXT. Missing values become NULL
+    in bulk (nullable Int64 / Float64 / boolean dtypes, None in object columns).
+    Only truly mixed object columns (e.g. numbers and text, or leftover lists/dicts)
+    are stringified.
+
 Key Features:
     - Converts unsupported types (lists, dicts) to strings.
-    - Replaces NaN/nulls with safe defaults.
-    - Coerces boolean, float, int types as needed.
+    - Replaces NaN/nulls with SQL NULLs.
+    - Keeps bool, int, float and datetime columns in native (nullable) dtypes.
+    - `legacy=True` restores the old behavior of stringifying every scalar cell.
 
 Author: Jaimie Garner
 Date: 2025-06-06
@@ -16,6 +24,15 @@ Date: 2025-06-06
 import pandas as pd
 import numpy as np
 
+# infer_dtype result → nullable dtype for object columns holding one scalar kind
+_OBJECT_DTYPES = {
+    "boolean": "boolean",
+    "integer": "Int64",
+    "floating": "Float64",
+    "mixed-integer-float": "Float64",
+}
+
+
 def sanitize_value(val):
     try:
         if pd.isna(val):
@@ -31,6 +48,40 @@ def sanitize_value(val):
 
     return val
 
-def sanitize_dataframe(df):
-    # Apply the function to each cell using map on each column
-    return df.apply(lambda col: col.map(sanitize_value))
+
+def _nulls_to_none(series):
+    return series.astype(object).where(series.notna(), None)
+
+
+def sanitize_series(series):
+    """Clean one column according to its dtype."""
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return series
+    if pd.api.types.is_float_dtype(dtype):
+        return series if pd.api.types.is_extension_array_dtype(dtype) else series.astype("Float64")
+    if not pd.api.types.is_object_dtype(dtype):
+        return series
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in _OBJECT_DTYPES:
+        return series.astype(_OBJECT_DTYPES[inferred])
+    if inferred in ("string", "empty", "datetime", "date"):
+        return _nulls_to_none(series)
+
+    # Truly mixed column: stringify every non-null value
+    mask = series.notna()
+    cleaned = series.astype(object).where(mask, None)
+    cleaned[mask] = series[mask].map(str)
+    return cleaned
+
+
+def sanitize_dataframe(df, legacy=False):
+    if legacy:
+        # Apply the function to each cell using map on each column
+        return df.apply(lambda col: col.map(sanitize_value))
+
+    return pd.DataFrame({name: sanitize_series(df[name]) for name in df.columns}, index=df.index)
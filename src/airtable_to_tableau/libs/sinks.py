@@ -0,0 +1,337 @@
+"""
+sinks.py
+
+Description:
+    Output targets for exported tables. A table is fetched and transformed once and
+    every transformed chunk is handed to each of its sinks, so one Airtable fetch can
+    feed a Tableau extract and a Parquet file in the same run.
+
+    Sinks are chosen per table with an "outputs" list; without one, a table writes
+    the Hyper file named by its "output_file" exactly as before:
+
+        "outputs": [
+            {"type": "hyper"},
+            {"type": "parquet", "path": "output/buildings.parquet", "compression": "zstd"}
+        ]
+
+    A hyper output without a "path" uses the table's "output_file"; a parquet output
+    without one uses "output_file" with a .parquet extension.
+
+    Every sink receives the same column types (see `hyper_schema.py`), so a column is
+    DATE in the extract and date32 in Parquet, NUMERIC(18,2) and decimal128(18,2), etc.
+    When the table's field metadata is known, sinks also receive the full column list
+    up front, so a field that is empty in the first chunk still gets its column.
+    Warnings go through the `log` callable of the export (print by default).
+    The Parquet sink buffers chunks into row groups of `row_group_size` rows. Both sinks
+    write to a ".partial" file (a staging table inside a shared extract) that only
+    replaces the target once the table has finished, so a failed run leaves every
+    output as the previous run wrote it.
+
+Classes / Functions:
+    - Sink: Base class; `write(df)` appends a chunk, `close(commit)` finishes the output.
+    - HyperSink(path, table_name, column_types=None, load_method=None, extract=None, columns=None, log=print): Tableau .hyper table.
+    - ParquetSink(path, table_name, column_types=None, compression=..., compression_level=None, row_group_size=..., columns=None, log=print): Parquet file.
+    - SinkGroup(sinks): Writes every chunk to several sinks.
+    - register_sink(kind, factory): Adds an output type.
+    - table_outputs(entry): Normalized output configs for a table entry.
+    - hyper_output_path(entry): Path of the table's Hyper output, or None.
+    - open_sinks(entry, column_types=None, extract=None, columns=None, log=print): A SinkGroup for a table entry.
+
+Requires:
+    - pandas
+    - tableauhyperapi
+    - pyarrow (optional, for parquet outputs: pip install "airtable-to-tableau[parquet]")
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import os
+
+import pandas as pd
+from tableauhyperapi import TypeTag
+
+from airtable_to_tableau.libs.export_hyper import HyperTableWriter, coerce_to_sqltype, infer_sqltype
+
+DEFAULT_PARQUET_COMPRESSION = "snappy"
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet outputs need pyarrow; install it with: pip install \"airtable-to-tableau[parquet]\""
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+def arrow_type(sql_type):
+    """The Arrow type matching a Hyper SqlType."""
+    pa, _ = _require_pyarrow()
+    tag = sql_type.tag
+    if tag == TypeTag.BOOL:
+        return pa.bool_()
+    if tag == TypeTag.BIG_INT:
+        return pa.int64()
+    if tag == TypeTag.INT:
+        return pa.int32()
+    if tag == TypeTag.SMALL_INT:
+        return pa.int16()
+    if tag == TypeTag.DOUBLE:
+        return pa.float64()
+    if tag == TypeTag.NUMERIC:
+        return pa.decimal128(sql_type.precision, sql_type.scale)
+    if tag == TypeTag.DATE:
+        return pa.date32()
+    if tag == TypeTag.TIMESTAMP:
+        return pa.timestamp("us")
+    if tag == TypeTag.TIMESTAMP_TZ:
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+class Sink:
+    """One output of a table. Chunks arrive through `write`; `close(commit=False)` abandons the output."""
+
+    def __init__(self, path, table_name, column_types=None, columns=None, log=print):
+        self.path = path
+        self.log = log
+        self.table_name = table_name
+        self.column_types = column_types or {}
+        self.columns = list(columns or [])
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+    def __str__(self):
+        return self.path
+
+    def write(self, df):
+        raise NotImplementedError
+
+    def close(self, commit=True):
+        pass
+
+
+class HyperSink(Sink):
+    """A table in a Tableau .hyper file (or in a shared `HyperExtract`), see `HyperTableWriter`."""
+
+    def __init__(self, path, table_name, column_types=None, load_method=None, extract=None, columns=None, log=print):
+        super().__init__(path, table_name, column_types, columns, log)
+        self.writer = HyperTableWriter(
+            path, table_name, column_types=column_types, method=load_method, extract=extract, columns=columns, log=log
+        )
+
+    def write(self, df):
+        self.writer.write(df)
+        self.rows_written = self.writer.rows_written
+
+    def close(self, commit=True):
+        self.writer.close(commit=commit)
+
+
+class ParquetSink(Sink):
+    """
+    A Parquet file written with pyarrow's ParquetWriter. Chunks are coerced to the
+    schema fixed by `columns` (else the first chunk) and `column_types`, and buffered
+    until a full row group of `row_group_size` rows is available.
+    """
+
+    def __init__(self, path, table_name, column_types=None, compression=DEFAULT_PARQUET_COMPRESSION,
+                 compression_level=None, row_group_size=DEFAULT_ROW_GROUP_SIZE, columns=None, log=print):
+        super().__init__(path, table_name, column_types, columns, log)
+        self._pa, self._pq = _require_pyarrow()
+        self.compression = None if str(compression).lower() == "none" else compression
+        self.compression_level = compression_level
+        self.row_group_size = max(1, int(row_group_size))
+        self.partial_path = f"{path}.partial"
+        self.sql_types = None
+        self.schema = None
+        self._writer = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def _open(self, df):
+        dtypes = dict(df.dtypes.items())
+        self.sql_types = {
+            name: self.column_types.get(name) or infer_sqltype(dtypes.get(name, object))
+            for name in self.columns + [c for c in df.columns if c not in self.columns]
+        }
+        self.schema = self._pa.schema([(str(name), arrow_type(t)) for name, t in self.sql_types.items()])
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = self._pq.ParquetWriter(
+            self.partial_path,
+            self.schema,
+            compression=self.compression,
+            compression_level=self.compression_level,
+        )
+
+    def _to_arrow(self, df):
+        columns = list(self.sql_types)
+        extra = [c for c in df.columns if c not in self.sql_types]
+        if extra:
+            self.log(f"⚠️  Dropping columns not in the Parquet schema: {', '.join(map(str, extra))}")
+        df = df.reindex(columns=columns)
+        data = {str(name): coerce_to_sqltype(df[name], sql_type) for name, sql_type in self.sql_types.items()}
+        return self._pa.Table.from_pandas(pd.DataFrame(data, index=df.index), schema=self.schema,
+                                          preserve_index=False, safe=False)
+
+    def _flush(self, final=False):
+        if not self._pending:
+            return
+        table = self._pa.concat_tables(self._pending)
+        full = len(table) if final else len(table) - len(table) % self.row_group_size
+        if full:
+            self._writer.write_table(table.slice(0, full), row_group_size=self.row_group_size)
+        rest = table.slice(full)
+        self._pending = [rest] if len(rest) else []
+        self._pending_rows = len(rest)
+
+    def write(self, df):
+        """Append a DataFrame chunk; full row groups are written as soon as they are buffered."""
+        if self._writer is None:
+            self._open(df)
+        table = self._to_arrow(df)
+        self._pending.append(table)
+        self._pending_rows += len(table)
+        self.rows_written += len(table)
+        if self._pending_rows >= self.row_group_size:
+            self._flush()
+
+    def close(self, commit=True):
+        if self._writer is None:
+            return
+        try:
+            if commit:
+                self._flush(final=True)
+        finally:
+            self._writer.close()
+            self._writer = None
+            self._pending = []
+            if commit:
+                os.replace(self.partial_path, self.path)
+            elif os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+
+
+class SinkGroup:
+    """
+    Hands each chunk to every sink of a table; closing abandons them all if any write failed.
+
+    The Hyper output is the source of truth: Hyper sinks are closed (published) first,
+    and once any close fails the remaining sinks are closed with commit=False, so
+    another output is never committed unless the extract was.
+    """
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+    def __str__(self):
+        return ", ".join(str(sink) for sink in self.sinks)
+
+    def write(self, df):
+        for sink in self.sinks:
+            sink.write(df)
+        self.rows_written += len(df)
+
+    def close(self, commit=True):
+        error = None
+        for sink in sorted(self.sinks, key=lambda sink: not isinstance(sink, HyperSink)):
+            try:
+                sink.close(commit=commit and error is None)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+
+def _hyper_sink(entry, output, column_types=None, extract=None, columns=None, log=print):
+    if extract is not None and os.path.abspath(extract.output_file) != os.path.abspath(output["path"]):
+        extract = None
+    return HyperSink(
+        output["path"],
+        entry["table_name"],
+        column_types=column_types,
+        load_method=output.get("load_method", entry.get("load_method")),
+        extract=extract,
+        columns=columns,
+        log=log,
+    )
+
+
+def _parquet_sink(entry, output, column_types=None, extract=None, columns=None, log=print):
+    return ParquetSink(
+        output["path"],
+        entry["table_name"],
+        column_types=column_types,
+        compression=output.get("compression", DEFAULT_PARQUET_COMPRESSION),
+        compression_level=output.get("compression_level"),
+        row_group_size=output.get("row_group_size", DEFAULT_ROW_GROUP_SIZE),
+        columns=columns,
+        log=log,
+    )
+
+
+SINK_TYPES = {
+    "hyper": _hyper_sink,
+    "parquet": _parquet_sink,
+}
+
+DEFAULT_EXTENSIONS = {"hyper": ".hyper", "parquet": ".parquet"}
+
+
+def register_sink(kind, factory):
+    """Register `factory(entry, output, column_types=None, extract=None, columns=None, log=print)` for outputs of type `kind`."""
+    SINK_TYPES[kind] = factory
+
+
+def table_outputs(entry):
+    """
+    The table's output configs, each with a "type" and a "path". Without an
+    "outputs" list this is the single Hyper output at "output_file".
+    """
+    output_file = entry.get("output_file")
+    outputs = []
+    for output in entry.get("outputs") or [{"type": "hyper"}]:
+        output = dict(output)
+        kind = output.setdefault("type", "hyper")
+        if kind not in SINK_TYPES:
+            raise ValueError(f"Unknown output type '{kind}' (expected one of: {', '.join(SINK_TYPES)})")
+        if not output.get("path"):
+            if not output_file:
+                raise ValueError(f"The {kind} output of '{entry.get('table_name')}' needs a 'path' or an 'output_file'")
+            stem = output_file if kind == "hyper" else os.path.splitext(output_file)[0]
+            output["path"] = stem + ("" if kind == "hyper" else DEFAULT_EXTENSIONS.get(kind, f".{kind}"))
+        outputs.append(output)
+    return outputs
+
+
+def hyper_output_path(entry):
+    """Path of the table's Hyper output, or None when it only writes other formats."""
+    for output in table_outputs(entry):
+        if output["type"] == "hyper":
+            return output["path"]
+    return None
+
+
+def open_sinks(entry, column_types=None, extract=None, columns=None, log=print):
+    """A SinkGroup with one sink per output of the table entry; warnings go through `log`."""
+    return SinkGroup(
+        SINK_TYPES[output["type"]](entry, output, column_types=column_types, extract=extract, columns=columns, log=log)
+        for output in table_outputs(entry)
+    )
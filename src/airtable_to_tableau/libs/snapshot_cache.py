@@ -0,0 +1,135 @@
+"""
+snapshot_cache.py
+
+Description:
+    Optional on-disk cache of raw Airtable pages. While a table is fetched, each
+    page is appended to a gzip-compressed JSONL snapshot keyed by base, table and
+    fetch time. Later runs can replay a snapshot through flatten → sanitize →
+    transform → export with no network calls, which makes iterating on column
+    configs for large tables cheap.
+
+    Layout: <AIRTABLE_SNAPSHOT_DIR>/<base_id>/<table>/<YYYYmmddTHHMMSSZ>.jsonl.gz
+        line 1:  {"base_id", "table_name", "fetched_at", "params", "fields"}
+        line 2+: {"records": [...]}   (one line per Airtable page)
+
+    A snapshot only becomes visible once every page has been written, so an
+    interrupted fetch never leaves a truncated snapshot behind.
+
+Functions:
+    - record_snapshot(pages, base_id, table_name, params=None, fields=None): Tee a page iterator into a new snapshot.
+    - latest_snapshot(base_id, table_name, max_age=None): Path of the newest usable snapshot, or None.
+    - iter_snapshot_pages(path): Replay a snapshot's pages.
+
+Environment:
+    - AIRTABLE_SNAPSHOT_DIR:  Snapshot root (default: snapshots).
+    - AIRTABLE_SNAPSHOT_KEEP: Snapshots kept per table (default: 3).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import datetime
+import gzip
+import json
+import os
+import re
+
+SNAPSHOT_SUFFIX = ".jsonl.gz"
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+DEFAULT_KEEP = 3
+
+
+def snapshot_root():
+    return os.getenv("AIRTABLE_SNAPSHOT_DIR", "snapshots")
+
+
+def snapshot_dir(base_id, table_name):
+    safe_table = re.sub(r"[^A-Za-z0-9._-]+", "_", table_name)
+    return os.path.join(snapshot_root(), base_id, safe_table)
+
+
+def _snapshot_time(path):
+    stamp = os.path.basename(path)[: -len(SNAPSHOT_SUFFIX)]
+    try:
+        return datetime.datetime.strptime(stamp, TIMESTAMP_FORMAT).replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return None
+
+
+def list_snapshots(base_id, table_name):
+    """Snapshot paths for a table, newest first."""
+    directory = snapshot_dir(base_id, table_name)
+    if not os.path.isdir(directory):
+        return []
+    paths = [
+        os.path.join(directory, f)
+        for f in os.listdir(directory)
+        if f.endswith(SNAPSHOT_SUFFIX) and _snapshot_time(f) is not None
+    ]
+    return sorted(paths, reverse=True)
+
+
+def latest_snapshot(base_id, table_name, max_age=None):
+    """Return the newest snapshot for a table, or None if there is none younger than `max_age` seconds."""
+    snapshots = list_snapshots(base_id, table_name)
+    if not snapshots:
+        return None
+    newest = snapshots[0]
+    if max_age is not None:
+        age = (datetime.datetime.now(datetime.timezone.utc) - _snapshot_time(newest)).total_seconds()
+        if age > max_age:
+            return None
+    return newest
+
+
+def record_snapshot(pages, base_id, table_name, params=None, fields=None):
+    """
+    Yield every page from `pages` while writing it to a new snapshot. The snapshot is
+    published when the iterator is exhausted and discarded if it is abandoned or fails.
+    `fields` (the table's metadata schema) is kept in the header so replays stay typed.
+    """
+    directory = snapshot_dir(base_id, table_name)
+    os.makedirs(directory, exist_ok=True)
+    fetched_at = datetime.datetime.now(datetime.timezone.utc)
+    path = os.path.join(directory, fetched_at.strftime(TIMESTAMP_FORMAT) + SNAPSHOT_SUFFIX)
+    partial_path = f"{path}.partial"
+
+    completed = False
+    try:
+        with gzip.open(partial_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            header = {
+                "base_id": base_id,
+                "table_name": table_name,
+                "fetched_at": fetched_at.isoformat(),
+                "params": params or {},
+                "fields": fields,
+            }
+            f.write(json.dumps(header) + "\n")
+            for page in pages:
+                f.write(json.dumps({"records": page}, separators=(",", ":")) + "\n")
+                yield page
+        os.replace(partial_path, path)
+        completed = True
+        _prune(base_id, table_name)
+    finally:
+        if not completed and os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def _prune(base_id, table_name):
+    keep = int(os.getenv("AIRTABLE_SNAPSHOT_KEEP", DEFAULT_KEEP))
+    for path in list_snapshots(base_id, table_name)[max(1, keep):]:
+        os.remove(path)
+
+
+def read_snapshot_header(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def iter_snapshot_pages(path):
+    """Yield the record pages stored in a snapshot, in fetch order."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        f.readline()  # header
+        for line in f:
+            if line.strip():
+                yield json.loads(line)["records"]
@@ -3,11 +3,19 @@ transform_utils.py
 
 Description:
     Applies column-level transformations to a pandas DataFrame based on JSON config.
-    Supports type casting, renaming, default fallback, regex-based column matching, 
+    Supports type casting, renaming, default fallback, regex-based column matching,
     formatting, and column reordering.
 
+    A column config is compiled once into a `TransformPlan` of vectorized column
+    operations (`pd.to_numeric(errors="coerce")`, nullable Int64/boolean casts, bulk
+    default filling, array string formatting). Plans are cached per config, and regex
+    sources are compiled once and resolved once per distinct set of input columns, so
+    the same plan is reused for every table chunk. Transform time scales with the
+    number of columns rather than the number of cells.
+
 Functions:
     - cast_value(val, dtype, fmt=None, default=None): Casts individual values.
+    - compile_transform_plan(column_config, column_order=None): Returns the cached TransformPlan.
     - apply_column_transformations(df, column_config, column_order=None): Transforms DataFrame.
 
 Usage:
@@ -16,10 +24,14 @@ Usage:
 Author: Jaimie Garner
 Date: 2025-06-06
 """
+import functools
+import json
 import re
 import numpy as np
 import pandas as pd
 
+TRUE_STRINGS = {"true", "yes", "y", "t", "1", "on", "checked"}
+
 
 def cast_value(val, dtype, fmt=None, default=None):
     if pd.isna(val):
@@ -33,6 +45,8 @@ def cast_value(val, dtype, fmt=None, default=None):
         if dtype == "int":
             return int(val)
         if dtype == "bool":
+            if isinstance(val, str):
+                return val.strip().lower() in TRUE_STRINGS
             return bool(val)
     except Exception:
         return default
@@ -40,46 +54,178 @@ def cast_value(val, dtype, fmt=None, default=None):
     return val
 
 
-def apply_column_transformations(df, column_config, column_order=None):
-    transformed = {}
-
-    for col in column_config:
-        source = col["source"]
-        rename = col.get("rename", source)
-        dtype = col.get("type", "str")
-        default = col.get("default", None)
-        fmt = col.get("format", None)
-        is_regex = col.get("regex", False)
-
-        matched_columns = []
-
-        if is_regex:
-            pattern = re.compile(source)
-            matched_columns = [c for c in df.columns if pattern.match(c)]
-        elif source in df.columns:
-            matched_columns = [source]
-
-        if not matched_columns:
-            transformed[rename] = default
-            continue
-
-        for colname in matched_columns:
-            series = df[colname].apply(lambda v: cast_value(v, dtype, fmt, default))
-
-            if fmt:
-                try:
-                    series = series.apply(lambda v: fmt % v if v is not None else None)
-                except Exception:
-                    pass
-
-            final_name = rename if rename else colname
-            transformed[final_name] = series
-
-    result_df = pd.DataFrame(transformed)
+def _fill_default(series, default):
+    if default is None:
+        return series
+    try:
+        return series.fillna(default)
+    except (TypeError, ValueError):
+        # Default doesn't fit the column's dtype (e.g. "N/A" for a float column)
+        return series.astype(object).where(series.notna(), default)
+
+
+def _cast_str(series):
+    values = series.to_numpy(dtype=object, copy=True)
+    missing = pd.isna(values)
+    if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+        present = ~missing
+        values[present] = values[present].astype(str)
+    values[missing] = None
+    return pd.Series(values, index=series.index, dtype=object)
+
+
+def _cast_float(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        series = series.astype("Float64")
+    return pd.to_numeric(series, errors="coerce").astype("Float64")
+
+
+def _cast_int(series):
+    numbers = _cast_float(series)
+    return np.trunc(numbers).astype("Int64")
+
+
+def _cast_bool(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype("boolean")
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return (series != 0).astype("boolean").where(series.notna(), pd.NA)
+
+    mask = series.notna()
+    out = pd.Series(pd.NA, index=series.index, dtype="boolean")
+    values = series[mask]
+    is_bool = values.map(lambda v: isinstance(v, (bool, np.bool_)))
+    out[values.index[is_bool]] = values[is_bool].astype(bool)
+    text = values[~is_bool].astype(str).str.strip().str.lower()
+    numeric = pd.to_numeric(text, errors="coerce")
+    out[text.index] = text.isin(TRUE_STRINGS) | (numeric.notna() & (numeric != 0))
+    return out
+
+
+def _cast_date(series):
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        parsed = series
+    else:
+        parsed = pd.to_datetime(series, errors="coerce", utc=True, format="mixed")
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert(None)
+    return parsed
+
+
+_CASTS = {
+    "str": _cast_str,
+    "float": _cast_float,
+    "int": _cast_int,
+    "bool": _cast_bool,
+    "date": _cast_date,
+}
+
+
+def _format_series(series, fmt):
+    """Apply a printf-style format to every non-null value; leave the column as-is if it fails."""
+    mask = series.notna()
+    if not mask.any():
+        return series
+    values = series[mask]
+    try:
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            formatted = np.char.mod(fmt, values.to_numpy(dtype=values.dtype.numpy_dtype)).tolist()
+        else:
+            formatted = [fmt % v for v in values.to_numpy(dtype=object)]
+    except Exception:
+        return series
+    out = series.astype(object).where(mask, None)
+    out[mask] = formatted
+    return out
+
+
+class ColumnRule:
+    """One compiled entry of a column config."""
+
+    def __init__(self, col):
+        self.source = col["source"]
+        self.rename = col.get("rename")
+        self.dtype = col.get("type", "str")
+        self.default = col.get("default", None)
+        self.fmt = col.get("format", None)
+        self.pattern = re.compile(self.source) if col.get("regex", False) else None
+
+    def matches(self, columns):
+        if self.pattern is not None:
+            return [c for c in columns if self.pattern.match(c)]
+        return [self.source] if self.source in columns else []
+
+    def apply(self, series):
+        cast = _CASTS.get(self.dtype)
+        if cast is not None:
+            series = cast(series)
+        series = _fill_default(series, self.default)
+        if self.fmt:
+            series = _format_series(series, self.fmt)
+        return series
+
+
+class TransformPlan:
+    """A column config compiled into vectorized per-column operations."""
+
+    def __init__(self, column_config, column_order=None):
+        self.rules = [ColumnRule(col) for col in column_config]
+        self.column_order = list(column_order) if column_order else None
+        self._resolved = {}
+
+    def resolve(self, columns):
+        """[(rule, source column or None, output name)] for a set of input columns, cached."""
+        key = tuple(columns)
+        steps = self._resolved.get(key)
+        if steps is None:
+            steps = []
+            for rule in self.rules:
+                matched = rule.matches(key)
+                if not matched:
+                    # A regex that matches nothing only yields a column when it is renamed
+                    if rule.rename or rule.pattern is None:
+                        steps.append((rule, None, rule.rename or rule.source))
+                    continue
+                for colname in matched:
+                    steps.append((rule, colname, rule.rename if rule.rename else colname))
+            self._resolved[key] = steps
+        return steps
+
+    def output_columns(self, columns):
+        """Names of the columns `apply` produces from a frame with `columns`, in order."""
+        names = list(dict.fromkeys(final_name for _, _, final_name in self.resolve(columns)))
+        if self.column_order:
+            ordered_cols = [col for col in self.column_order if col in names]
+            return ordered_cols + [col for col in names if col not in ordered_cols]
+        return names
+
+    def apply(self, df):
+        transformed = {}
+        for rule, colname, final_name in self.resolve(df.columns):
+            if colname is None:
+                transformed[final_name] = pd.Series(rule.default, index=df.index, dtype=object)
+            else:
+                transformed[final_name] = rule.apply(df[colname])
+
+        result_df = pd.DataFrame(transformed, index=df.index)
+
+        if self.column_order:
+            return result_df[self.output_columns(df.columns)]
+
+        return result_df
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_cached(key):
+    column_config, column_order = json.loads(key)
+    return TransformPlan(column_config, column_order)
+
+
+def compile_transform_plan(column_config, column_order=None):
+    """Return the TransformPlan for a column config, compiling it only the first time it is seen."""
+    key = json.dumps([column_config, column_order], sort_keys=True, default=str)
+    return _compile_cached(key)
 
-    if column_order:
-        ordered_cols = [col for col in column_order if col in result_df.columns]
-        other_cols = [col for col in result_df.columns if col not in ordered_cols]
-        return result_df[ordered_cols + other_cols]
 
-    return result_df
+def apply_column_transformations(df, column_config, column_order=None):
+    return compile_transform_plan(column_config, column_order).apply(df)
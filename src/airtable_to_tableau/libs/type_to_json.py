@@ -3,9 +3,16 @@ def airtable_type_to_json_type(airtable_type):
     mapping = {
         "singleLineText": "str",
         "multilineText": "str",
+        "richText": "str",
         "number": "float",
+        "currency": "float",
+        "percent": "float",
+        "duration": "float",
+        "rating": "int",
+        "autoNumber": "int",
         "checkbox": "bool",
-        "date": "str",
+        "date": "date",
+        "dateTime": "date",
         "email": "str",
         "url": "str",
         "phoneNumber": "str",
@@ -15,8 +22,8 @@ def airtable_type_to_json_type(airtable_type):
         "rollup": "str",
         "lookup": "str",
         "count": "int",
-        "createdTime": "str",
-        "lastModifiedTime": "str",
+        "createdTime": "date",
+        "lastModifiedTime": "date",
         # Add more mappings as needed
     }
-    return mapping.get(airtable_type, "str")
\ No newline at end of file
+    return mapping.get(airtable_type, "str")
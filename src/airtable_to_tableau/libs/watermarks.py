@@ -0,0 +1,71 @@
+"""
+watermarks.py
+
+Description:
+    Stores the incremental-export high-water mark for each table written to an
+    output file. State lives in a JSON sidecar next to the output
+    (`output/buildings.hyper.state.json`) so it travels with the extract and is
+    reset automatically when the extract is deleted.
+
+Functions:
+    - state_path(output_file): Path of the sidecar for an output file.
+    - load_watermark(output_file, table_name): Returns the stored watermark or None.
+    - save_watermark(output_file, table_name, watermark, **extra): Records a new watermark.
+    - format_watermark(dt): Formats a datetime as the UTC ISO string stored in state.
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import datetime
+import json
+import os
+import threading
+
+_state_lock = threading.Lock()
+
+
+def state_path(output_file):
+    return f"{output_file}.state.json"
+
+
+def format_watermark(dt):
+    dt = dt.astimezone(datetime.timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _read_state(output_file):
+    path = state_path(output_file)
+    if not os.path.exists(path):
+        return {"tables": {}}
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Ignoring unreadable watermark state {path}: {e}")
+        return {"tables": {}}
+    state.setdefault("tables", {})
+    return state
+
+
+def load_watermark(output_file, table_name):
+    """Return the stored watermark string for `table_name`, or None if there is none."""
+    if not os.path.exists(output_file):
+        return None
+    with _state_lock:
+        return _read_state(output_file)["tables"].get(table_name, {}).get("watermark")
+
+
+def save_watermark(output_file, table_name, watermark, **extra):
+    """Persist `watermark` (a datetime or ISO string) for `table_name`."""
+    if isinstance(watermark, datetime.datetime):
+        watermark = format_watermark(watermark)
+    with _state_lock:
+        state = _read_state(output_file)
+        entry = {"watermark": watermark}
+        entry.update(extra)
+        state["tables"][table_name] = entry
+        path = state_path(output_file)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,217 @@
+"""
+jobs.py
+
+Description:
+    In-process export jobs for the web app. Clicking "run" used to spawn a new
+    `airtable-export` subprocess per request, paying the pandas/tableauhyperapi import
+    cost every time, with no limit on concurrent runs and nothing stopping two users
+    from writing the same .hyper file at once.
+
+    Jobs now run `run_exports` on a bounded pool of worker threads inside the web
+    process, reusing its warm imports, the shared Airtable HTTP client and the shared
+    Hyper process. A request for a config/profile that already has a queued or running
+    job is coalesced into that job. Every job keeps its log lines and per-table
+    progress, which clients read through the status endpoint or follow as
+    server-sent events.
+
+Classes / Functions:
+    - ExportJob: One run of a config profile: status, log lines, progress, results.
+    - JobManager(workers=None): Worker pool, coalescing and job history.
+    - get_job_manager(): The app-wide manager.
+
+Environment:
+    - EXPORT_WORKERS:    Concurrent export jobs (default: 2).
+    - EXPORT_TABLE_JOBS: Tables exported concurrently within one job (default: 4).
+
+Author: Jaimie Garner
+Date: 2025-06-06
+"""
+import datetime
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from airtable_to_tableau.libs.config_utils import load_config
+from airtable_to_tableau.libs.export_runner import run_exports, print_summary
+
+DEFAULT_WORKERS = 2
+DEFAULT_TABLE_JOBS = 4
+# Finished jobs kept for status lookups
+MAX_FINISHED_JOBS = 50
+ACTIVE_STATES = ("queued", "running")
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+class ExportJob:
+    """A queued, running or finished export of one config profile."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, config_path, profile):
+        self.id = str(next(self._ids))
+        self.config_path = config_path
+        self.config_file = os.path.basename(config_path)
+        self.profile = profile
+        self.status = "queued"
+        self.error = None
+        self.created = _now()
+        self.started = None
+        self.finished = None
+        self.tables_total = 0
+        self.tables_done = 0
+        self.results = []
+        self.lines = []
+        self._changed = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status not in ACTIVE_STATES
+
+    def log(self, *args, sep=" ", end="\n", **_):
+        """print-compatible logger passed to the export pipeline."""
+        message = sep.join(str(arg) for arg in args) + end
+        with self._changed:
+            self.lines.extend(message.rstrip("\n").split("\n"))
+            self._changed.notify_all()
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def table_finished(self, result):
+        with self._changed:
+            self.tables_done += 1
+            self._changed.notify_all()
+
+    def to_dict(self, since=0):
+        with self._changed:
+            return {
+                "id": self.id,
+                "config": self.config_file,
+                "profile": self.profile,
+                "status": self.status,
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "progress": {"tables_done": self.tables_done, "tables_total": self.tables_total},
+                "results": [
+                    {key: r[key] for key in ("table_name", "status", "rows", "seconds", "error")}
+                    for r in self.results
+                ],
+                "line_count": len(self.lines),
+                "lines": self.lines[since:],
+            }
+
+    def follow(self, since=0, keepalive=15.0):
+        """
+        Yield `(index, line)` for every log line from `since` on, waiting for new ones until
+        the job is done. Yields `(None, None)` after `keepalive` seconds without output.
+        """
+        index = since
+        while True:
+            with self._changed:
+                if index >= len(self.lines) and not self.done:
+                    self._changed.wait(keepalive)
+                lines = self.lines[index:]
+                done = self.done
+            if not lines and not done:
+                yield None, None
+            for line in lines:
+                yield index, line
+                index += 1
+            if done and index >= len(self.lines):
+                return
+
+
+class JobManager:
+    """Runs export jobs on a bounded thread pool, one active job per config/profile."""
+
+    def __init__(self, workers=None, table_jobs=None):
+        self.workers = int(workers or os.getenv("EXPORT_WORKERS", DEFAULT_WORKERS))
+        self.table_jobs = int(table_jobs or os.getenv("EXPORT_TABLE_JOBS", DEFAULT_TABLE_JOBS))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._active = {}
+
+    def submit(self, config_path, profile="default"):
+        """Queue an export, or return the queued/running job for the same config and profile. Returns (job, created)."""
+        key = (os.path.abspath(config_path), profile)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None and not job.done:
+                return job, False
+            job = ExportJob(config_path, profile)
+            self._active[key] = job
+            self._jobs[job.id] = job
+            self._trim()
+        job.log(f"▶️ Queued export for `{job.config_file}` using profile `{profile}`...")
+        self._pool.submit(self._run, key, job)
+        return job, True
+
+    def _trim(self):
+        # Caller holds self._lock
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, key, job):
+        job._update(status="running", started=_now())
+        started = time.perf_counter()
+        status, error, results = "failed", None, []
+        try:
+            config = load_config(job.config_path, profile_name=job.profile)
+            tables = config.get("tables", [])
+            api_key = os.getenv("AIRTABLE_API_KEY")
+            if not api_key:
+                raise RuntimeError("Missing AIRTABLE_API_KEY in environment.")
+            job._update(tables_total=len(tables))
+            results = run_exports(tables, api_key, jobs=self.table_jobs, log=job.log, progress=job.table_finished)
+            print_summary(results, elapsed=time.perf_counter() - started, log=job.log)
+            failed = [r["table_name"] for r in results if r["status"] == "failed"]
+            if failed:
+                error = f"failed tables: {', '.join(failed)}"
+                job.log(f"\n❌ Export finished with {error}")
+            else:
+                status = "succeeded"
+                job.log("\n✅ All exports completed.")
+        except Exception as e:
+            error = str(e)
+            job.log(f"❌ Export failed: {e}")
+        finally:
+            with self._lock:
+                if self._active.get(key) is job:
+                    del self._active[key]
+            job._update(status=status, error=error, results=results, finished=_now())
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
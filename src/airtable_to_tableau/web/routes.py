@@ -1,14 +1,20 @@
 import os
 import json
 import re
-import subprocess
-from flask import Blueprint, Response, stream_with_context, render_template, send_from_directory, request, redirect, url_for, flash
-
-from airtable_to_tableau.libs.read_hyper import read_hyper_to_dataframe
-from airtable_to_tableau.libs.table_name import get_table_name_for_file
+import contextlib
+from flask import Blueprint, Response, stream_with_context, render_template, send_from_directory, request, redirect, url_for, flash, jsonify
+from tableauhyperapi import HyperException
+
+from airtable_to_tableau.libs.read_hyper import read_hyper_page, count_hyper_rows
+from airtable_to_tableau.libs.query_cache import get_query_cache
+from airtable_to_tableau.libs.hyper_query import query_rows, json_value, parse_filter, QueryError
+from airtable_to_tableau.libs.hyper_dump import dump_chunks, FORMATS, EXTENSIONS, MIMETYPES
+from airtable_to_tableau.libs.hyper_profile import get_profile
+from airtable_to_tableau.libs.config_registry import get_config_registry
 from airtable_to_tableau.libs.file_stats import get_file_stats
 from airtable_to_tableau.libs.airtable_metadata import get_airtable_metadata
 from airtable_to_tableau.libs.type_to_json import airtable_type_to_json_type
+from airtable_to_tableau.web.jobs import get_job_manager
 
 routes = Blueprint("routes", __name__)
 
@@ -18,12 +24,49 @@ ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "..", ".."))
 HYPER_DIR = os.path.join(ROOT_DIR, "output")
 CONFIG_DIR = os.path.join(ROOT_DIR, "configs")
 
+# 📄 Viewer page sizes
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 500
+
+# ⏳ Streaming responses hold a pooled Hyper connection until the client has read them all,
+# so they wait this long for a free one and answer 503 instead of queueing indefinitely
+STREAM_POOL_WAIT = float(os.getenv("HYPER_STREAM_WAIT", 5))
+
+
+def _pool_busy(e):
+    return jsonify({"error": str(e)}), 503, {"Retry-After": str(max(1, int(STREAM_POOL_WAIT)))}
+
+
+def _int_arg(name, default, minimum=1, maximum=None):
+    try:
+        value = int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    value = max(minimum, value)
+    return min(value, maximum) if maximum else value
+
+
+def _configs():
+    """The registry of CONFIG_DIR: parsed once, indexed, revalidated by mtime."""
+    return get_config_registry(CONFIG_DIR)
+
+
+def page_window(page, total_pages, radius=2):
+    """Page numbers to link around `page`: the first, the last and `radius` either side, None for a gap."""
+    pages = sorted({1, total_pages, *range(page - radius, page + radius + 1)})
+    window = []
+    for p in pages:
+        if p < 1 or p > total_pages:
+            continue
+        if window and p - window[-1] > 1:
+            window.append(None)
+        window.append(p)
+    return window
+
 # View Home
 @routes.route("/")
 def index():
-    config_files = [f for f in os.listdir(CONFIG_DIR) if f.endswith(".json")]
-
-    return render_template("index.html", config_files=config_files)
+    return render_template("index.html", config_files=_configs().configs())
 
 @routes.route("/view/<filename>")
 def view_hyper(filename):
@@ -32,50 +75,48 @@ def view_hyper(filename):
 
     file_path = os.path.join(HYPER_DIR, filename)
 
-    # Default table name if not found
-    table_name = "Building"
+    # Default table name if not found: whichever config table writes this file
+    ref = _configs().find_table(filename, profile or "default")
+    table_name = ref.table.get("table_name", "Building") if ref else "Building"
 
     # If config and profile are provided, try to load the correct table name
     if config_file and profile:
-        config_path = os.path.join(CONFIG_DIR, config_file)
-        if not os.path.exists(config_path):
+        config = _configs().config(config_file)
+        if config is None:
             flash(f"Config file '{config_file}' not found.", "danger")
             return redirect(url_for("routes.index"))
-
-        try:
-            with open(config_path, "r") as f:
-                config = json.load(f)
-        except json.JSONDecodeError:
+        if config.error:
             flash("Invalid config file format.", "danger")
             return redirect(url_for("routes.index"))
 
-        profile_data = config.get("profiles", {}).get(profile)
-        if not profile_data:
+        tables = _configs().profile_tables(config_file, profile)
+        if tables is None:
             flash(f"Profile '{profile}' not found in config.", "danger")
             return redirect(url_for("routes.index"))
 
-        tables = profile_data.get("tables", [])
-        if tables:
-            table_name = tables[0].get("table_name", table_name)
+        # Prefer the profile's table that writes this file, else its first table
+        matching = [t for t in tables if os.path.basename(t.get("output_file") or "") == filename]
+        if matching or tables:
+            table_name = (matching or tables)[0].get("table_name", table_name)
 
     # Ensure the hyper file exists
     if not os.path.exists(file_path):
         flash("Hyper file not found.", "danger")
         return redirect(url_for("routes.index"))
 
-    # Read the dataframe from the hyper file
-    df = read_hyper_to_dataframe(file_path, table_name=table_name)
-    if df is None:
+    # Count once per file version, then read only the requested page from Hyper
+    total_rows = count_hyper_rows(file_path, table_name)
+    if total_rows is None:
         flash(f"Failed to read Hyper file for table: {table_name}", "danger")
         return redirect(url_for("routes.index"))
 
-    # Pagination setup
-    page = int(request.args.get("page", 1))
-    per_page = 20
-    total_pages = (len(df) + per_page - 1) // per_page
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_df = df.iloc[start:end]
+    per_page = _int_arg("per_page", DEFAULT_PER_PAGE, maximum=MAX_PER_PAGE)
+    total_pages = max(1, (total_rows + per_page - 1) // per_page)
+    page = _int_arg("page", 1, maximum=total_pages)
+    paginated_df = read_hyper_page(file_path, table_name, limit=per_page, offset=(page - 1) * per_page)
+    if paginated_df is None:
+        flash(f"Failed to read Hyper file for table: {table_name}", "danger")
+        return redirect(url_for("routes.index"))
 
     # File info and HTML rendering
     file_info = get_file_stats(file_path, project_root=os.getcwd())
@@ -87,24 +128,151 @@ def view_hyper(filename):
         file_info=file_info,
         table=table_html,
         page=page,
+        per_page=per_page,
         total_pages=total_pages,
-        total_rows=len(df),
+        page_window=page_window(page, total_pages),
+        total_rows=total_rows,
         displayed_rows=len(paginated_df),
         config_file=config_file,
+        profile=profile,
         table_name=table_name
     )
 
+def _query_spec_from_request():
+    """Query spec from a JSON body, or from ?table=&columns=a,b&where=a>1&group_by=&order_by=-a&limit=&offset= args."""
+    if request.method == "POST":
+        spec = request.get_json(silent=True)
+        if not isinstance(spec, dict):
+            raise QueryError("POST a JSON object query spec")
+        return spec
+    spec = {}
+    for key in ("table", "limit", "offset"):
+        if request.args.get(key):
+            spec[key] = request.args[key]
+    for key in ("columns", "group_by", "order_by"):
+        if request.args.get(key):
+            spec[key] = [v.strip() for v in request.args[key].split(",") if v.strip()]
+    if request.args.getlist("where"):
+        spec["filters"] = [parse_filter(w) for w in request.args.getlist("where")]
+    return spec
+
+# Query a Hyper file: filters, sorting and aggregates run in Hyper, rows stream back as NDJSON
+@routes.route("/api/hyper/<filename>/query", methods=["GET", "POST"])
+def query_hyper(filename):
+    file_path = os.path.join(HYPER_DIR, filename)
+    if not filename.endswith(".hyper") or not os.path.isfile(file_path):
+        return jsonify({"error": f"Hyper file not found: {filename}"}), 404
+
+    # The connection stays checked out until the last row is sent (or the client goes away)
+    resources = contextlib.ExitStack()
+    try:
+        columns, rows = resources.enter_context(
+            query_rows(file_path, _query_spec_from_request(), timeout=STREAM_POOL_WAIT)
+        )
+    except QueryError as e:
+        resources.close()
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        # hyper_process.PoolExhausted: every connection is busy
+        resources.close()
+        return _pool_busy(e)
+    except Exception as e:
+        resources.close()
+        return jsonify({"error": f"Query failed: {e}"}), 500
+
+    def generate():
+        for row in rows:
+            yield json.dumps(dict(zip(columns, map(json_value, row))), default=str) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["X-Hyper-Columns"] = json.dumps(columns)
+    response.call_on_close(resources.close)
+    return response
+
+# Download a table as CSV, NDJSON or Parquet (optionally gzipped), streamed in batches from Hyper
+@routes.route("/api/hyper/<filename>/dump", methods=["GET", "POST"])
+def dump_hyper(filename):
+    file_path = os.path.join(HYPER_DIR, filename)
+    if not filename.endswith(".hyper") or not os.path.isfile(file_path):
+        return jsonify({"error": f"Hyper file not found: {filename}"}), 404
+
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unknown format: {fmt} (expected one of: {', '.join(FORMATS)})"}), 400
+    compress = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+
+    resources = contextlib.ExitStack()
+    try:
+        spec = _query_spec_from_request()
+        chunks = resources.enter_context(
+            dump_chunks(file_path, spec, fmt=fmt, compress=compress, timeout=STREAM_POOL_WAIT)
+        )
+    except QueryError as e:
+        resources.close()
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        resources.close()
+        return _pool_busy(e)
+    except ImportError as e:
+        resources.close()
+        return jsonify({"error": str(e)}), 501
+    except Exception as e:
+        resources.close()
+        return jsonify({"error": f"Dump failed: {e}"}), 500
+
+    stem = os.path.splitext(filename)[0]
+    if spec.get("table"):
+        stem += f"-{spec['table']}"
+    download_name = stem + EXTENSIONS[fmt] + (".gz" if compress else "")
+    response = Response(stream_with_context(chunks), mimetype="application/gzip" if compress else MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+    response.call_on_close(resources.close)
+    return response
+
+def _profile(filename):
+    file_path = os.path.join(HYPER_DIR, filename)
+    if not filename.endswith(".hyper") or not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Hyper file not found: {filename}")
+    refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
+    top = _int_arg("top", 5, minimum=0, maximum=50)
+    return get_profile(file_path, request.args.get("table") or None, top=top, refresh=refresh)
+
+# Column statistics of a Hyper table, computed in Hyper and cached next to the file
+@routes.route("/api/hyper/<filename>/profile")
+def profile_hyper_json(filename):
+    try:
+        return jsonify(_profile(filename))
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except HyperException as e:
+        # Not a readable extract, or a table Hyper can't scan
+        return jsonify({"error": f"Profile failed: {e.main_message}"}), 400
+
+@routes.route("/profile/<filename>")
+def profile_hyper(filename):
+    try:
+        profile = _profile(filename)
+    except Exception as e:
+        flash(f"Failed to profile {filename}: {e}", "danger")
+        return redirect(url_for("routes.index"))
+    return render_template("profile_hyper.html", filename=filename, profile=profile)
+
+# Query result cache counters
+@routes.route("/cache/stats")
+def cache_stats():
+    return jsonify(get_query_cache().stats())
+
 # View Config file list
 @routes.route("/configs")
 def list_configs():
     config_files = []
-    for f in os.listdir(CONFIG_DIR):
-        if f.endswith(".json"):
-            full_path = os.path.join(CONFIG_DIR, f)
-            config_files.append({
-                "name": f,
-                "path": full_path
-            })
+    for f in _configs().configs():
+        config_files.append({
+            "name": f,
+            "path": os.path.join(CONFIG_DIR, f)
+        })
 
     return render_template("config_list.html", config_files=config_files)
 
@@ -112,16 +280,18 @@ def list_configs():
 @routes.route("/configs/view/<filename>")
 def view_config(filename):
     # print(f"🚀 Viewing config: {filename}")
-    config_path = os.path.join(CONFIG_DIR, filename)
+    config = _configs().config(filename)
 
-    if not os.path.exists(config_path):
+    if config is None:
         flash("Config file not found.", "danger")
         return redirect(url_for("routes.list_configs"))
+    if config.error:
+        flash(f"Invalid config file format: {config.error}", "danger")
+        return redirect(url_for("routes.list_configs"))
 
-
-    with open(config_path, "r") as f:
-        full_config = json.load(f)  # Load as Python dict
-        config_contents = json.dumps(full_config, indent=2)  # Pretty-print for UI
+    config_path = config.path
+    full_config = config.data  # Parsed once by the registry; read-only
+    config_contents = json.dumps(full_config, indent=2)  # Pretty-print for UI
 
     # Get file stats
     file_info = get_file_stats(config_path, ROOT_DIR, relative_path_prefix="configs")
@@ -180,6 +350,7 @@ def upload_config():
         if uploaded_file and uploaded_file.filename.endswith(".json"):
             save_path = os.path.join(CONFIG_DIR, uploaded_file.filename)
             uploaded_file.save(save_path)
+            _configs().update(uploaded_file.filename)
             flash(f"Config file '{uploaded_file.filename}' uploaded successfully!", "success")
         else:
             flash("Invalid file type. Only .json config files are allowed.", "danger")
@@ -206,6 +377,7 @@ def delete_config(filename):
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
+            _configs().remove(filename)
             flash(f"🗑️ Deleted config file: {filename}", "success")
         else:
             flash("Config file not found.", "warning")
@@ -232,6 +404,7 @@ def edit_config(filename):
         # If valid, overwrite the file
         with open(config_path, "w") as f:
             json.dump(parsed_json, f, indent=2)
+        _configs().update(filename)
 
         flash(f"✅ Successfully saved changes to {filename}.", "success")
     except json.JSONDecodeError as e:
@@ -255,24 +428,81 @@ def download_file(folder, filename):
 def help_page():
     return render_template("help.html")
 
+def _config_path(filename):
+    """Path of a config in CONFIG_DIR, or None if the name is not an existing .json config."""
+    config = _configs().config(filename) if filename else None
+    return config.path if config else None
+
+# Queue an export job (or join the one already running for this config/profile)
+@routes.route("/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json(silent=True) or request.form
+    filename = data.get("config")
+    profile = data.get("profile") or "default"
+    config_path = _config_path(filename)
+    if config_path is None:
+        return jsonify({"error": f"Config file not found: {filename}"}), 404
+
+    job, created = get_job_manager().submit(config_path, profile)
+    status = job.to_dict()
+    status["coalesced"] = not created
+    status["url"] = url_for("routes.job_status", job_id=job.id)
+    status["events"] = url_for("routes.job_events", job_id=job.id)
+    return jsonify(status), 202
+
+@routes.route("/jobs")
+def list_jobs():
+    return jsonify([job.to_dict(since=len(job.lines)) for job in get_job_manager().jobs()])
+
+# Job status, progress and log lines from ?since=N on
+@routes.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify(job.to_dict(since=_int_arg("since", 0, minimum=0)))
+
+# Follow a job's log as server-sent events; reconnects resume from Last-Event-ID
+@routes.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    try:
+        since = int(request.headers.get("Last-Event-ID", -1)) + 1
+    except ValueError:
+        since = 0
+    since = max(since, _int_arg("since", 0, minimum=0))
+
+    def generate():
+        for index, line in job.follow(since):
+            if index is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {index}\ndata: {line}\n\n"
+        yield f"event: done\ndata: {json.dumps({'status': job.status, 'error': job.error})}\n\n"
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# Plain-text log of an export job, for curl and older clients
 @routes.route("/configs/stream/<filename>")
 def stream_export(filename):
-    config_path = os.path.join(CONFIG_DIR, filename)
     profile = request.args.get("profile", "default")
+    config_path = _config_path(filename)
+    if config_path is None:
+        return Response(f"❌ Config file not found: {filename}\n", status=404, mimetype="text/plain")
+
+    job, created = get_job_manager().submit(config_path, profile)
 
     def generate():
-        yield f"▶️ Running export for `{filename}` using profile `{profile}`...\n\n"
-        try:
-            process = subprocess.Popen(
-                ["airtable-export", "export", "--config", config_path, "--profile", profile],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            for line in iter(process.stdout.readline, ''):
-                yield line
-        except Exception as e:
-            yield f"❌ Error running export: {e}\n"
+        if not created:
+            yield f"🔗 Joining export job {job.id} already running for `{filename}` ({profile})\n"
+        for index, line in job.follow():
+            if index is not None:
+                yield line + "\n"
 
     return Response(stream_with_context(generate()), mimetype="text/plain")
 
@@ -329,6 +559,7 @@ def create_config():
         # Save to file
         with open(config_path, "w") as f:
             json.dump(config, f, indent=2)
+        _configs().update(filename)
 
         flash(f"Config '{filename}' created successfully.", "success")
         return redirect(url_for("routes.view_config", filename=filename))
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+from src.airtable_to_tableau.libs.airtable_client import AirtableClient, AirtableAPIError
+
+def fake_response(status, body=None, headers=None):
+    response = mock.Mock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.text = str(body)
+    response.json.return_value = body
+    return response
+
+class TestAirtableClient(unittest.TestCase):
+    def setUp(self):
+        self.client = AirtableClient("key", api_url="http://airtable.test", max_retries=3, backoff_base=0.001)
+
+    def test_retries_429_and_honors_retry_after(self):
+        responses = [
+            fake_response(429, headers={"Retry-After": "0.01"}),
+            fake_response(503),
+            fake_response(200, {"records": []}),
+        ]
+        stats = {}
+        with mock.patch.object(self.client.session, "get", side_effect=responses) as get, \
+                mock.patch("time.sleep") as sleep:
+            data = self.client.get_json("v0/app/Table", stats=stats)
+
+        self.assertEqual(data, {"records": []})
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(stats, {"requests": 3, "retries": 2})
+        self.assertAlmostEqual(sleep.call_args_list[0].args[0], 0.01)
+        self.assertEqual(get.call_args.kwargs["timeout"], self.client.timeout)
+
+    def test_gives_up_after_max_retries(self):
+        with mock.patch.object(self.client.session, "get", return_value=fake_response(500)), \
+                mock.patch("time.sleep"):
+            with self.assertRaises(AirtableAPIError) as ctx:
+                self.client.get("v0/app/Table")
+        self.assertEqual(ctx.exception.status_code, 500)
+
+    def test_client_errors_are_not_retried(self):
+        with mock.patch.object(self.client.session, "get", return_value=fake_response(404)) as get:
+            with self.assertRaises(AirtableAPIError):
+                self.client.get("v0/app/Missing")
+        self.assertEqual(get.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
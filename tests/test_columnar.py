@@ -0,0 +1,52 @@
+import unittest
+from src.airtable_to_tableau.libs.columnar import ColumnAccumulator, records_to_frame
+from src.airtable_to_tableau.libs.flatten_utils import flatten_lists_in_dataframe
+from src.airtable_to_tableau.libs.sanitize_dataframe import sanitize_dataframe
+
+FIELDS = [
+    {"name": "Name", "type": "singleLineText"},
+    {"name": "Capacity", "type": "number"},
+    {"name": "Active", "type": "checkbox"},
+    {"name": "Tags", "type": "multipleSelects"},
+    {"name": "Owner", "type": "singleCollaborator"},
+]
+RECORDS = [
+    {"Name": "Windrunner", "Capacity": 150, "Active": True, "Tags": ["HQ", "Owned"],
+     "Owner": {"id": "usr1", "email": "ada@example.com", "name": "Ada"}, "Extra": [1, 2]},
+    {"Name": "Skyreach", "Capacity": 80.5},
+    {"Tags": [], "Extra": "x", "Late": 3},
+]
+
+def as_lists(df):
+    return {name: df[name].astype(object).where(df[name].notna(), None).tolist() for name in df.columns}
+
+class TestColumnar(unittest.TestCase):
+    def test_matches_dataframe_path(self):
+        expected = sanitize_dataframe(flatten_lists_in_dataframe(RECORDS, field_types={f["name"]: f["type"] for f in FIELDS}))
+        df = records_to_frame(RECORDS, FIELDS)
+
+        self.assertEqual(list(df.columns), list(expected.columns))
+        self.assertEqual(as_lists(df), as_lists(expected))
+        self.assertEqual(str(df["Capacity"].dtype), "Float64")
+        self.assertEqual(str(df["Active"].dtype), "boolean")
+
+    def test_pages_accumulate_and_bad_numbers_fall_back(self):
+        accumulator = ColumnAccumulator(FIELDS)
+        accumulator.add(RECORDS[:1])
+        accumulator.add([])
+        accumulator.add(RECORDS[1:] + [{"Capacity": {"specialValue": "NaN"}}])
+        df = accumulator.to_frame()
+
+        self.assertEqual(len(accumulator), 4)
+        lists = as_lists(df)
+        self.assertEqual(lists["Late"], [None, None, 3, None])
+        self.assertEqual(lists["Capacity"][:3], ["150", "80.5", None])
+        self.assertEqual(df.loc[0, "Extra"], "1, 2")
+
+    def test_formula_arrays_are_flattened(self):
+        fields = [{"name": "Names", "type": "formula", "options": {"result": {"type": "singleLineText"}}}]
+        df = records_to_frame([{"Names": ["a", "b"]}, {"Names": "c"}], fields)
+        self.assertEqual(list(df["Names"]), ["a, b", "c"])
+
+if __name__ == "__main__":
+    unittest.main()
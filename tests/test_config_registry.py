@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from src.airtable_to_tableau.libs.config_registry import ConfigRegistry
+from src.airtable_to_tableau.libs.config_utils import find_table_name_for_hyper
+
+def write_config(directory, name, config):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        json.dump(config, f)
+    return path
+
+class TestConfigRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        write_config(self.tmp.name, "campus.json", {"profiles": {
+            "default": {"tables": [
+                {"table_name": "Building", "output_file": "output/buildings.hyper"},
+                {"table_name": "Floor", "output_file": "output/floors.hyper"},
+            ]},
+            "staging": {"tables": [{"table_name": "Building Staging", "output_file": "output/buildings.hyper"}]},
+        }})
+        write_config(self.tmp.name, "legacy.json", {"tables": [{"table_name": "Room", "output_file": "rooms.hyper"}]})
+        with open(os.path.join(self.tmp.name, "broken.json"), "w") as f:
+            f.write("{not json")
+        self.registry = ConfigRegistry(self.tmp.name, ttl=0)
+
+    def test_indexes_output_files_and_profiles(self):
+        self.assertEqual(self.registry.configs(), ["broken.json", "campus.json", "legacy.json"])
+        self.assertEqual(self.registry.find_table("floors.hyper").table["table_name"], "Floor")
+        self.assertEqual(self.registry.find_table("buildings.hyper", "staging").table["table_name"], "Building Staging")
+        self.assertEqual(self.registry.find_table("rooms.hyper", "anything").config, "legacy.json")
+        self.assertIsNone(self.registry.find_table("missing.hyper"))
+        self.assertEqual(len(self.registry.profile_tables("campus.json", "default")), 2)
+        self.assertIsNone(self.registry.profile_tables("campus.json", "prod"))
+        self.assertIsNotNone(self.registry.config("broken.json").error)
+        self.assertEqual(find_table_name_for_hyper(self.tmp.name, "output/rooms.hyper"), "Room")
+
+    def test_parses_once_and_revalidates_by_mtime(self):
+        self.registry.find_table("floors.hyper")
+        self.registry.configs()
+        self.assertEqual(self.registry.parses, 3)
+
+        path = write_config(self.tmp.name, "legacy.json", {"tables": [{"table_name": "Desk", "output_file": "rooms.hyper"}]})
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        os.remove(os.path.join(self.tmp.name, "broken.json"))
+
+        self.assertEqual(self.registry.find_table("rooms.hyper").table["table_name"], "Desk")
+        self.assertEqual(self.registry.configs(), ["campus.json", "legacy.json"])
+        self.assertEqual(self.registry.parses, 4)
+
+    def test_update_and_remove_apply_immediately(self):
+        registry = ConfigRegistry(self.tmp.name, ttl=3600)
+        self.assertIsNone(registry.find_table("desks.hyper"))
+        write_config(self.tmp.name, "desks.json", {"tables": [{"table_name": "Desk", "output_file": "desks.hyper"}]})
+        self.assertIsNone(registry.find_table("desks.hyper"))
+
+        registry.update("desks.json")
+        self.assertEqual(registry.find_table("desks.hyper").config, "desks.json")
+        os.remove(os.path.join(self.tmp.name, "desks.json"))
+        registry.remove("desks.json")
+        self.assertIsNone(registry.find_table("desks.hyper"))
+
+if __name__ == "__main__":
+    unittest.main()
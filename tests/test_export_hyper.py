@@ -0,0 +1,49 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+import pandas as pd
+from tableauhyperapi import TableName, SqlType
+from src.airtable_to_tableau.libs.export_hyper import HyperTableWriter, export_to_hyper
+from src.airtable_to_tableau.libs.hyper_process import hyper_connection
+
+class TestExportHyperLoadPaths(unittest.TestCase):
+    def export_and_read(self, df, method, column_types=None):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, f"{method}.hyper")
+            export_to_hyper(df, output_file=output_file, table_name="Load", column_types=column_types, method=method)
+            with hyper_connection(output_file) as connection:
+                return connection.execute_list_query(f"SELECT * FROM {TableName('Extract', 'Load')}")
+
+    def test_copy_matches_inserter(self):
+        df = pd.DataFrame({
+            "Name": ["a,b", "", None, 'say "hi"\nnext line'],
+            "Capacity": pd.array([1, None, 3, 4], dtype="Int64"),
+            "Budget": pd.array([1234.567, None, 1.1, 2.0], dtype="Float64"),
+            "Active": pd.array([True, False, None, True], dtype="boolean"),
+            "Opened": pd.to_datetime(["2024-01-02", None, "2024-01-03", "2024-02-01"]),
+        })
+        types = {"Budget": SqlType.numeric(18, 2), "Opened": SqlType.date()}
+
+        copied = self.export_and_read(df, "copy", types)
+        self.assertEqual(copied, self.export_and_read(df, "insert", types))
+        self.assertEqual(copied[1][0], "")
+        self.assertIsNone(copied[2][0])
+
+    def test_null_marker_text_falls_back_to_inserter(self):
+        df = pd.DataFrame({"Name": ["\\N", None]})
+        self.assertEqual(self.export_and_read(df, "copy"), [["\\N"], [None]])
+
+    def test_warnings_go_through_log(self):
+        messages = []
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()) as out:
+            with HyperTableWriter(os.path.join(tmp, "log.hyper"), "Load", method="insert", log=messages.append) as writer:
+                writer.write(pd.DataFrame({"Name": ["a"]}))
+                writer.write(pd.DataFrame({"Name": ["b"], "Extra": [1]}))
+
+        self.assertEqual(messages, ["⚠️  Dropping columns not in the table schema: Extra"])
+        self.assertEqual(out.getvalue(), "")
+
+if __name__ == "__main__":
+    unittest.main()
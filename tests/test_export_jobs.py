@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from src.airtable_to_tableau.libs.fake_airtable import FakeAirtableServer, SyntheticTable
+from src.airtable_to_tableau.libs.read_hyper import count_hyper_rows
+from src.airtable_to_tableau.web import jobs, routes
+from src.airtable_to_tableau.web.app import create_app
+
+FIELDS = {"Name": "singleLineText", "Capacity": "number"}
+
+class TestExportJobs(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAirtableServer({"appJobs1": [SyntheticTable("Building", 150, fields=FIELDS)]}).start()
+        self.addCleanup(self.server.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output_file = os.path.join(self.tmp.name, "building.hyper")
+        with open(os.path.join(self.tmp.name, "buildings.json"), "w") as f:
+            json.dump({"profiles": {"default": {"tables": [{
+                "base_id": "appJobs1",
+                "table_name": "Building",
+                "output_file": self.output_file,
+                "columns": [{"source": "Name", "type": "str"}, {"source": "Capacity", "type": "float"}],
+            }]}}}, f)
+
+        env = mock.patch.dict(os.environ, {
+            "AIRTABLE_API_KEY": "test-key",
+            "AIRTABLE_API_URL": self.server.url,
+            "AIRTABLE_RATE_LIMIT": "1000",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        self.manager = jobs.JobManager(workers=1)
+        self.addCleanup(self.manager.shutdown)
+        for target, name, value in ((routes, "CONFIG_DIR", self.tmp.name), (routes, "get_job_manager", lambda: self.manager)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = create_app().test_client()
+
+    def test_job_runs_export_and_reports_progress(self):
+        response = self.client.post("/jobs", json={"config": "buildings.json"})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["id"]
+
+        events = self.client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+        self.assertIn("data: ✅ All exports completed.", events)
+        self.assertTrue(events.rstrip().endswith('data: {"status": "succeeded", "error": null}'))
+
+        status = self.client.get(f"/jobs/{job_id}?since=1").get_json()
+        self.assertEqual(status["status"], "succeeded")
+        self.assertEqual(status["progress"], {"tables_done": 1, "tables_total": 1})
+        self.assertEqual(status["results"][0]["rows"], 150)
+        self.assertEqual(len(status["lines"]), status["line_count"] - 1)
+        self.assertEqual(count_hyper_rows(self.output_file, "Building"), 150)
+
+        self.assertEqual(self.client.get("/jobs/nope").status_code, 404)
+        self.assertEqual(self.client.post("/jobs", json={"config": "missing.json"}).status_code, 404)
+
+    def test_requests_for_a_running_config_are_coalesced(self):
+        release = threading.Event()
+
+        def blocked_exports(tables, api_key, log=print, progress=None, **kwargs):
+            release.wait(10)
+            return []
+
+        with mock.patch.object(jobs, "run_exports", blocked_exports):
+            first = self.client.post("/jobs", json={"config": "buildings.json"}).get_json()
+            second = self.client.post("/jobs", data={"config": "buildings.json", "profile": "default"}).get_json()
+            release.set()
+            list(self.manager.get(first["id"]).follow())
+
+        self.assertFalse(first["coalesced"])
+        self.assertTrue(second["coalesced"])
+        self.assertEqual(first["id"], second["id"])
+        self.assertEqual(self.manager.get(first["id"]).status, "succeeded")
+
+        third = self.client.post("/jobs", json={"config": "buildings.json"}).get_json()
+        self.assertNotEqual(third["id"], first["id"])
+        self.assertFalse(third["coalesced"])
+        list(self.manager.get(third["id"]).follow())
+
+if __name__ == "__main__":
+    unittest.main()
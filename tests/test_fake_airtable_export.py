@@ -0,0 +1,192 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from src.airtable_to_tableau.libs.fake_airtable import FakeAirtableServer, SyntheticTable
+from src.airtable_to_tableau.libs.fetch_airtable import fetch_airtable
+from src.airtable_to_tableau.libs.read_hyper import read_hyper_to_dataframe
+from src.airtable_to_tableau.libs.export_runner import export_table, run_exports
+from src.airtable_to_tableau.libs import export_runner
+from src.airtable_to_tableau.libs.hyper_process import HyperProcessManager
+from src.airtable_to_tableau import cli
+
+FIELDS = {"Name": "singleLineText", "Capacity": "number", "Tags": "multipleSelects", "Notes": "multilineText"}
+
+class TestFakeAirtableExport(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAirtableServer({
+            "appFake1": [SyntheticTable("Building", 250, fields=FIELDS), SyntheticTable("Floor", 120, fields=FIELDS, seed=1)],
+        }).start()
+        self.addCleanup(self.server.stop)
+        env = mock.patch.dict(os.environ, {
+            "AIRTABLE_API_KEY": "test-key",
+            "AIRTABLE_API_URL": self.server.url,
+            "AIRTABLE_RATE_LIMIT": "1000",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_fetch_paginates_and_retries_429(self):
+        self.server.fail_every = 2
+        stats = {}
+        records = fetch_airtable("appFake1", "Building", "test-key", stats=stats)
+        self.assertEqual(len(records), 250)
+        self.assertEqual(stats["pages"], 3)
+        self.assertEqual(stats["retries"], self.server.throttled_count)
+        self.assertGreater(stats["retries"], 0)
+
+    def test_fetch_sends_field_projection(self):
+        records = fetch_airtable("appFake1", "Building", "test-key", params={"fields[]": ["Name"]})
+        self.assertTrue(all(set(r) == {"Name"} for r in records))
+
+    def test_cli_export_end_to_end(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "buildings.hyper")
+            config_path = os.path.join(tmp, "config.json")
+            with open(config_path, "w") as f:
+                json.dump({"profiles": {"default": {"tables": [{
+                    "base_id": "appFake1",
+                    "table_name": "Building",
+                    "output_file": output_file,
+                    "columns": [
+                        {"source": "Name", "rename": "Building Name", "type": "str"},
+                        {"source": "Capacity", "type": "float", "default": 0},
+                        {"source": "^Ta.*", "type": "str", "regex": True},
+                    ],
+                }]}}}, f)
+
+            argv = ["airtable-export", "export", "--config", config_path, "--jobs", "2"]
+            with mock.patch.object(sys, "argv", argv), redirect_stdout(io.StringIO()) as out:
+                cli.main()
+
+            self.assertIn("All exports completed", out.getvalue())
+            df = read_hyper_to_dataframe(output_file, "Building")
+            self.assertEqual(len(df), 250)
+            self.assertEqual(list(df.columns), ["Building Name", "Capacity", "Tags"])
+
+    def test_tables_sharing_an_output_file_land_in_one_extract(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "campus.hyper")
+            tables = [
+                {"base_id": "appFake1", "table_name": "Building", "output_file": output_file,
+                 "columns": [{"source": "Name", "type": "str"}], "join_keys": ["Name"]},
+                {"base_id": "appFake1", "table_name": "Floor", "output_file": output_file, "stream": True,
+                 "columns": [{"source": "Name", "type": "str"}, {"source": "Capacity", "type": "int"}]},
+            ]
+            with redirect_stdout(io.StringIO()):
+                results = run_exports(tables, "test-key", jobs=2)
+
+            self.assertEqual([r["status"] for r in results], ["ok", "ok"])
+            buildings = read_hyper_to_dataframe(output_file, "Building")
+            floors = read_hyper_to_dataframe(output_file, "Floor")
+            self.assertEqual((len(buildings), len(floors)), (250, 120))
+            self.assertEqual(list(buildings["Name"]), sorted(buildings["Name"]))
+
+    def test_more_shared_files_than_pool_connections(self):
+        manager = HyperProcessManager(pool_size=2)
+        self.addCleanup(manager.shutdown)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f"campus{i}.hyper") for i in range(3)]
+            tables = [
+                {"base_id": "appFake1", "table_name": name, "output_file": path, "columns": [{"source": "Name", "type": "str"}]}
+                for name in ("Building", "Floor") for path in paths
+            ]
+            out = io.StringIO()
+            with mock.patch("airtable_to_tableau.libs.hyper_process._manager", manager), redirect_stdout(out):
+                results = run_exports(tables, "test-key", jobs=4, log=print)
+                rows = [len(read_hyper_to_dataframe(path, "Floor")) for path in paths]
+
+            self.assertEqual([r["table_name"] for r in results], ["Building"] * 3 + ["Floor"] * 3)
+            self.assertEqual([r["status"] for r in results], ["ok"] * 6)
+            self.assertEqual(rows, [120, 120, 120])
+            self.assertIn("Running 1 tables at a time instead of 4", out.getvalue())
+
+    def test_one_fetch_feeds_hyper_and_parquet_outputs(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        with tempfile.TemporaryDirectory() as tmp:
+            entry = {
+                "base_id": "appFake1",
+                "table_name": "Building",
+                "output_file": os.path.join(tmp, "buildings.hyper"),
+                "outputs": [{"type": "hyper"}, {"type": "parquet", "row_group_size": 100}],
+                "columns": [{"source": "Name", "type": "str"}, {"source": "Capacity", "type": "int"}],
+            }
+            with redirect_stdout(io.StringIO()):
+                result = export_table(entry, "test-key", stream=True)
+
+            self.assertEqual((result["rows"], result["pages"]), (250, 3))
+            hyper = read_hyper_to_dataframe(entry["output_file"], "Building")
+            parquet = pq.read_table(os.path.join(tmp, "buildings.parquet")).to_pandas()
+            self.assertEqual(list(parquet["Name"]), list(hyper["Name"]))
+            self.assertEqual(list(parquet.columns), ["Name", "Capacity"])
+
+    def test_failed_stream_keeps_previous_outputs(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        with tempfile.TemporaryDirectory() as tmp:
+            entry = {
+                "base_id": "appFake1",
+                "table_name": "Building",
+                "output_file": os.path.join(tmp, "buildings.hyper"),
+                "outputs": [{"type": "hyper"}, {"type": "parquet"}],
+                "columns": [{"source": "Name", "type": "str"}],
+            }
+            shared = os.path.join(tmp, "campus.hyper")
+            tables = [dict(entry, table_name=name, output_file=shared, outputs=None) for name in ("Building", "Floor")]
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(export_table(entry, "test-key", stream=True)["status"], "ok")
+                self.assertEqual([r["status"] for r in run_exports(tables, "test-key", stream=True)], ["ok", "ok"])
+
+            transform = export_runner.transform_records
+            calls = []
+
+            def failing_transform(records, *args, **kwargs):
+                calls.append(len(records))
+                if len(calls) % 2 == 0:
+                    raise RuntimeError("connection lost")
+                return transform(records, *args, **kwargs)
+
+            with mock.patch.object(export_runner, "transform_records", failing_transform), redirect_stdout(io.StringIO()):
+                self.assertEqual(export_table(entry, "test-key", stream=True)["status"], "failed")
+                self.assertEqual([r["status"] for r in run_exports(tables, "test-key", stream=True)], ["failed", "failed"])
+
+            self.assertEqual(len(read_hyper_to_dataframe(entry["output_file"], "Building")), 250)
+            self.assertEqual(pq.read_table(os.path.join(tmp, "buildings.parquet")).num_rows, 250)
+            self.assertEqual(len(read_hyper_to_dataframe(shared, "Building")), 250)
+            self.assertEqual(len(read_hyper_to_dataframe(shared, "Floor")), 120)
+            self.assertEqual(sorted(os.listdir(tmp)), ["buildings.hyper", "buildings.parquet", "campus.hyper"])
+
+    def test_snapshot_replay_makes_no_requests(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            entry = {
+                "base_id": "appFake1",
+                "table_name": "Building",
+                "output_file": os.path.join(tmp, "buildings.hyper"),
+                "columns": [{"source": "Name", "type": "str"}],
+            }
+            with mock.patch.dict(os.environ, {"AIRTABLE_SNAPSHOT_DIR": os.path.join(tmp, "snapshots")}), \
+                    redirect_stdout(io.StringIO()):
+                first = export_table(entry, "test-key", snapshot={"write": True})
+                requests_after_fetch = self.server.request_count
+
+                entry["columns"].append({"source": "Capacity", "type": "float"})
+                replayed = export_table(entry, "test-key", snapshot={"replay": True})
+
+            self.assertEqual(first["rows"], 250)
+            self.assertEqual(replayed["rows"], 250)
+            self.assertEqual(self.server.request_count, requests_after_fetch)
+            df = read_hyper_to_dataframe(entry["output_file"], "Building")
+            self.assertEqual(list(df.columns), ["Name", "Capacity"])
+            self.assertGreater(df["Capacity"].notna().sum(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
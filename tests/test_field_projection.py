@@ -0,0 +1,37 @@
+import unittest
+from src.airtable_to_tableau.libs.field_projection import build_field_projection, build_request_params
+
+SCHEMA = [{"name": "Name"}, {"name": "Region Text"}, {"name": "Region Code"}, {"name": "Notes"}]
+
+class TestFieldProjection(unittest.TestCase):
+    def test_plain_sources(self):
+        config = [{"source": "Name"}, {"source": "Max Capacity"}, {"source": "Name", "rename": "Again"}]
+        self.assertEqual(build_field_projection(config), ["Name", "Max Capacity"])
+
+    def test_regex_resolved_against_schema(self):
+        config = [{"source": "Name"}, {"source": "^Region.*", "regex": True}]
+        self.assertEqual(build_field_projection(config, SCHEMA), ["Name", "Region Text", "Region Code"])
+
+    def test_regex_without_schema_fetches_everything(self):
+        self.assertIsNone(build_field_projection([{"source": "^Region.*", "regex": True}]))
+        self.assertIsNone(build_field_projection([]))
+
+    def test_request_params(self):
+        entry = {
+            "base_id": "appX",
+            "table_name": "Building",
+            "columns": [{"source": "Name"}],
+            "view": "Grid view",
+            "sort": [{"field": "Name", "direction": "desc"}],
+            "page_size": 500,
+        }
+        self.assertEqual(build_request_params(entry), {
+            "fields[]": ["Name"],
+            "view": "Grid view",
+            "sort[0][field]": "Name",
+            "sort[0][direction]": "desc",
+            "pageSize": 100,
+        })
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import pandas as pd
+from src.airtable_to_tableau.libs.flatten_utils import flatten_lists_in_dataframe, nested_columns
+
+RECORDS = [
+    {
+        "Name": "Windrunner",
+        "Capacity": 150,
+        "Tags": ["HQ", "Owned"],
+        "Owner": {"id": "usr1", "email": "ada@example.com", "name": "Ada"},
+        "Photos": [{"id": "att1", "url": "https://x/1.jpg", "filename": "1.jpg"},
+                   {"id": "att2", "url": "https://x/2.jpg", "filename": "2.jpg"}],
+    },
+    {"Name": "Skyreach", "Capacity": 80},
+]
+
+class TestFlattenUtils(unittest.TestCase):
+    def test_only_nested_object_columns_are_flattened(self):
+        df = flatten_lists_in_dataframe(RECORDS)
+        self.assertEqual(df.loc[0, "Tags"], "HQ, Owned")
+        self.assertEqual(df.loc[0, "Owner"], "Ada")
+        self.assertEqual(df.loc[0, "Photos"], "https://x/1.jpg, https://x/2.jpg")
+        self.assertTrue(pd.isna(df.loc[1, "Tags"]))
+        self.assertTrue(pd.api.types.is_integer_dtype(df["Capacity"]))
+
+    def test_configurable_extraction(self):
+        df = flatten_lists_in_dataframe(RECORDS, options={"attachment": "filename", "collaborator": "email", "separator": "|"})
+        self.assertEqual(df.loc[0, "Owner"], "ada@example.com")
+        self.assertEqual(df.loc[0, "Photos"], "1.jpg|2.jpg")
+        self.assertEqual(df.loc[0, "Tags"], "HQ|Owned")
+
+    def test_field_types_decide_columns(self):
+        df = pd.DataFrame(RECORDS)
+        self.assertEqual(nested_columns(df), ["Tags", "Owner", "Photos"])
+        self.assertEqual(nested_columns(df, {"Tags": "multipleSelects", "Owner": "singleLineText"}), ["Tags", "Photos"])
+
+    def test_formula_arrays_are_flattened(self):
+        records = [{"Names": ["a", "b"]}, {"Names": "c"}, {"Names": 3}]
+        for types in (None, {"Names": "formula"}, {"Names": "rollup"}, {"Names": "multipleLookupValues"}):
+            df = flatten_lists_in_dataframe(records, field_types=types)
+            self.assertEqual(list(df["Names"]), ["a, b", "c", 3])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.airtable_to_tableau.libs.export_hyper import export_to_hyper
+from src.airtable_to_tableau.libs.hyper_dump import dump_chunks, dump_to_file, format_for_path
+
+class TestHyperDump(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.hyper_file = os.path.join(self.tmp.name, "rooms.hyper")
+        export_to_hyper(pd.DataFrame({
+            "n": range(25),
+            "Name": [f"Room, {i}" for i in range(25)],
+            "Area": [None if i % 5 == 0 else i * 1.5 for i in range(25)],
+        }), self.hyper_file, "Room")
+
+    def test_csv_is_streamed_in_batches_and_gzipped(self):
+        with dump_chunks(self.hyper_file, fmt="csv", batch_rows=10) as chunks:
+            chunks = list(chunks)
+        self.assertEqual(len(chunks), 4)  # header + 3 batches
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        self.assertEqual(rows[0], ["n", "Name", "Area"])
+        self.assertEqual(rows[1], ["0", "Room, 0", ""])
+        self.assertEqual(len(rows), 26)
+
+        output = os.path.join(self.tmp.name, "out", "rooms.csv.gz")
+        dump_to_file(self.hyper_file, output, {"columns": ["Name"], "limit": 3}, batch_rows=2)
+        with gzip.open(output, "rt") as f:
+            self.assertEqual(f.read().splitlines(), ["Name", '"Room, 0"', '"Room, 1"', '"Room, 2"'])
+        self.assertFalse(os.path.exists(output + ".partial"))
+
+    def test_ndjson_and_parquet(self):
+        with dump_chunks(self.hyper_file, {"filters": [{"column": "n", "op": "<", "value": 2}]}, fmt="ndjson") as chunks:
+            lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {"n": 0, "Name": "Room, 0", "Area": None},
+            {"n": 1, "Name": "Room, 1", "Area": 1.5},
+        ])
+
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        output = os.path.join(self.tmp.name, "rooms.parquet")
+        dump_to_file(self.hyper_file, output, batch_rows=10)
+        self.assertEqual(pq.ParquetFile(output).metadata.num_row_groups, 3)
+        df = pd.read_parquet(output)
+        self.assertEqual(len(df), 25)
+        self.assertEqual(df["Area"].iloc[3], 4.5)
+
+    def test_format_for_path(self):
+        self.assertEqual(format_for_path("a/b.NDJSON.gz"), ("ndjson", True))
+        self.assertEqual(format_for_path("b.parquet"), ("parquet", False))
+        self.assertEqual(format_for_path("b.txt"), (None, False))
+        with self.assertRaises(ValueError):
+            with dump_chunks(self.hyper_file, fmt="xml"):
+                pass
+
+if __name__ == "__main__":
+    unittest.main()
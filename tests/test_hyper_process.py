@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from tableauhyperapi import CreateMode, SqlType, TableDefinition, TableName
+from src.airtable_to_tableau.libs.hyper_process import HyperProcessManager
+
+class TestHyperProcessManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "pool.hyper")
+        self.manager = HyperProcessManager(pool_size=2)
+
+    def tearDown(self):
+        self.manager.shutdown()
+        self.tmp.cleanup()
+
+    def count_rows(self):
+        with self.manager.connection(self.database) as connection:
+            return connection.execute_scalar_query(f"SELECT COUNT(*) FROM {TableName('Extract', 'T')}")
+
+    def test_one_process_serves_every_connection_and_restarts(self):
+        with self.manager.connection(self.database, CreateMode.CREATE_AND_REPLACE) as connection:
+            connection.catalog.create_schema("Extract")
+            table = TableDefinition(TableName("Extract", "T"), [TableDefinition.Column("i", SqlType.int())])
+            connection.catalog.create_table(table)
+            connection.execute_command(f"INSERT INTO {table.table_name} VALUES (1), (2)")
+
+        self.assertEqual([self.count_rows() for _ in range(3)], [2, 2, 2])
+        self.assertEqual(self.manager.starts, 1)
+
+        self.manager.restart()
+        self.assertEqual(self.count_rows(), 2)
+        self.assertEqual(self.manager.starts, 2)
+
+if __name__ == "__main__":
+    unittest.main()
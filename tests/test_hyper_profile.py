@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from src.airtable_to_tableau.libs.export_hyper import export_to_hyper
+from src.airtable_to_tableau.libs import hyper_profile
+from src.airtable_to_tableau.libs.hyper_profile import get_profile, profile_cache_path
+
+class TestHyperProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "rooms.hyper")
+        export_to_hyper(pd.DataFrame({
+            "id": [f"rec{i:04d}" for i in range(2000)],
+            "Region": [None if i % 10 == 0 else ["East", "West", "East", "North"][i % 4] for i in range(2000)],
+            "Area": [float(i % 7) for i in range(2000)],
+        }), self.path, "Room")
+
+    def test_profile_is_computed_in_hyper(self):
+        profile = get_profile(self.path, top=2)
+        columns = {c["name"]: c for c in profile["columns"]}
+
+        self.assertEqual((profile["table"], profile["rows"], profile["cached"]), ("Room", 2000, False))
+        self.assertEqual(columns["Region"]["nulls"], 200)
+        self.assertEqual((columns["Region"]["min"], columns["Region"]["max"]), ("East", "West"))
+        self.assertEqual(columns["Region"]["distinct_approx"], 3)
+        self.assertEqual(columns["Region"]["top_values"], [{"value": "East", "count": 800}, {"value": "North", "count": 500}])
+        self.assertEqual((columns["Area"]["min"], columns["Area"]["max"]), (0.0, 6.0))
+        self.assertEqual(len(columns["Area"]["top_values"]), 2)
+        self.assertIsNone(columns["id"]["top_values"])  # nearly unique: not grouped
+
+    def test_profile_is_cached_next_to_the_file_by_mtime(self):
+        get_profile(self.path)
+        self.assertTrue(os.path.exists(profile_cache_path(self.path)))
+        with mock.patch.object(hyper_profile, "profile_table", side_effect=AssertionError("recomputed")):
+            self.assertTrue(get_profile(self.path)["cached"])
+
+        stat = os.stat(self.path)
+        export_to_hyper(pd.DataFrame({"id": ["a", "b"]}), self.path, "Room")
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        profile = get_profile(self.path)
+        self.assertEqual((profile["rows"], profile["cached"]), (2, False))
+
+if __name__ == "__main__":
+    unittest.main()
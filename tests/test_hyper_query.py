@@ -0,0 +1,55 @@
+import unittest
+from tableauhyperapi import SqlType, TableDefinition, TableName
+from src.airtable_to_tableau.libs.hyper_query import build_query, parse_filter, QueryError
+
+TABLE = TableDefinition(TableName("Extract", "Building"), [
+    TableDefinition.Column("Region", SqlType.text()),
+    TableDefinition.Column("Capacity", SqlType.big_int()),
+])
+
+class TestBuildQuery(unittest.TestCase):
+    def test_spec_is_escaped_into_sql(self):
+        sql = build_query({
+            "filters": [{"column": "Region", "op": "contains", "value": "x'; DROP TABLE t; --%"}],
+            "group_by": ["Region"],
+            "aggregates": [{"fn": "sum", "column": "Capacity", "as": "Total \"cap\""}],
+            "order_by": ["-Total \"cap\""],
+            "limit": 5,
+        }, TABLE)
+        self.assertEqual(
+            sql,
+            'SELECT "Region", SUM("Capacity") AS "Total ""cap""" FROM "Extract"."Building" '
+            "WHERE (\"Region\" LIKE E'%x''; DROP TABLE t; --\\\\%%') GROUP BY \"Region\" "
+            'ORDER BY "Total ""cap""" DESC LIMIT 5',
+        )
+
+    def test_numbers_compared_with_text_columns_are_text(self):
+        sql = build_query({"filters": [
+            {"column": "Region", "value": 7},
+            {"column": "Region", "op": "in", "value": [1.5, True]},
+            {"column": "Capacity", "value": 7},
+        ]}, TABLE)
+        self.assertTrue(sql.endswith("""WHERE ("Region" = '7') AND ("Region" IN ('1.5', 'true')) AND ("Capacity" = 7)"""))
+
+    def test_rejects_unknown_columns_ops_and_values(self):
+        for spec in (
+            {"columns": ["Nope"]},
+            {"filters": [{"column": "Region", "op": "~"}]},
+            {"filters": [{"column": "Region", "value": {"a": 1}}]},
+            {"columns": ["Capacity"], "group_by": ["Region"]},
+            {"limit": -1},
+        ):
+            with self.assertRaises(QueryError):
+                build_query(spec, TABLE)
+
+    def test_parse_filter_strings(self):
+        self.assertEqual(parse_filter("Capacity >= 100"), {"column": "Capacity", "op": ">=", "value": 100})
+        self.assertEqual(parse_filter("Region in East, West"), {"column": "Region", "op": "in", "value": ["East", "West"]})
+        self.assertEqual(parse_filter("Building Name contains a=b"), {"column": "Building Name", "op": "contains", "value": "a=b"})
+        self.assertEqual(parse_filter('Code = "007"'), {"column": "Code", "op": "=", "value": "007"})
+        self.assertEqual(parse_filter("Notes is_null"), {"column": "Notes", "op": "is_null"})
+        with self.assertRaises(QueryError):
+            parse_filter("Capacity")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import decimal
+import os
+import tempfile
+import unittest
+import pandas as pd
+from tableauhyperapi import SqlType
+from src.airtable_to_tableau.libs.hyper_schema import build_hyper_schema, output_columns, parse_hyper_type
+from src.airtable_to_tableau.libs.export_hyper import HyperTableWriter, export_to_hyper
+from src.airtable_to_tableau.libs.read_hyper import read_hyper_to_dataframe
+
+FIELDS = [
+    {"name": "Name", "type": "singleLineText"},
+    {"name": "Capacity", "type": "number", "options": {"precision": 0}},
+    {"name": "Budget", "type": "currency", "options": {"precision": 2}},
+    {"name": "Share", "type": "percent", "options": {"precision": 1}},
+    {"name": "Opened", "type": "date"},
+    {"name": "Modified", "type": "lastModifiedTime"},
+    {"name": "Score", "type": "formula", "options": {"result": {"type": "number", "options": {"precision": 1}}}},
+]
+
+class TestHyperSchema(unittest.TestCase):
+    def test_types_from_metadata_and_overrides(self):
+        columns = [
+            {"source": "Name"},
+            {"source": "Capacity"},
+            {"source": "Capacity", "rename": "Capacity Label", "type": "str"},
+            {"source": "Budget", "rename": "Budget USD"},
+            {"source": "Budget", "rename": "Budget Float", "type": "float"},
+            {"source": "Share"},
+            {"source": "Opened", "type": "str"},
+            {"source": "Modified", "type": "date"},
+            {"source": "Extra", "type": "int"},
+            {"source": "Score", "type": "float", "hyper_type": "double"},
+            {"source": "Not In Airtable", "hyper_type": "numeric(10, 3)"},
+            {"source": "Budget", "rename": "Budget Label", "format": "$%.2f"},
+        ]
+        types = build_hyper_schema(columns, FIELDS)
+
+        self.assertNotIn("Name", types)
+        # Precision 0 is display-only: the stored values can still be fractional
+        self.assertEqual(types["Capacity"], SqlType.double())
+        # The generic config "type" (generated configs always set one) never beats the metadata
+        self.assertEqual(types["Capacity Label"], SqlType.double())
+        self.assertEqual(types["Budget USD"], SqlType.numeric(18, 2))
+        self.assertEqual(types["Budget Float"], SqlType.numeric(18, 2))
+        self.assertEqual(types["Share"], SqlType.numeric(18, 3))
+        self.assertEqual(types["Opened"], SqlType.date())
+        self.assertEqual(types["Modified"], SqlType.timestamp_tz())
+        self.assertEqual(types["Extra"], SqlType.big_int())
+        self.assertEqual(types["Score"], SqlType.double())
+        self.assertEqual(types["Not In Airtable"], SqlType.numeric(10, 3))
+        self.assertEqual(types["Budget Label"], SqlType.text())
+        with self.assertRaises(ValueError):
+            parse_hyper_type("money")
+
+    def test_typed_columns_are_converted_on_export(self):
+        df = pd.DataFrame({
+            "Budget": [1234.567, None],
+            "Opened": ["2024-03-01", None],
+            "Modified": ["2024-03-01T10:15:00.000Z", "bad"],
+            "Rooms": [2.6, 0.4],
+        })
+        types = {
+            "Budget": SqlType.numeric(18, 2),
+            "Opened": SqlType.date(),
+            "Modified": SqlType.timestamp_tz(),
+            "Rooms": SqlType.big_int(),
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "typed.hyper")
+            export_to_hyper(df, output_file=output_file, table_name="Typed", column_types=types)
+            result = read_hyper_to_dataframe(output_file, "Typed")
+
+        self.assertEqual(result.loc[0, "Budget"], decimal.Decimal("1234.57"))
+        self.assertEqual(str(result.loc[0, "Opened"]), "2024-03-01")
+        self.assertIsNone(result.loc[1, "Opened"])
+        self.assertIsNone(result.loc[1, "Modified"])
+        self.assertEqual(list(result["Rooms"]), [3, 0])  # rounded, not truncated
+
+    def test_columns_from_metadata_survive_an_empty_first_chunk(self):
+        config = [{"source": "Name"}, {"source": "^B.*", "regex": True}, {"source": "Opened", "rename": "Opened On"}]
+        columns = output_columns(config, FIELDS, column_order=["Opened On"])
+        self.assertEqual(columns, ["Opened On", "Name", "Budget"])
+        self.assertIsNone(output_columns(config, None))
+
+        chunks = [
+            pd.DataFrame({"Opened On": ["2024-03-01"], "Name": ["a"]}),
+            pd.DataFrame({"Opened On": [None], "Name": ["b"], "Budget": [12.5]}),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "sparse.hyper")
+            types = build_hyper_schema(config, FIELDS)
+            with HyperTableWriter(output_file, "Sparse", column_types=types, columns=columns) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+            result = read_hyper_to_dataframe(output_file, "Sparse")
+
+        self.assertEqual(list(result.columns), ["Opened On", "Name", "Budget"])
+        self.assertEqual(list(result["Budget"]), [None, decimal.Decimal("12.50")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.airtable_to_tableau.libs import export_runner
+from src.airtable_to_tableau.libs.read_hyper import read_hyper_to_dataframe
+from src.airtable_to_tableau.libs.watermarks import load_watermark
+
+class TestIncrementalExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp.name, "buildings.hyper")
+        self.entry = {
+            "base_id": "appTest",
+            "table_name": "Building",
+            "output_file": self.output_file,
+            "incremental": True,
+            "columns": [{"source": "Name", "type": "str"}],
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fake_pages(self, base_id, table_name, api_key, stats=None, include_id=False, filter_formula=None, params=None):
+        self.formulas.append(filter_formula)
+        if filter_formula:
+            return iter([[
+                {"Name": "Beta v2", "_airtable_record_id": "rec2"},
+                {"Name": "Delta", "_airtable_record_id": "rec4"},
+            ]])
+        return iter([[
+            {"Name": "Alpha", "_airtable_record_id": "rec1"},
+            {"Name": "Beta", "_airtable_record_id": "rec2"},
+        ], [
+            {"Name": "Gamma", "_airtable_record_id": "rec3"},
+        ]])
+
+    def test_full_load_then_upsert(self):
+        self.formulas = []
+        with mock.patch.object(export_runner, "iter_airtable_pages", self.fake_pages), \
+                mock.patch.object(export_runner, "load_table_schema", return_value=None):
+            first = export_runner.export_table(self.entry, "key")
+            watermark = load_watermark(self.output_file, "Building")
+            second = export_runner.export_table(self.entry, "key")
+
+        self.assertEqual(first["rows"], 3)
+        self.assertIsNotNone(watermark)
+        self.assertIsNone(self.formulas[0])
+        self.assertIn(watermark, self.formulas[1])
+        self.assertEqual(second["rows"], 2)
+
+        df = read_hyper_to_dataframe(self.output_file, "Building")
+        rows = dict(zip(df["Airtable Record ID"], df["Name"]))
+        self.assertEqual(rows, {"rec1": "Alpha", "rec2": "Beta v2", "rec3": "Gamma", "rec4": "Delta"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import tempfile
+import unittest
+from unittest import mock
+from src.airtable_to_tableau.libs import metadata_cache
+from src.airtable_to_tableau.libs.metadata_cache import MetadataCache
+
+TABLES = {"tables": [
+    {"id": "tblA", "name": "Building", "fields": [{"name": "Name", "type": "singleLineText"}]},
+    {"id": "tblB", "name": "Region", "fields": [{"name": "Code", "type": "singleLineText"}]},
+]}
+
+def fake_response(status=200, body=None, etag=None):
+    response = mock.Mock()
+    response.status_code = status
+    response.headers = {"ETag": etag} if etag else {}
+    response.json.return_value = body
+    return response
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        patcher = mock.patch.object(metadata_cache, "get_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_fetch_per_base(self):
+        self.client.get.return_value = fake_response(body=TABLES)
+        cache = MetadataCache(ttl=60)
+        self.assertEqual(cache.get_table_fields("app1", "Building")[0]["name"], "Name")
+        self.assertEqual(cache.get_table_fields("app1", "tblB")[0]["name"], "Code")
+        self.assertIsNone(cache.get_table_fields("app1", "Missing"))
+        self.assertEqual(self.client.get.call_count, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_expired_entry_revalidates_with_etag(self):
+        self.client.get.side_effect = [fake_response(body=TABLES, etag='"v1"'), fake_response(status=304)]
+        cache = MetadataCache(ttl=0)
+        cache.get_table_fields("app1", "Building")
+        self.assertEqual(cache.get_table_fields("app1", "Region")[0]["name"], "Code")
+        self.assertEqual(self.client.get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+
+    def test_disk_layer_is_shared_between_instances(self):
+        self.client.get.return_value = fake_response(body=TABLES)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            MetadataCache(ttl=60, cache_dir=cache_dir).get_base("app1")
+            self.assertIsNotNone(MetadataCache(ttl=60, cache_dir=cache_dir).get_table_fields("app1", "Building"))
+        self.assertEqual(self.client.get.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
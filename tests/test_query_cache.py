@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.airtable_to_tableau.libs.query_cache import QueryCache, result_size
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "a.hyper")
+        with open(self.path, "w") as f:
+            f.write("v1")
+        self.loads = 0
+
+    def loader(self, rows=10):
+        def load():
+            self.loads += 1
+            return pd.DataFrame({"n": range(rows)})
+        return load
+
+    def test_hits_misses_and_file_rewrites(self):
+        cache = QueryCache(max_bytes=1024 * 1024)
+        first = cache.get_or_load(self.path, "T", "q", self.loader())
+        first["extra"] = 1
+        second = cache.get_or_load(self.path, "T", "q", self.loader())
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(list(second.columns), ["n"])
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 1))
+
+        with open(self.path, "w") as f:
+            f.write("version 2")
+        cache.get_or_load(self.path, "T", "q", self.loader())
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        size = result_size(pd.DataFrame({"n": range(100)}))
+        cache = QueryCache(max_bytes=size * 2)
+        for query in ("a", "b", "a", "c"):
+            cache.get_or_load(self.path, "T", query, self.loader(100))
+
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.get_or_load(self.path, "T", "a", self.loader(100))
+        self.assertEqual(self.loads, 3)
+        cache.get_or_load(self.path, "T", "too big", self.loader(1000))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import threading
+import time
+import unittest
+from src.airtable_to_tableau.libs.rate_limiter import TokenBucket, get_base_limiter
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_throttle(self):
+        bucket = TokenBucket(rate=20, capacity=5)
+        started = time.monotonic()
+        for _ in range(10):
+            bucket.acquire()
+        elapsed = time.monotonic() - started
+        # 5 tokens are free, the remaining 5 need 5/20 = 0.25s of refill
+        self.assertGreaterEqual(elapsed, 0.2)
+
+    def test_shared_across_threads(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started = time.monotonic()
+        threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_limiter_is_per_base(self):
+        self.assertIs(get_base_limiter("appA"), get_base_limiter("appA"))
+        self.assertIsNot(get_base_limiter("appA"), get_base_limiter("appB"))
+
+if __name__ == "__main__":
+    unittest.main()
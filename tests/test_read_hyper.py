@@ -0,0 +1,42 @@
+import io
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.airtable_to_tableau.libs.export_hyper import export_to_hyper
+from src.airtable_to_tableau.libs.read_hyper import read_hyper_page, count_hyper_rows, read_hyper_rows, write_hyper_rows
+
+class TestReadHyperPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "rows.hyper")
+        export_to_hyper(pd.DataFrame({"n": range(95), "label": [f"row {i}" for i in range(95)]}), self.path, "Rows")
+
+    def test_pages_come_from_hyper(self):
+        page = read_hyper_page(self.path, "Rows", limit=10, offset=90, order_by="n")
+        self.assertEqual(list(page["n"]), [90, 91, 92, 93, 94])
+        self.assertEqual(len(read_hyper_page(self.path, "Rows", limit=20)), 20)
+        self.assertIsNone(read_hyper_page(self.path, "Missing", limit=20))
+
+    def test_count_is_cached_until_the_file_changes(self):
+        self.assertEqual(count_hyper_rows(self.path, "Rows"), 95)
+        stat = os.stat(self.path)
+        export_to_hyper(pd.DataFrame({"n": range(3)}), self.path, "Rows")
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(count_hyper_rows(self.path, "Rows"), 3)
+
+    def test_bounded_reads_push_limit_columns_and_filters_into_hyper(self):
+        df = read_hyper_rows(self.path, limit=3, columns=["label"], where=["n >= 10", "label starts_with row 1"])
+        self.assertEqual(list(df.columns), ["label"])
+        self.assertEqual(list(df["label"]), ["row 10", "row 11", "row 12"])
+        self.assertEqual(len(read_hyper_rows(self.path, "Rows", limit=None)), 95)
+
+        out = io.BytesIO()
+        write_hyper_rows(out, self.path, limit=2, where="n in 7,8,9", fmt="ndjson")
+        self.assertEqual(out.getvalue().decode().splitlines(), ['{"n": 7, "label": "row 7"}', '{"n": 8, "label": "row 8"}'])
+        with self.assertRaises(ValueError):
+            read_hyper_rows(self.path, where="n ~ 3")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,5 +10,25 @@ class TestSanitizeDataFrame(unittest.TestCase):
         result = sanitize_dataframe(df)
         self.assertTrue(all(isinstance(v, str) or pd.isna(v) for v in result["col"]))
 
+    def test_native_dtypes_are_kept(self):
+        df = pd.DataFrame({
+            "count": [1, 2, 3],
+            "amount": [1.5, None, 2.0],
+            "flag": [True, None, False],
+            "name": ["a", None, "c"],
+        })
+        result = sanitize_dataframe(df)
+        self.assertTrue(pd.api.types.is_integer_dtype(result["count"]))
+        self.assertEqual(str(result["amount"].dtype), "Float64")
+        self.assertEqual(str(result["flag"].dtype), "boolean")
+        self.assertTrue(result["amount"].isna().iloc[1])
+        self.assertTrue(pd.isna(result["name"].iloc[1]))
+
+    def test_legacy_stringifies_scalars(self):
+        df = pd.DataFrame({"count": [1, 2], "flag": [True, False]})
+        result = sanitize_dataframe(df, legacy=True)
+        self.assertEqual(result["count"].tolist(), ["1", "2"])
+        self.assertEqual(result["flag"].tolist(), ["True", "False"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+import decimal
+import os
+import tempfile
+import unittest
+import pandas as pd
+from tableauhyperapi import SqlType
+from src.airtable_to_tableau.libs.sinks import ParquetSink, Sink, SinkGroup, table_outputs
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+class RecordingSink(Sink):
+    def __init__(self, path, fail=False):
+        super().__init__(path, "Building")
+        self.fail = fail
+        self.committed = None
+
+    def close(self, commit=True):
+        self.committed = commit
+        if self.fail:
+            raise OSError(f"could not close {self.path}")
+
+class TestSinks(unittest.TestCase):
+    def test_outputs_default_to_output_file(self):
+        entry = {"table_name": "Building", "output_file": "out/buildings.hyper"}
+        self.assertEqual(table_outputs(entry), [{"type": "hyper", "path": "out/buildings.hyper"}])
+
+        entry["outputs"] = [{"type": "hyper"}, {"type": "parquet", "compression": "zstd"}]
+        self.assertEqual([o["path"] for o in table_outputs(entry)], ["out/buildings.hyper", "out/buildings.parquet"])
+
+        entry["outputs"] = [{"type": "csv"}]
+        with self.assertRaises(ValueError):
+            table_outputs(entry)
+
+    def test_failed_close_abandons_remaining_sinks(self):
+        sinks = [RecordingSink("first", fail=True), RecordingSink("second"), RecordingSink("third")]
+        with self.assertRaises(OSError):
+            SinkGroup(sinks).close()
+        self.assertEqual([sink.committed for sink in sinks], [True, False, False])
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_sink_streams_typed_row_groups(self):
+        types = {"Budget": SqlType.numeric(18, 2), "Opened": SqlType.date()}
+        chunks = [
+            pd.DataFrame({"Name": ["a", None, "c"], "Budget": [1.25, None, 3.2], "Opened": ["2024-03-01", None, "bad"]}),
+            pd.DataFrame({"Name": ["d", "e"], "Budget": [4.0, 5.5], "Opened": ["2024-03-02", "2024-03-03"]}),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.parquet")
+            with ParquetSink(path, "Building", column_types=types, compression="zstd", row_group_size=2) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
+                self.assertFalse(os.path.exists(path))
+
+            parquet = pq.ParquetFile(path)
+            table = parquet.read()
+
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        self.assertEqual(str(table.schema.field("Budget").type), "decimal128(18, 2)")
+        self.assertEqual(str(table.schema.field("Opened").type), "date32[day]")
+        self.assertEqual(table.column("Name").to_pylist(), ["a", None, "c", "d", "e"])
+        self.assertEqual(table.column("Budget").to_pylist()[:2], [decimal.Decimal("1.25"), None])
+        self.assertIsNone(table.column("Opened").to_pylist()[2])
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_sink_keeps_columns_missing_from_the_first_chunk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.parquet")
+            with ParquetSink(path, "Building", column_types={"Budget": SqlType.double()}, columns=["Name", "Budget"]) as sink:
+                sink.write(pd.DataFrame({"Name": ["a"]}))
+                sink.write(pd.DataFrame({"Name": ["b"], "Budget": [2.5]}))
+            table = pq.read_table(path)
+
+        self.assertEqual(table.column_names, ["Name", "Budget"])
+        self.assertEqual(table.column("Budget").to_pylist(), [None, 2.5])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import pandas as pd
+from src.airtable_to_tableau.libs.transform_utils import apply_column_transformations, compile_transform_plan
+
+class TestTransformUtils(unittest.TestCase):
+    def test_vectorized_casts_keep_native_dtypes(self):
+        df = pd.DataFrame({
+            "Qty": ["1", "x", None, "3"],
+            "Price": [1.234, None, 2.0, 3.0],
+            "Active": ["yes", "No", "0", None],
+            "Opened": ["2024-01-02", "2024-01-03T10:00:00.000Z", None, "bad"],
+        })
+        columns = [
+            {"source": "Qty", "type": "int", "default": 0},
+            {"source": "Price", "type": "float", "format": "%.2f"},
+            {"source": "Active", "type": "bool", "default": False},
+            {"source": "Opened", "type": "date"},
+            {"source": "Missing", "default": "n/a"},
+        ]
+        result = apply_column_transformations(df, columns)
+
+        self.assertEqual(str(result["Qty"].dtype), "Int64")
+        self.assertEqual(result["Qty"].tolist(), [1, 0, 0, 3])
+        self.assertEqual(result["Price"].tolist(), ["1.23", None, "2.00", "3.00"])
+        self.assertEqual(result["Active"].tolist(), [True, False, False, False])
+        self.assertEqual(result.loc[1, "Opened"], pd.Timestamp("2024-01-03 10:00:00"))
+        self.assertTrue(pd.isna(result.loc[3, "Opened"]))
+        self.assertEqual(result["Missing"].tolist(), ["n/a"] * 4)
+
+    def test_plan_is_cached_and_regex_resolves_per_column_set(self):
+        columns = [{"source": "^Score", "regex": True, "type": "float"}]
+        plan = compile_transform_plan(columns, ["Score B"])
+        self.assertIs(plan, compile_transform_plan(columns, ["Score B"]))
+
+        df = pd.DataFrame({"Score A": ["1"], "Score B": ["2.5"], "Other": ["x"]})
+        result = plan.apply(df)
+        self.assertEqual(list(result.columns), ["Score B", "Score A"])
+        self.assertEqual(result.loc[0, "Score B"], 2.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from src.airtable_to_tableau.libs.export_hyper import export_to_hyper
+from src.airtable_to_tableau.libs.hyper_process import HyperProcessManager
+from src.airtable_to_tableau.web import routes
+from src.airtable_to_tableau.web.app import create_app
+
+class TestWebRoutes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        export_to_hyper(pd.DataFrame({"n": range(250)}), os.path.join(self.tmp.name, "big.hyper"), "Building")
+        export_to_hyper(
+            pd.DataFrame({"Region": ["East", "West", "East"], "Capacity": [10, 20, 30]}),
+            os.path.join(self.tmp.name, "small.hyper"),
+            "Building",
+        )
+        patcher = mock.patch.object(routes, "HYPER_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = create_app().test_client()
+
+    def test_view_reads_one_page_with_windowed_links(self):
+        response = self.client.get("/view/big.hyper?page=7&per_page=10")
+        html = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Showing 10 of 250 rows (page 7 of 25)", html)
+        self.assertIn("<td>60</td>", html)
+        self.assertNotIn("<td>59</td>", html)
+        self.assertIn("page=25", html)
+        self.assertNotIn("page=12", html)
+        self.assertEqual(routes.page_window(1, 3), [1, 2, 3])
+        self.assertEqual(routes.page_window(7, 25), [1, None, 5, 6, 7, 8, 9, None, 25])
+
+    def test_repeat_views_are_served_from_the_query_cache(self):
+        before = self.client.get("/cache/stats").get_json()
+        self.client.get("/view/big.hyper?page=2")
+        self.client.get("/view/big.hyper?page=2")
+        after = self.client.get("/cache/stats").get_json()
+
+        self.assertEqual(after["misses"] - before["misses"], 2)
+        self.assertEqual(after["hits"] - before["hits"], 2)
+
+    def test_query_api_streams_ndjson(self):
+        response = self.client.post("/api/hyper/small.hyper/query", json={
+            "filters": [{"column": "Capacity", "op": ">", "value": 5}],
+            "group_by": ["Region"],
+            "aggregates": [{"fn": "sum", "column": "Capacity", "as": "Total"}],
+            "order_by": ["-Total"],
+        })
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(rows, [{"Region": "East", "Total": 40}, {"Region": "West", "Total": 20}])
+
+        response = self.client.get("/api/hyper/small.hyper/query?columns=Region&order_by=-Capacity&limit=1")
+        self.assertEqual(response.get_data(as_text=True), '{"Region": "East"}\n')
+        self.assertEqual(self.client.get("/api/hyper/small.hyper/query?columns=Nope").status_code, 400)
+        self.assertEqual(self.client.get("/api/hyper/missing.hyper/query").status_code, 404)
+
+    def test_query_api_rejects_mistyped_filters_and_busy_pools(self):
+        response = self.client.get("/api/hyper/small.hyper/query?where=Region = 7")
+        self.assertEqual((response.status_code, response.get_data(as_text=True)), (200, ""))
+        response = self.client.get("/api/hyper/small.hyper/query?where=Capacity = abc")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Hyper rejected the query", response.get_json()["error"])
+
+        manager = HyperProcessManager(pool_size=1)
+        self.addCleanup(manager.shutdown)
+        with mock.patch("airtable_to_tableau.libs.hyper_process._manager", manager), \
+                mock.patch.object(routes, "STREAM_POOL_WAIT", 0.1), manager.connection():
+            response = self.client.get("/api/hyper/small.hyper/query")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_dump_streams_gzipped_csv(self):
+        response = self.client.get("/api/hyper/small.hyper/dump?format=csv&gzip=1&columns=Region&order_by=Capacity")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="small.csv.gz"', response.headers["Content-Disposition"])
+        self.assertEqual(gzip.decompress(response.get_data()).decode().splitlines(), ["Region", "East", "West", "East"])
+        self.assertEqual(self.client.get("/api/hyper/small.hyper/dump?format=xml").status_code, 400)
+
+        manager = HyperProcessManager(pool_size=1)
+        self.addCleanup(manager.shutdown)
+        with mock.patch("airtable_to_tableau.libs.hyper_process._manager", manager), \
+                mock.patch.object(routes, "STREAM_POOL_WAIT", 0.1), manager.connection():
+            self.assertEqual(self.client.get("/api/hyper/small.hyper/dump").status_code, 503)
+
+    def test_profile_page_and_json(self):
+        profile = self.client.get("/api/hyper/small.hyper/profile").get_json()
+        self.assertEqual(profile["rows"], 3)
+        self.assertEqual(profile["columns"][0]["top_values"][0], {"value": "East", "count": 2})
+        self.assertTrue(self.client.get("/api/hyper/small.hyper/profile").get_json()["cached"])
+        self.assertIn("Column Profile: small.hyper", self.client.get("/profile/small.hyper").get_data(as_text=True))
+        self.assertEqual(self.client.get("/api/hyper/missing.hyper/profile").status_code, 404)
+        with open(os.path.join(self.tmp.name, "broken.hyper"), "w") as f:
+            f.write("not an extract")
+        self.assertEqual(self.client.get("/api/hyper/broken.hyper/profile").status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()